@@ -1,162 +1,221 @@
-# import openai 
-# import os
-# from dotenv import load_dotenv
-# from flask import Flask, request, jsonify, render_template
+"""JSON API over the backend package for programmatic clients.
 
-# load_dotenv()
-# OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+Run it under a multi-worker WSGI server, e.g.
 
-# openai.api_key = OPENAI_API_KEY
+    SESSION_SECRET=... gunicorn -w 4 -k gthread --threads 8 -b 0.0.0.0:8080 app:app
 
-# app = Flask(__name__)
-# app.config["UPLOAD_FOLDER"] = "static"
-
-
-# @app.route('/', methods=['GET', 'POST'])
-# def main():
-#     if request.method == "POST":
-#         language = request.form["language"]
-#         file = request.files["file"]
-#         if file:
-#             filename = file.filename
-#             file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-            
-#             audio_file = open("static/Recording.mp3", "rb")
-#             transcript = openai.Audio.translate("whisper-1", audio_file)
-
-#             response = openai.ChatCompletion.create(
-#                     model="gpt-4",
-#                     messages = [{ "role": "system", "content": f"You will be provided with a sentence in English, and your task is to translate it into {language}" }, 
-#                                 { "role": "user", "content": transcript.text }],
-#                     temperature=0,
-#                     max_tokens=256
-#                   )
-            
-#             return jsonify(response)
-        
-    
-#     return render_template("index.html")
-
-
-
-# if __name__ == "__main__":
-#     app.run(host="0.0.0.0", debug=True, port=8080)
-
-
-
-
-import streamlit as st
+Every process shares the host's caches, S3 index and job queue with the
+Streamlit app. SESSION_SECRET is required: each worker must sign and check
+tokens with the same key. Log in with POST /api/login and send the returned token as
+`Authorization: Bearer <token>`. Audio uploads are raw request bodies
+(any Content-Type, chunked encoding allowed), streamed to S3 or Whisper
+without being buffered whole.
+"""
 import os
-import tempfile
-
-from backend.auth import authenticate_user, register_user
-from backend.s3_utils import list_s3_audio_files, download_s3_file
-from backend.openai_utils import transcribe_audio, translate_text
-
-# ------------------------- LOGIN / REGISTER -------------------------
-if "authenticated" not in st.session_state:
-    st.session_state.authenticated = False
-
-if "view" not in st.session_state:
-    st.session_state.view = "register"  # default is now register
-
-def switch_view(view_name):
-    st.session_state.view = view_name
-    st.rerun()
-
-if not st.session_state.authenticated:
-    if st.session_state.view == "login":
-        st.title("🔐 Login to Your Account")
-        with st.form("login_form"):
-            email = st.text_input("Email")
-            password = st.text_input("Password", type="password")
-            submitted = st.form_submit_button("Login")
-        if submitted:
-            if authenticate_user(email, password):
-                st.session_state.authenticated = True
-                st.success("✅ Login successful!")
-                st.rerun()
-            else:
-                st.error("❌ Invalid credentials")
-        st.info("New here?")
-        if st.button("Register here"):
-            switch_view("register")
-    elif st.session_state.view == "register":
-        st.title("📝 Create a New Account")
-        with st.form("register_form"):
-            new_email = st.text_input("Email")
-            new_password = st.text_input("Password", type="password")
-            confirm_password = st.text_input("Confirm Password", type="password")
-            submitted = st.form_submit_button("Register")
-        if submitted:
-            if new_password != confirm_password:
-                st.warning("⚠️ Passwords do not match.")
-            elif len(new_password) < 6:
-                st.warning("⚠️ Password must be at least 6 characters long.")
-            else:
-                success, msg = register_user(new_email, new_password)
-                if success:
-                    st.success(msg)
-                    if st.button("Go to Login"):
-                        switch_view("login")
-                else:
-                    st.error(msg)
-        st.info("Already registered?")
-        if st.button("Login here"):
-            switch_view("login")
-    st.stop()
-
-# ------------------------- AUDIO TRANSCRIPTION APP -------------------------
-st.title("🎙️ S3 Audio Transcription & Translation App")
-
-st.sidebar.header("Select Audio File")
-audio_files = list_s3_audio_files()
-selected_file = st.sidebar.selectbox("Choose an audio file", audio_files)
-
-languages = {
-    "Original (No Translation)": None,
-    "Hindi": "Hindi",
-    "Marathi": "Marathi",
-    "Japanese": "Japanese",
-    "Spanish": "Spanish",
-    "French": "French",
-    "German": "German"
-}
-target_language = st.sidebar.selectbox("Select Translation Language", list(languages.keys()))
-
-if selected_file:
-    st.write(f"Selected file: **{selected_file}**")
-    if st.button("Transcribe & Translate Audio"):
-        with st.spinner("Transcribing and translating audio..."):
-            try:
-                temp_path = os.path.join(tempfile.gettempdir(), f"temp_audio_{os.getpid()}{os.path.splitext(selected_file)[1]}")
-                download_s3_file(selected_file, temp_path)
-                transcript = transcribe_audio(temp_path)
-                st.success("✅ Transcription Complete!")
-                st.markdown("### 📝 Original Transcript")
-                st.write(transcript)
-                if languages[target_language]:
-                    translated = translate_text(transcript, languages[target_language])
-                    st.markdown(f"### 🌐 {target_language} Translation")
-                    st.write(translated)
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.download_button("Download Original", transcript, f"{selected_file}_original.txt")
-                    with col2:
-                        st.download_button(f"Download {target_language}", translated, f"{selected_file}_{target_language}.txt")
-                else:
-                    st.download_button("Download Transcript", transcript, f"{selected_file}_transcript.txt")
-            except Exception as e:
-                st.error(f"❌ Error: {e}")
-
-with st.sidebar.expander("ℹ️ How to use"):
-    st.write("""
-    1. Register or log in.
-    2. Select an audio file from S3.
-    3. Choose a translation language (optional).
-    4. Click 'Transcribe & Translate Audio'.
-    5. Download the results.
-    """)
-
-st.sidebar.markdown("---")
-st.sidebar.markdown("Made with ❤️ by Krishnat")
+import functools
+import mysql.connector
+from mysql.connector import errorcode
+from flask import Flask, Response, request, jsonify, g
+from werkzeug.exceptions import HTTPException
+from dotenv import load_dotenv
+from backend.auth import authenticate_user, create_user, AuthBusyError
+from backend.sessions import create_session, validate_session, revoke_session
+from backend.s3_utils import upload_custom_file_to_s3, get_user_prefixes, is_audio_key
+from backend.s3_index import list_indexed_audio_files, add_uploaded_object
+from backend.openai_utils import translate_text, translate_text_multi, translate_text_stream, LANGUAGES
+from backend.pipeline import transcribe_s3_object, transcribe_upload
+from backend.jobs import submit_job, get_job
+
+load_dotenv()
+
+if not os.getenv("SESSION_SECRET"):
+    # A per-process random key would make each gunicorn worker reject the others' tokens
+    raise RuntimeError("Set SESSION_SECRET before starting the API; every worker must share it")
+
+S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
+# Largest audio body accepted by /api/upload and /api/transcribe
+API_MAX_UPLOAD_BYTES = int(os.getenv("API_MAX_UPLOAD_BYTES", 500 * 1024 * 1024))
+# Longest text accepted by /api/translate
+API_MAX_TEXT_CHARS = int(os.getenv("API_MAX_TEXT_CHARS", 200_000))
+
+app = Flask(__name__)
+app.config["MAX_CONTENT_LENGTH"] = API_MAX_UPLOAD_BYTES
+
+
+class APIError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+@app.errorhandler(APIError)
+def handle_api_error(err):
+    return jsonify(error=str(err)), err.status
+
+@app.errorhandler(HTTPException)
+def handle_http_error(err):
+    return jsonify(error=err.description), err.code
+
+@app.errorhandler(AuthBusyError)
+def handle_auth_busy(err):
+    return jsonify(error=str(err)), 503
+
+@app.errorhandler(mysql.connector.Error)
+def handle_database_error(err):
+    # Pool exhaustion is temporary overload; anything else is our problem. No SQL details to clients
+    if isinstance(err, mysql.connector.errors.PoolError):
+        return jsonify(error="Database busy, please retry"), 503
+    app.logger.exception("database error")
+    return jsonify(error="Database error"), 500
+
+def require_login(view):
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        email = validate_session(token) if scheme.lower() == "bearer" else None
+        if email is None:
+            raise APIError("Missing or expired session token", 401)
+        g.email, g.token = email, token
+        return view(*args, **kwargs)
+    return wrapper
+
+def _json_body(*required):
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        raise APIError("Expected a JSON object body")
+    missing = [name for name in required if not body.get(name)]
+    if missing:
+        raise APIError(f"Missing field(s): {', '.join(missing)}")
+    return body
+
+def _language(value):
+    if value in (None, "", "all") or value in LANGUAGES.values():
+        return value or None
+    raise APIError(f"Unsupported language {value!r}")
+
+def _check_key(s3_key):
+    """Users may only touch their own recordings/ and custom_uploads/ objects"""
+    if not s3_key.startswith(tuple(get_user_prefixes(g.email))):
+        raise APIError("Not your file", 403)
+    if not is_audio_key(s3_key):
+        raise APIError("Not an audio file")
+    return s3_key
+
+def _audio_filename():
+    filename = os.path.basename(request.args.get("filename") or request.headers.get("X-Filename") or "")
+    if not filename or not is_audio_key(filename):
+        raise APIError("Pass the audio file name (with extension) as ?filename= or X-Filename")
+    return filename
+
+
+@app.get("/api/health")
+def health():
+    return jsonify(status="ok")
+
+@app.post("/api/register")
+def register():
+    body = _json_body("email", "password")
+    if len(body["password"]) < 6:
+        raise APIError("Password must be at least 6 characters long")
+    try:
+        create_user(body["email"], body["password"])
+    except mysql.connector.IntegrityError as err:
+        if err.errno != errorcode.ER_DUP_ENTRY:
+            raise
+        raise APIError("An account with this email already exists", 409)
+    return jsonify(message="Registration successful"), 201
+
+@app.post("/api/login")
+def login():
+    body = _json_body("email", "password")
+    if not authenticate_user(body["email"], body["password"]):
+        raise APIError("Invalid credentials", 401)
+    return jsonify(token=create_session(body["email"]))
+
+@app.post("/api/logout")
+@require_login
+def logout():
+    revoke_session(g.token)
+    return "", 204
+
+@app.get("/api/files")
+@require_login
+def list_files():
+    """The user's audio keys, from the local S3 index"""
+    prefixes = get_user_prefixes(g.email)
+    refresh = request.args.get("refresh", "").lower() in ("1", "true", "yes")
+    return jsonify(files=list_indexed_audio_files(S3_BUCKET_NAME, prefixes, force_refresh=refresh))
+
+@app.post("/api/upload")
+@require_login
+def upload():
+    """Stream the request body to custom_uploads/<user>/; ?transcribe=1 also queues a job"""
+    filename = _audio_filename()
+    language = _language(request.args.get("language"))
+    success, result = upload_custom_file_to_s3(S3_BUCKET_NAME, user_email=g.email,
+                                               fileobj=request.stream, filename=filename)
+    if not success:
+        raise APIError(f"Upload failed: {result}", 502)
+    add_uploaded_object(S3_BUCKET_NAME, result)
+    response = {"s3_key": result}
+    if request.args.get("transcribe", "").lower() in ("1", "true", "yes"):
+        response["job_id"] = submit_job(S3_BUCKET_NAME, result, language)
+    return jsonify(response), 201
+
+@app.post("/api/transcribe")
+@require_login
+def transcribe():
+    """Transcribe an audio request body, or {"s3_key": ...} of one of the user's files.
+
+    S3 files can also be queued instead ({"async": true}); poll the job.
+    """
+    if not request.is_json:
+        return jsonify(transcript=transcribe_upload(request.stream, _audio_filename()))
+    body = _json_body("s3_key")
+    s3_key = _check_key(body["s3_key"])
+    if body.get("async"):
+        job_id = submit_job(S3_BUCKET_NAME, s3_key, _language(body.get("language")))
+        return jsonify(job_id=job_id), 202
+    transcript, etag = transcribe_s3_object(S3_BUCKET_NAME, s3_key)
+    return jsonify(s3_key=s3_key, etag=etag, transcript=transcript)
+
+@app.post("/api/translate")
+@require_login
+def translate():
+    """{"text", "language"} or {"text", "languages": [...]}; ?stream=1 streams plain text"""
+    body = _json_body("text")
+    text = body["text"]
+    if len(text) > API_MAX_TEXT_CHARS:
+        raise APIError(f"Text longer than {API_MAX_TEXT_CHARS} characters", 413)
+    if body.get("languages"):
+        languages = [_language(language) for language in body["languages"]]
+        if not all(languages) or "all" in languages:
+            raise APIError("languages must list target languages")
+        return jsonify(translations=translate_text_multi(text, languages))
+    language = _language(body.get("language"))
+    if not language or language == "all":
+        raise APIError("Missing field(s): language")
+    if request.args.get("stream", "").lower() in ("1", "true", "yes"):
+        return Response(translate_text_stream(text, language), mimetype="text/plain; charset=utf-8")
+    return jsonify(translation=translate_text(text, language))
+
+@app.post("/api/jobs")
+@require_login
+def create_job():
+    body = _json_body("s3_key")
+    job_id = submit_job(S3_BUCKET_NAME, _check_key(body["s3_key"]), _language(body.get("language")))
+    return jsonify(job_id=job_id), 202
+
+@app.get("/api/jobs/<int:job_id>")
+@require_login
+def job_status(job_id):
+    job = get_job(job_id)
+    if job is None:
+        raise APIError("No such job", 404)
+    _check_key(job["s3_key"])
+    return jsonify(job)
+
+
+if __name__ == "__main__":
+    # Development server only; use gunicorn (see above) for real traffic
+    app.run(host="0.0.0.0", port=int(os.getenv("API_PORT", 8080)), threaded=True)
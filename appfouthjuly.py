@@ -1,29 +1,115 @@
 import streamlit as st
+import io
 import os
-import tempfile
-import speech_recognition as sr
-import openai
-import boto3
+import time
+import hashlib
+import threading
 from datetime import datetime
-from backend.auth import authenticate_user, register_user
-from backend.s3_utils import list_s3_audio_files, download_s3_file, upload_to_s3
-from backend.openai_utils import transcribe_audio, translate_text
+from backend.auth import authenticate_user, register_user, get_pool_metrics, AuthBusyError
+from backend.sessions import create_session, validate_session, revoke_session, SESSION_TTL_SECONDS
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from backend.s3_utils import upload_to_s3, get_user_prefixes, get_user_folder, UploadProgress, blob_cache
+from backend.audio_utils import preprocess_recording
+from backend.s3_index import list_indexed_audio_files, add_uploaded_object
+from backend.openai_utils import LANGUAGES
+from backend.pipeline import stream_s3_transcript, stream_s3_translation, start_s3_translations
+from backend.transcription import get_engine
+from backend.jobs import submit_job, get_job, JOB_POLL_SECONDS, JOB_QUEUED_WARNING_SECONDS
+from backend.cache import transcript_cache, translation_cache
+from backend.transcript_store import search_transcripts, is_enabled as transcript_store_enabled
+from backend import metrics
 
 # ------------------------- CONFIGURATION -------------------------
 
-if not os.path.exists("temp_files"):
-    os.makedirs("temp_files")
-# Initialize S3 client (make sure your AWS credentials are configured)
-s3_client = boto3.client('s3')
 S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")  # Replace with your bucket name
+# How long a rerun reuses the file list / cache stats before asking the index again
+FILE_LIST_CACHE_SECONDS = int(os.getenv("FILE_LIST_CACHE_SECONDS", 30))
+# UI label -> value passed to submit_job
+LANGUAGE_OPTIONS = {**LANGUAGES, "All Languages": "all"}
+# Also upload the untouched WAV under originals/<user>/ next to the compressed recording
+KEEP_ORIGINAL_RECORDINGS = os.getenv("KEEP_ORIGINAL_RECORDINGS", "false").lower() in ("1", "true", "yes")
+# Default for "Stream results live": show text as it arrives instead of waiting for a job worker.
+# Off by default so work goes through the job queue, which dedupes and bounds concurrent requests
+STREAM_RESULTS = os.getenv("STREAM_RESULTS", "false").lower() in ("1", "true", "yes")
+# Browser cookie holding the signed login session token
+SESSION_COOKIE = "session"
+# Recordings left in temp_files/ by a crashed or abandoned session are deleted after this long
+TEMP_FILE_MAX_AGE_SECONDS = int(os.getenv("TEMP_FILE_MAX_AGE_SECONDS", 24 * 3600))
 
-# Set OpenAI API key
-openai.api_key = os.getenv("OPENAI_API_KEY")  # Replace with your actual key
+def cleanup_temp_files(max_age_seconds=TEMP_FILE_MAX_AGE_SECONDS):
+    """Delete recordings older than `max_age_seconds` from temp_files/"""
+    now = time.time()
+    for filename in os.listdir("temp_files"):
+        file_path = os.path.join("temp_files", filename)
+        try:
+            if os.path.isfile(file_path) and now - os.path.getmtime(file_path) > max_age_seconds:
+                os.unlink(file_path)
+        except OSError:
+            pass
+
+@st.cache_resource
+def init_app():
+    """Process-wide setup; Streamlit runs this once, not on every rerun.
+
+    The OpenAI key is set when backend.openai_utils is imported.
+    """
+    os.makedirs("temp_files", exist_ok=True)
+    cleanup_temp_files()
+    # /metrics endpoint and/or periodic latency log, if METRICS_PORT / METRICS_LOG_SECONDS are set
+    metrics.start_from_env()
+    # Streaming mode transcribes in this process; keep a local model loaded
+    get_engine().warm_up()
+
+@st.cache_data(ttl=FILE_LIST_CACHE_SECONDS, show_spinner=False)
+def cached_audio_files(bucket_name, prefixes):
+    return list_indexed_audio_files(bucket_name, list(prefixes))
+
+@st.cache_data(ttl=FILE_LIST_CACHE_SECONDS, show_spinner=False)
+def cached_cache_stats():
+    return transcript_cache.stats(), translation_cache.stats(), blob_cache.stats()
+
+init_app()
 
 # ------------------------- AUTHENTICATION -------------------------
 if "authenticated" not in st.session_state:
     st.session_state.authenticated = False
 
+def set_session_cookie(token, max_age):
+    """Write (or with max_age=0 delete) the session cookie.
+
+    Streamlit can read the browser's cookies but not set them, so a
+    script-only iframe sets it on the app's own document.
+    """
+    st.iframe(
+        f"<script>window.parent.document.cookie = '{SESSION_COOKIE}={token}; Max-Age={max_age}; Path=/; "
+        f"SameSite=Strict' + (window.parent.location.protocol === 'https:' ? '; Secure' : '');</script>",
+        height="content",
+    )
+
+# A refresh starts a new Streamlit session; the signed token in the session
+# cookie lets a returning user back in with a cached lookup instead of
+# bcrypt + MySQL. Tokens used to travel as ?session=; strip them from old links.
+if "session" in st.query_params:
+    del st.query_params["session"]
+if not st.session_state.authenticated and not st.session_state.get("session_cookie_checked"):
+    st.session_state.session_cookie_checked = True
+    cookie_token = st.context.cookies.get(SESSION_COOKIE)
+    if cookie_token:
+        try:
+            session_email = validate_session(cookie_token)
+        except Exception:
+            session_email = None
+        if session_email:
+            st.session_state.authenticated = True
+            st.session_state.email = session_email
+            st.session_state.session_token = cookie_token
+        else:
+            st.session_state.pending_cookie = ("", 0)
+
+# Cookie changes are queued until the next full run; one cut short by st.rerun() may never reach the browser
+if "pending_cookie" in st.session_state:
+    set_session_cookie(*st.session_state.pop("pending_cookie"))
+
 if "view" not in st.session_state:
     st.session_state.view = "register"  # default is now register
 
@@ -39,12 +125,23 @@ if not st.session_state.authenticated:
             password = st.text_input("Password", type="password")
             submitted = st.form_submit_button("Login")
         if submitted:
-            if authenticate_user(email, password):
+            try:
+                authenticated = authenticate_user(email, password)
+            except AuthBusyError as e:
+                authenticated = None
+                st.warning(str(e))
+            if authenticated:
                 st.session_state.authenticated = True
                 st.session_state.email = email  # Store user email
+                try:
+                    st.session_state.session_token = create_session(email)
+                    st.session_state.pending_cookie = (st.session_state.session_token, SESSION_TTL_SECONDS)
+                except Exception as e:
+                    # Still logged in for this tab, just not remembered across refreshes
+                    st.warning(f"Couldn't save your session: {e}")
                 st.success("✅ Login successful!")
                 st.rerun()
-            else:
+            elif authenticated is not None:
                 st.error("❌ Invalid credentials")
         st.info("New here?")
         if st.button("Register here"):
@@ -77,88 +174,95 @@ if not st.session_state.authenticated:
 # ------------------------- MAIN APPLICATION -------------------------
 st.title("🎙️ Audio Transcription & Translation App")
 
-# Cleanup function to remove temp files
-def cleanup_temp_files():
-    for filename in os.listdir("temp_files"):
-        file_path = os.path.join("temp_files", filename)
-        try:
-            if os.path.isfile(file_path):
-                os.unlink(file_path)
-        except Exception as e:
-            st.error(f"Error deleting {file_path}: {e}")
-
 # Sidebar navigation
-app_mode = st.sidebar.radio("Navigation", ["View Files", "Create New Recording","Upload Custom File"])
+if st.sidebar.button("🚪 Logout"):
+    if st.session_state.get("session_token"):
+        revoke_session(st.session_state.session_token)
+    st.session_state.pending_cookie = ("", 0)
+    st.session_state.authenticated = False
+    st.session_state.session_token = None
+    st.session_state.view = "login"
+    st.rerun()
+app_mode = st.sidebar.radio("Navigation", ["View Files", "Create New Recording", "Upload Custom File", "Search Transcripts"])
 
 if app_mode == "View Files":
     # ------------------------- FILE VIEWING AND PROCESSING -------------------------
     st.header("📁 Your Audio Files")
     
-    # List files from S3
-    audio_files = list_s3_audio_files(S3_BUCKET_NAME)
+    # List files from the local S3 index (only stale prefixes are re-listed from S3)
+    show_all = st.checkbox("Show all files in bucket")
+    prefixes = [""] if show_all else get_user_prefixes(st.session_state.get("email"))
+    if st.button("🔄 Refresh file list"):
+        list_indexed_audio_files(S3_BUCKET_NAME, prefixes, force_refresh=True)
+        cached_audio_files.clear()
+    # Job polling reruns this page every second; reuse the list between reruns
+    audio_files = cached_audio_files(S3_BUCKET_NAME, tuple(prefixes))
     selected_file = st.selectbox("Choose an audio file", audio_files)
     
-    languages = {
-        "Original (No Translation)": None,
-        "Hindi": "Hindi",
-        "Marathi": "Marathi",
-        "Japanese": "Japanese",
-        "Spanish": "Spanish",
-        "French": "French",
-        "German": "German"
-    }
-    target_language = st.selectbox("Select Translation Language", list(languages.keys()))
+    target_language = st.selectbox("Select Translation Language", list(LANGUAGE_OPTIONS.keys()))
     
     if selected_file:
         st.write(f"Selected file: **{selected_file}**")
+        stream_results = st.checkbox("⚡ Stream results live", value=STREAM_RESULTS,
+                                     help="Show text as it is transcribed/translated. Unchecked, "
+                                          "the work is queued for the job workers instead.")
         if st.button("Transcribe & Translate Audio"):
-            with st.spinner("Processing audio..."):
+            language = LANGUAGE_OPTIONS[target_language]
+            if stream_results:
+                # Runs in this session; each piece is rendered as soon as it arrives
+                st.session_state.pop("job_id", None)
+                st.markdown("### 📝 Original Transcript")
                 try:
-                    # Download and process file
-                    safe_filename = os.path.basename(selected_file).replace("/", "_")
-                    temp_path = os.path.join("temp_files", f"temp_{safe_filename}")
-                    
-                    # Ensure temp_files directory exists
-                    os.makedirs("temp_files", exist_ok=True)
-                    
-                    # Download and process file
-                    download_s3_file(S3_BUCKET_NAME, selected_file, temp_path)
-                    
-                    # Verify file was downloaded
-                    if not os.path.exists(temp_path):
-                        st.error("Failed to download file from S3")
-                        raise FileNotFoundError(f"Could not find downloaded file at {temp_path}")
-
-
-                    # Transcribe audio
-                    transcript = transcribe_audio(temp_path)
-                    st.success("✅ Transcription Complete!")
-                    st.markdown("### 📝 Original Transcript")
-                    st.write(transcript)
-                    
-                    # Translate if requested
-                    if languages[target_language]:
-                        translated = translate_text(transcript, languages[target_language])
-                        st.markdown(f"### 🌐 {target_language} Translation")
-                        st.write(translated)
-                        
-                        # Download buttons
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.download_button("Download Original", transcript, f"{selected_file}_original.txt")
-                        with col2:
-                            st.download_button(f"Download {target_language}", translated, f"{selected_file}_{target_language}.txt")
+                    transcript = st.write_stream(stream_s3_transcript(S3_BUCKET_NAME, selected_file))
+                    st.download_button("Download Original", transcript, f"{selected_file}_original.txt")
+                    if language == "all":
+                        languages = [lang for lang in LANGUAGES.values() if lang]
                     else:
-                        st.download_button("Download Transcript", transcript, f"{selected_file}_transcript.txt")
-                    
-                    # Clean up
-                    # os.unlink(temp_path)
-                    if os.path.exists(temp_path):
-                        os.unlink(temp_path)
+                        languages = [language] if language else []
+                    # The other languages are translated concurrently while the first one streams
+                    others = start_s3_translations(S3_BUCKET_NAME, selected_file, transcript,
+                                                   languages[1:]) if len(languages) > 1 else None
+                    for language in languages[:1]:
+                        st.markdown(f"### 🌐 {language} Translation")
+                        translated = st.write_stream(
+                            stream_s3_translation(S3_BUCKET_NAME, selected_file, transcript, language))
+                        st.download_button(f"Download {language}", translated, f"{selected_file}_{language}.txt")
+                    if others is not None:
+                        with st.spinner("Finishing the other translations..."):
+                            translations = others.result()
+                        for language, translated in translations.items():
+                            st.markdown(f"### 🌐 {language} Translation")
+                            st.write(translated)
+                            st.download_button(f"Download {language}", translated, f"{selected_file}_{language}.txt")
+                    st.success("✅ Transcription Complete!")
                 except Exception as e:
                     st.error(f"❌ Error: {e}")
-                    if 'temp_path' in locals() and os.path.exists(temp_path):
-                        os.unlink(temp_path)
+            else:
+                # Work runs in the job workers (python -m backend.jobs); identical
+                # in-flight requests from other sessions share the same job
+                st.session_state.job_id = submit_job(S3_BUCKET_NAME, selected_file, language)
+
+        job = get_job(st.session_state.job_id) if "job_id" in st.session_state else None
+        if job and job["s3_key"] == selected_file:
+            if job["status"] in ("queued", "running"):
+                st.info(f"⏳ Job #{job['id']} is {job['status']}... this page refreshes automatically.")
+                if job["status"] == "queued" and time.time() - job["created_at"] > JOB_QUEUED_WARNING_SECONDS:
+                    st.warning("⚠️ No worker has picked this job up yet. "
+                               "Make sure the job workers are running (python -m backend.jobs).")
+                time.sleep(JOB_POLL_SECONDS)
+                st.rerun()
+            elif job["status"] == "failed":
+                st.error(f"❌ Error: {job['error']}")
+            else:
+                transcript = job["transcript"]
+                st.success("✅ Transcription Complete!")
+                st.markdown("### 📝 Original Transcript")
+                st.write(transcript)
+                st.download_button("Download Original", transcript, f"{selected_file}_original.txt")
+                for language, translated in job["translations"].items():
+                    st.markdown(f"### 🌐 {language} Translation")
+                    st.write(translated)
+                    st.download_button(f"Download {language}", translated, f"{selected_file}_{language}.txt")
 
 elif app_mode == "Create New Recording":
     # ------------------------- AUDIO RECORDING AND UPLOAD -------------------------
@@ -166,6 +270,8 @@ elif app_mode == "Create New Recording":
     
     # Button to start recording
     if st.button("🎙️ Start Recording"):
+        # Imported here so other pages (and servers without PyAudio) don't pay for it
+        import speech_recognition as sr
         recognizer = sr.Recognizer()
         
         with sr.Microphone() as source:
@@ -201,14 +307,35 @@ elif app_mode == "Create New Recording":
                     elif os.path.getsize(temp_filename) == 0:
                         st.error("Recording file is empty. Please record again.")
                     else:
-                    # Upload to S3
+                        # Mono 16 kHz FLAC with the silence trimmed is a fraction of the raw WAV
+                        with open(temp_filename, "rb") as f:
+                            processed, processed_name, report = preprocess_recording(f.read(), temp_filename)
+                        upload_start = time.perf_counter()
                         success, s3_key = upload_to_s3(
                             bucket_name=S3_BUCKET_NAME,
-                            local_path=temp_filename,
+                            fileobj=io.BytesIO(processed),
+                            filename=processed_name,
                             user_email=st.session_state.email
                         )
+                        upload_seconds = time.perf_counter() - upload_start
                         if success:
+                            if KEEP_ORIGINAL_RECORDINGS:
+                                upload_to_s3(
+                                    bucket_name=S3_BUCKET_NAME,
+                                    local_path=temp_filename,
+                                    s3_key=f"originals/{get_user_folder(st.session_state.email)}/"
+                                           f"{os.path.splitext(os.path.basename(s3_key))[0]}.wav"
+                                )
                             st.success(f"✅ File uploaded successfully to {s3_key}")
+                            st.caption(
+                                f"{report['original_bytes'] / 1024:.0f} KB WAV ({report['original_seconds']:.1f}s) → "
+                                f"{report['processed_bytes'] / 1024:.0f} KB {report['format'].upper()} "
+                                f"({report['processed_seconds']:.1f}s), "
+                                f"{1 - report['processed_bytes'] / report['original_bytes']:.0%} smaller; "
+                                f"uploaded in {upload_seconds:.2f}s"
+                            )
+                            add_uploaded_object(S3_BUCKET_NAME, s3_key)
+                            cached_audio_files.clear()
                         # Clean up
                             os.unlink(temp_filename)
                             del st.session_state.latest_recording
@@ -227,33 +354,98 @@ elif app_mode == "Upload Custom File":
                                    type=['wav', 'mp3', 'ogg', 'm4a'])  # Restrict to audio formats
     
     if uploaded_file is not None:
-        # Create temp file with proper extension
-        file_ext = os.path.splitext(uploaded_file.name)[1]
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp_file:
-            tmp_file.write(uploaded_file.getbuffer())
-            temp_path = tmp_file.name
-        
-        try:
-            # Use your existing upload_to_s3 function
-            success, s3_key = upload_to_s3(
-                bucket_name=S3_BUCKET_NAME,
-                local_path=temp_path,
-                user_email=st.session_state.email if 'email' in st.session_state else None
-            )
-            
-            if success:
-                st.success(f"✅ File uploaded successfully to: {s3_key}")
-                st.audio(temp_path)  # Preview the uploaded audio
-            else:
-                st.error(f"❌ Upload failed: {s3_key}")
-                
-        except Exception as e:
-            st.error(f"⚠️ Error during upload: {str(e)}")
-        finally:
-            # Clean up temp file
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+        # Streamlit reruns the script on every interaction; only upload a given file once.
+        # file_id is unique per upload, so a different file with the same name and size
+        # still goes through; older Streamlit versions fall back to a content hash.
+        upload_id = getattr(uploaded_file, "file_id", None) or hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+        if st.session_state.get("last_upload_id") != upload_id:
+            progress_bar = st.progress(0.0, text="Uploading to S3...")
+            script_ctx = get_script_run_ctx()
+
+            def show_progress(fraction, bytes_sent):
+                # boto3 reports progress from its own transfer threads
+                add_script_run_ctx(threading.current_thread(), script_ctx)
+                progress_bar.progress(fraction, text=f"Uploading to S3... {bytes_sent / (1024 * 1024):.1f} MB")
+
+            try:
+                # Stream the in-memory upload straight to S3 (multipart for large files)
+                success, s3_key = upload_to_s3(
+                    bucket_name=S3_BUCKET_NAME,
+                    fileobj=uploaded_file,
+                    filename=uploaded_file.name,
+                    user_email=st.session_state.email if 'email' in st.session_state else None,
+                    progress_callback=UploadProgress(uploaded_file.size, show_progress)
+                )
+                if success:
+                    st.session_state.last_upload_id = upload_id
+                    st.session_state.last_upload_key = s3_key
+                    add_uploaded_object(S3_BUCKET_NAME, s3_key)
+                    cached_audio_files.clear()
+                else:
+                    st.error(f"❌ Upload failed: {s3_key}")
+            except Exception as e:
+                st.error(f"⚠️ Error during upload: {str(e)}")
+            finally:
+                progress_bar.empty()
+
+        if st.session_state.get("last_upload_id") == upload_id:
+            st.success(f"✅ File uploaded successfully to: {st.session_state.last_upload_key}")
+            uploaded_file.seek(0)
+            st.audio(uploaded_file)  # Preview the uploaded audio
+
+elif app_mode == "Search Transcripts":
+    st.header("🔎 Search Transcripts")
+    if not transcript_store_enabled():
+        st.info("Transcript search needs the MySQL transcript store (set MYSQL_HOST or TRANSCRIPT_STORE=mysql).")
+    else:
+        query = st.text_input("Search your recordings")
+        search_languages = {"Original transcripts": "", **{k: v for k, v in LANGUAGES.items() if v},
+                            "All languages": "*"}
+        search_language = st.selectbox("Search in", list(search_languages.keys()))
+        if query:
+            try:
+                results = search_transcripts(query, st.session_state.get("email"), search_languages[search_language])
+            except Exception as e:
+                results = []
+                st.error(f"❌ Search failed: {e}")
+            if not results:
+                st.write("No matching transcripts.")
+            for result in results:
+                language = f" ({result['language']})" if result["language"] else ""
+                st.markdown(f"**{result['s3_key']}**{language}")
+                st.write(result["snippet"])
 
 # ------------------------- SIDEBAR FOOTER -------------------------
+with st.sidebar.expander("📊 Cache stats"):
+    stats, translation_stats, blob_stats = cached_cache_stats()
+    st.write(f"Transcript cache: {stats['hits']} hits / {stats['misses']} misses "
+             f"({stats['hit_rate']:.0%} hit rate)")
+    st.write(f"Saved {stats['saved_seconds']:.1f}s of Whisper time and "
+             f"{stats['saved_bytes'] / (1024 * 1024):.1f} MB of audio uploads")
+    st.write(f"Translation cache: {translation_stats['hits']} hits / {translation_stats['misses']} misses "
+             f"({translation_stats['hit_rate']:.0%} hit rate), saved {translation_stats['saved_seconds']:.1f}s")
+    st.write(f"Audio cache: {blob_stats['hits']} hits / {blob_stats['misses']} downloads "
+             f"({blob_stats['hit_rate']:.0%} hit rate), saved {blob_stats['saved_bytes'] / 1e6:.1f} MB of S3 downloads")
+
+with st.sidebar.expander("🗄 Database pool"):
+    pool = get_pool_metrics()
+    st.write(f"{pool['in_use']} of {pool['size']} connections in use, "
+             f"{pool['checkouts']} checkouts ({pool['timeouts']} timed out)")
+    st.write(f"Wait: {pool['wait_seconds_avg'] * 1000:.1f} ms avg, {pool['wait_seconds_max'] * 1000:.1f} ms max; "
+             f"{pool['created']} connections opened ({pool['reconnects']} reconnects)")
+
+with st.sidebar.expander("⏱ Stage latency"):
+    # Only stages run in this process; job workers expose their own /metrics
+    summary = metrics.stage_summary()
+    if summary:
+        st.table([
+            {"stage": stage, "calls": row["calls"], "errors": row["errors"],
+             "avg (s)": round(row["avg_seconds"], 3), "p95 ≤ (s)": row["p95_seconds"],
+             "MB": round(row["bytes"] / (1024 * 1024), 2)}
+            for stage, row in summary.items()
+        ])
+    else:
+        st.write("No calls recorded yet.")
+
 st.sidebar.markdown("---")
 st.sidebar.markdown("Made with ❤️ by [Your Name]")
\ No newline at end of file
@@ -1,13 +1,11 @@
 # this file only generate audio and download audio
 
 import streamlit as st
-import openai
+import io
 import speech_recognition as sr
-import tempfile
-import os
-
-# Set your OpenAI API key
-openai.api_key = ""  # Replace with your actual key
+# Short mic clips go to the configured engine (TRANSCRIBE_ENGINE); this also sets openai.api_key
+from backend.openai_utils import transcribe_audio
+from backend.tts import synthesize_speech_chunks
 
 st.set_page_config(page_title="Voice to AI Audio", page_icon="🎤")
 st.title("🎙️ Speak and Generate AI Voice (TTS)")
@@ -23,29 +21,18 @@ if st.button("🎧 Record from Mic"):
 
         try:
             st.info("Transcribing...")
-            text = recognizer.recognize_google(audio_data)
+            text = transcribe_audio(io.BytesIO(audio_data.get_wav_data()), filename="recording.wav")
             st.write("📝 Transcribed Text:")
             st.success(text)
 
-            # Call OpenAI TTS
-            st.info("Generating AI voice...")
-            response = openai.audio.speech.create(
-                model="tts-1",
-                voice="alloy",  # or shimmer, echo, etc.
-                input=text
-            )
-
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmpfile:
-                tmpfile.write(response.content)
-                tmpfile_path = tmpfile.name
-
-            st.audio(tmpfile_path, format="audio/mp3")
+            # Call OpenAI TTS; chunks are synthesized concurrently, then played
+            # as one clip (st.audio can't be appended to while it plays)
+            with st.spinner("Generating AI voice..."):
+                # MP3 chunks concatenate into one file; nothing is written to disk
+                speech = b"".join(synthesize_speech_chunks(text))
+            st.audio(speech, format="audio/mp3")
             st.success("🔊 Audio playback ready")
-
-            # Optionally allow download
-            with open(tmpfile_path, "rb") as f:
-                st.download_button("📥 Download Audio", f, file_name="output_audio.mp3", mime="audio/mp3")
+            st.download_button("📥 Download Audio", speech, file_name="output_audio.mp3", mime="audio/mp3")
 
         except Exception as e:
             st.error(f"⚠️ Error: {e}")
@@ -0,0 +1,266 @@
+import io
+import os
+import wave
+import array
+import math
+import sys
+import warnings
+from dotenv import load_dotenv
+
+with warnings.catch_warnings():
+    # Deprecated in 3.11; on 3.13+ the audioop-lts package provides it
+    warnings.simplefilter("ignore", DeprecationWarning)
+    import audioop
+
+load_dotenv()
+
+CHUNK_SECONDS = int(os.getenv('TRANSCRIBE_CHUNK_SECONDS', 120))
+CHUNK_OVERLAP_SECONDS = float(os.getenv('TRANSCRIBE_CHUNK_OVERLAP_SECONDS', 2))
+# How far either side of a window edge to look for a quiet spot to cut on
+SILENCE_SEARCH_SECONDS = float(os.getenv('TRANSCRIBE_SILENCE_SEARCH_SECONDS', 3))
+# Whisper rejects uploads over 25 MB; keep some headroom for container headers
+WHISPER_MAX_BYTES = 25 * 1024 * 1024
+CHUNK_MAX_BYTES = WHISPER_MAX_BYTES - 64 * 1024
+
+# Recordings are downmixed, resampled and trimmed before upload; Whisper works at 16 kHz
+PREPROCESS_SAMPLE_RATE = int(os.getenv('PREPROCESS_SAMPLE_RATE', 16000))
+PREPROCESS_FORMAT = os.getenv('PREPROCESS_FORMAT', 'flac')  # flac or wav
+# 16-bit RMS below which leading/trailing audio counts as silence
+TRIM_SILENCE_THRESHOLD = int(os.getenv('TRIM_SILENCE_THRESHOLD', 300))
+TRIM_PADDING_SECONDS = float(os.getenv('TRIM_PADDING_SECONDS', 0.25))
+
+# kbps for MPEG-1 and MPEG-2/2.5 Layer III, indexed by the header's bitrate bits
+_MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 0],
+}
+
+
+def split_audio(data, filename, chunk_seconds=CHUNK_SECONDS, overlap_seconds=CHUNK_OVERLAP_SECONDS):
+    """Split audio bytes into overlapping chunks of roughly `chunk_seconds`.
+
+    Returns a list of (chunk_bytes, chunk_filename) in playback order. WAV
+    is cut sample-accurately at the quietest point near each window edge;
+    MP3 is cut on frame boundaries using the stream's bitrate. Windows are
+    shrunk when needed so no chunk exceeds Whisper's upload limit. Other
+    formats can't be split without a decoder and come back as a single
+    chunk, or raise ValueError if that chunk is too large for Whisper.
+    """
+    name, ext = os.path.splitext(os.path.basename(filename))
+    ext = ext.lower()
+    if ext == '.wav':
+        chunks = _split_wav(data, chunk_seconds, overlap_seconds)
+    elif ext == '.mp3':
+        chunks = _split_mp3(data, chunk_seconds, overlap_seconds)
+    elif len(data) > WHISPER_MAX_BYTES:
+        raise ValueError(
+            f"{os.path.basename(filename)} is {len(data) / (1024 * 1024):.1f} MB, over Whisper's 25 MB "
+            f"limit, and {ext or 'this'} files can't be split; convert it to MP3 or WAV first."
+        )
+    else:
+        chunks = [data]
+    return [(chunk, f"{name}_part{i:03d}{ext}") for i, chunk in enumerate(chunks)]
+
+def estimate_duration(data, filename):
+    """Seconds of audio in WAV or MP3 bytes (MP3 assumes a constant bitrate),
+    or None for formats that can't be measured without a decoder"""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == '.wav':
+        try:
+            with wave.open(io.BytesIO(data), 'rb') as reader:
+                return reader.getnframes() / reader.getframerate()
+        except (wave.Error, EOFError, ZeroDivisionError):
+            return None
+    if ext == '.mp3':
+        first_frame = _next_mp3_frame(data, _skip_id3(data))
+        if first_frame is None:
+            return None
+        return (len(data) - first_frame) / (_mp3_bitrate(data, first_frame) * 1000 / 8)
+    return None
+
+def _split_wav(data, chunk_seconds, overlap_seconds):
+    with wave.open(io.BytesIO(data), 'rb') as reader:
+        params = reader.getparams()
+        frames = reader.readframes(params.nframes)
+
+    frame_size = params.sampwidth * params.nchannels
+    total_frames = len(frames) // frame_size
+    overlap = int(overlap_seconds * params.framerate)
+    # High sample rates/bit depths can push a full window past Whisper's limit;
+    # leave room for the overlap and the silence search moving the cut later
+    search = int(SILENCE_SEARCH_SECONDS * params.framerate)
+    max_window = CHUNK_MAX_BYTES // frame_size - overlap - max(search, overlap)
+    window = min(int(chunk_seconds * params.framerate), max_window)
+    # Never search back past the previous cut, or the loop below stops advancing
+    search = min(search, window // 2)
+    if total_frames <= window + overlap and len(data) <= CHUNK_MAX_BYTES:
+        return [data]
+
+    # Pick cut points at the quietest spot near each nominal window edge
+    cuts = [0]
+    while total_frames - cuts[-1] > window + overlap:
+        target = cuts[-1] + window
+        cuts.append(_quietest_frame(frames, params, target, search))
+    cuts.append(total_frames)
+
+    chunks = []
+    for start, end in zip(cuts, cuts[1:]):
+        start = max(0, start - overlap)
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as writer:
+            writer.setparams(params)
+            writer.writeframes(frames[start * frame_size:end * frame_size])
+        chunks.append(buffer.getvalue())
+    return chunks
+
+def _quietest_frame(frames, params, target, search):
+    """Frame index near `target` where a 50 ms window has the lowest RMS"""
+    if params.sampwidth != 2:
+        return target
+    frame_size = params.sampwidth * params.nchannels
+    total_frames = len(frames) // frame_size
+    step = max(1, params.framerate // 20)
+    lo = max(step, target - search)
+    hi = min(total_frames - step, target + search)
+
+    best, best_rms = target, None
+    for start in range(lo, hi, step):
+        samples = array.array('h', frames[start * frame_size:(start + step) * frame_size])
+        if sys.byteorder == 'big':
+            samples.byteswap()
+        if not samples:
+            continue
+        rms = math.sqrt(sum(s * s for s in samples) / len(samples))
+        if best_rms is None or rms < best_rms:
+            best, best_rms = start, rms
+    return best
+
+def _split_mp3(data, chunk_seconds, overlap_seconds):
+    audio_start = _skip_id3(data)
+    first_frame = _next_mp3_frame(data, audio_start)
+    if first_frame is None:
+        return [data]
+    bytes_per_second = _mp3_bitrate(data, first_frame) * 1000 // 8
+    overlap = int(overlap_seconds * bytes_per_second)
+    window = min(chunk_seconds * bytes_per_second, CHUNK_MAX_BYTES - overlap)
+    if len(data) - first_frame <= window + overlap and len(data) <= CHUNK_MAX_BYTES:
+        return [data]
+
+    cuts = [first_frame]
+    while len(data) - cuts[-1] > window + overlap:
+        cut = _next_mp3_frame(data, cuts[-1] + window)
+        if cut is None:
+            break
+        cuts.append(cut)
+    cuts.append(len(data))
+
+    chunks = []
+    for start, end in zip(cuts, cuts[1:]):
+        if start > first_frame:
+            start = _next_mp3_frame(data, max(first_frame, start - overlap)) or start
+        chunks.append(data[start:end])
+    return chunks
+
+def _skip_id3(data):
+    if data[:3] == b'ID3' and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        return 10 + size
+    return 0
+
+def _next_mp3_frame(data, offset):
+    """Offset of the next plausible MPEG audio frame header at or after `offset`"""
+    i = data.find(b'\xff', offset)
+    while i != -1 and i + 4 <= len(data):
+        b1, b2 = data[i + 1], data[i + 2]
+        if (b1 & 0xE0) == 0xE0 and (b1 >> 3) & 0x03 != 1 and (b1 >> 1) & 0x03 == 1 \
+                and (b2 >> 4) != 0x0F and (b2 >> 2) & 0x03 != 0x03:
+            return i
+        i = data.find(b'\xff', i + 1)
+    return None
+
+def _mp3_bitrate(data, offset):
+    version_bits = (data[offset + 1] >> 3) & 0x03
+    table = _MP3_BITRATES[1 if version_bits == 3 else 2]
+    return table[data[offset + 2] >> 4] or 128
+
+def normalize_wav(data, sample_rate=PREPROCESS_SAMPLE_RATE, trim=True):
+    """Return `data` as 16-bit mono WAV at `sample_rate`, optionally silence-trimmed"""
+    with wave.open(io.BytesIO(data), 'rb') as reader:
+        params = reader.getparams()
+        frames = reader.readframes(params.nframes)
+
+    if params.sampwidth != 2:
+        frames = audioop.lin2lin(frames, params.sampwidth, 2)
+    if params.nchannels == 2:
+        frames = audioop.tomono(frames, 2, 0.5, 0.5)
+    elif params.nchannels > 2:
+        # audioop only downmixes stereo; keep the first channel of anything wider
+        frame_size = 2 * params.nchannels
+        frames = b''.join(frames[i:i + 2] for i in range(0, len(frames), frame_size))
+    if params.framerate != sample_rate:
+        frames, _ = audioop.ratecv(frames, 2, 1, params.framerate, sample_rate, None)
+    if trim:
+        frames = trim_silence(frames, sample_rate)
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(sample_rate)
+        writer.writeframes(frames)
+    return buffer.getvalue()
+
+def trim_silence(frames, sample_rate, threshold=TRIM_SILENCE_THRESHOLD, padding_seconds=TRIM_PADDING_SECONDS):
+    """Drop leading/trailing 20 ms blocks of 16-bit mono audio quieter than `threshold`"""
+    block = max(2, sample_rate // 50 * 2)
+    loud = [i for i in range(0, len(frames), block) if audioop.rms(frames[i:i + block], 2) >= threshold]
+    if not loud:
+        return frames
+    padding = int(padding_seconds * sample_rate) * 2
+    return frames[max(0, loud[0] - padding):min(len(frames), loud[-1] + block + padding)]
+
+def encode_flac(wav_data):
+    """FLAC-encode WAV bytes with the flac binary bundled in speech_recognition.
+
+    Returns None when speech_recognition or a flac encoder isn't available.
+    """
+    try:
+        import speech_recognition as sr
+    except ImportError:
+        return None
+    with wave.open(io.BytesIO(wav_data), 'rb') as reader:
+        audio = sr.AudioData(reader.readframes(reader.getnframes()), reader.getframerate(), reader.getsampwidth())
+    try:
+        return audio.get_flac_data()
+    except OSError:
+        return None
+
+def preprocess_recording(data, filename, output_format=PREPROCESS_FORMAT, sample_rate=PREPROCESS_SAMPLE_RATE):
+    """Shrink a WAV recording before it goes to S3 and Whisper.
+
+    Downmixes to mono, resamples to `sample_rate`, trims leading/trailing
+    silence and encodes as FLAC (falling back to WAV if no encoder is
+    available). Returns (bytes, filename, report) where report holds the
+    byte counts and durations before and after.
+    """
+    with wave.open(io.BytesIO(data), 'rb') as reader:
+        original_seconds = reader.getnframes() / reader.getframerate()
+    processed = normalize_wav(data, sample_rate)
+    with wave.open(io.BytesIO(processed), 'rb') as reader:
+        processed_seconds = reader.getnframes() / reader.getframerate()
+
+    ext = '.wav'
+    if output_format == 'flac':
+        flac = encode_flac(processed)
+        if flac is not None:
+            processed, ext = flac, '.flac'
+
+    name = os.path.splitext(os.path.basename(filename))[0]
+    report = {
+        "original_bytes": len(data),
+        "processed_bytes": len(processed),
+        "original_seconds": original_seconds,
+        "processed_seconds": processed_seconds,
+        "format": ext.lstrip('.'),
+    }
+    return processed, f"{name}{ext}", report
@@ -1,7 +1,13 @@
 import os
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import mysql.connector
+from mysql.connector import pooling
 import bcrypt
 from dotenv import load_dotenv
+from backend.metrics import instrument, timer, register_collector
 
 load_dotenv()
 
@@ -10,33 +16,179 @@ MYSQL_USER = os.getenv("MYSQL_USER")
 MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD")
 MYSQL_DATABASE = os.getenv("MYSQL_DATABASE")
 
+MYSQL_POOL_NAME = os.getenv("MYSQL_POOL_NAME", "app_pool")
+MYSQL_POOL_SIZE = int(os.getenv("MYSQL_POOL_SIZE", 5))
+MYSQL_POOL_TIMEOUT = float(os.getenv("MYSQL_POOL_TIMEOUT", 5))
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", os.cpu_count() or 2))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", BCRYPT_WORKERS * 4))
+
+_pool = None
+_pool_lock = threading.Lock()
+# mysql.connector's pool fails immediately when exhausted; this semaphore
+# makes callers wait (up to MYSQL_POOL_TIMEOUT) for a free connection instead
+_pool_slots = threading.BoundedSemaphore(MYSQL_POOL_SIZE)
+_metrics_lock = threading.Lock()
+_pool_metrics = {
+    "created": 0,
+    "reconnects": 0,
+    "checkouts": 0,
+    "in_use": 0,
+    "timeouts": 0,
+    "wait_seconds_total": 0.0,
+    "wait_seconds_max": 0.0,
+}
+# Server thread id last seen on each pooled connection object
+_connection_ids = {}
+
+
+# bcrypt releases the GIL, so a small dedicated pool hashes in parallel
+# without letting a login burst oversubscribe every core in the process
+_hash_executor = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots = threading.BoundedSemaphore(BCRYPT_MAX_PENDING)
+
+
+class AuthBusyError(Exception):
+    """Raised when too many password hashes are already queued"""
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = pooling.MySQLConnectionPool(
+                    pool_name=MYSQL_POOL_NAME,
+                    pool_size=MYSQL_POOL_SIZE,
+                    pool_reset_session=True,
+                    host=MYSQL_HOST,
+                    user=MYSQL_USER,
+                    password=MYSQL_PASSWORD,
+                    database=MYSQL_DATABASE
+                )
+                with _metrics_lock:
+                    _pool_metrics["created"] += MYSQL_POOL_SIZE
+    return _pool
 
 def get_db_connection():
-    return mysql.connector.connect(
-        host=MYSQL_HOST,
-        user=MYSQL_USER,
-        password=MYSQL_PASSWORD,
-        database=MYSQL_DATABASE
-    )
+    """Check a connection out of the shared pool.
+
+    The pool pings the connection and reconnects it if the server dropped
+    it, so callers always get a live connection. Calling close() returns it
+    to the pool; prefer the db_connection() context manager.
+    """
+    conn = _get_pool().get_connection()
+    _note_connection(conn)
+    return conn
+
+def _note_connection(conn):
+    # The pool reconnects dropped connections silently; a reconnected
+    # connection comes back with a new server thread id
+    connection_id = conn.connection_id
+    key = id(getattr(conn, "_cnx", conn))
+    with _metrics_lock:
+        previous = _connection_ids.get(key)
+        _connection_ids[key] = connection_id
+        if previous is not None and previous != connection_id:
+            _pool_metrics["created"] += 1
+            _pool_metrics["reconnects"] += 1
+
+@contextmanager
+def db_connection():
+    """Borrow a pooled connection for the duration of a with-block"""
+    wait_start = time.monotonic()
+    if not _pool_slots.acquire(timeout=MYSQL_POOL_TIMEOUT):
+        with _metrics_lock:
+            _pool_metrics["timeouts"] += 1
+        raise mysql.connector.errors.PoolError("Timed out waiting for a database connection")
+    waited = time.monotonic() - wait_start
+    with _metrics_lock:
+        _pool_metrics["checkouts"] += 1
+        _pool_metrics["in_use"] += 1
+        _pool_metrics["wait_seconds_total"] += waited
+        _pool_metrics["wait_seconds_max"] = max(_pool_metrics["wait_seconds_max"], waited)
+    try:
+        conn = get_db_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+    finally:
+        with _metrics_lock:
+            _pool_metrics["in_use"] -= 1
+        _pool_slots.release()
+
+def get_pool_metrics():
+    """Snapshot of pool usage for monitoring"""
+    with _metrics_lock:
+        metrics = dict(_pool_metrics)
+    metrics["size"] = MYSQL_POOL_SIZE
+    checkouts = metrics["checkouts"]
+    metrics["wait_seconds_avg"] = metrics["wait_seconds_total"] / checkouts if checkouts else 0.0
+    return metrics
 
+def _pool_samples():
+    metrics = get_pool_metrics()
+    return [
+        ("mysql_pool_size", "gauge", metrics["size"]),
+        ("mysql_pool_in_use", "gauge", metrics["in_use"]),
+        ("mysql_pool_connections_created_total", "counter", metrics["created"]),
+        ("mysql_pool_reconnects_total", "counter", metrics["reconnects"]),
+        ("mysql_pool_checkouts_total", "counter", metrics["checkouts"]),
+        ("mysql_pool_timeouts_total", "counter", metrics["timeouts"]),
+        ("mysql_pool_wait_seconds_total", "counter", metrics["wait_seconds_total"]),
+        ("mysql_pool_wait_seconds_max", "gauge", metrics["wait_seconds_max"]),
+    ]
+
+register_collector(_pool_samples)
+
+@instrument("auth.bcrypt")
+def _run_hash(fn, *args):
+    """Run a bcrypt call on the hashing pool, failing fast when it is backed up"""
+    if not _hash_slots.acquire(blocking=False):
+        raise AuthBusyError("⏳ Server is busy, please try again in a moment.")
+    try:
+        future = _hash_executor.submit(fn, *args)
+    except Exception:
+        _hash_slots.release()
+        raise
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return future.result()
+
+def hash_password(password):
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    return _run_hash(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+def check_password(password, password_hash):
+    return _run_hash(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+@instrument("auth.authenticate")
 def authenticate_user(email, password):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT password_hash FROM users WHERE email = %s", (email,))
-    row = cursor.fetchone()
-    conn.close()
+    """Check credentials; raises AuthBusyError if the hashing pool is saturated"""
+    with timer("mysql.query"), db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT password_hash FROM users WHERE email = %s", (email,))
+        row = cursor.fetchone()
     if row:
-        return bcrypt.checkpw(password.encode('utf-8'), row[0].encode('utf-8'))
+        return check_password(password, row[0])
     return False
 
-def register_user(email, password):
-    try:
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-        conn = get_db_connection()
+@instrument("auth.register")
+def create_user(email, password):
+    """Insert a new user; raises AuthBusyError, or mysql.connector errors
+    (IntegrityError if the email is taken)"""
+    password_hash = hash_password(password)
+    with timer("mysql.query"), db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("INSERT INTO users (email, password_hash) VALUES (%s, %s)", (email, password_hash))
         conn.commit()
-        conn.close()
+
+def register_user(email, password):
+    try:
+        create_user(email, password)
         return True, "✅ Registration successful! You can now log in."
+    except AuthBusyError as err:
+        return False, str(err)
     except mysql.connector.Error as err:
         return False, f"❌ Error: {err}"
@@ -0,0 +1,163 @@
+"""Bulk-transcribe every audio object under an S3 prefix.
+
+Useful for warming the transcript/translation caches overnight:
+
+    python -m backend.batch --prefix recordings/ --languages Hindi,Spanish --output s3
+
+Completed keys are appended to a checkpoint file together with the
+languages and output mode they were processed for, so an interrupted run
+picks up where it left off, and a rerun with extra languages only redoes
+what is missing.
+"""
+import os
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from backend.s3_utils import iter_s3_objects, is_audio_key, upload_text_to_s3
+from backend.pipeline import transcribe_s3_file
+from backend.openai_utils import translate_text
+from backend.transcript_store import save_transcripts
+from backend.transcription import get_engine
+
+load_dotenv()
+
+TRANSCRIPTS_PREFIX = os.getenv('TRANSCRIPTS_PREFIX', 'transcripts/')
+
+
+class RateLimiter:
+    """Spaces calls out to at most `per_minute` across all threads"""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait_for = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if wait_for > 0:
+            time.sleep(wait_for)
+
+
+def load_checkpoint(path):
+    """Return {(key, etag): {output: set of languages}} for processed objects"""
+    done = {}
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    record = done.setdefault((entry["key"], entry["etag"]), {})
+                    record.setdefault(entry.get("output", "cache"), set()).update(entry.get("languages", []))
+    return done
+
+def is_done(record, languages, output):
+    """True when an earlier run already covered every requested language for this output"""
+    if record is None or output not in record and not (output == "cache" and "s3" in record):
+        return False
+    covered = set(record.get(output, set()))
+    if output == "cache":
+        # Writing to S3 also warmed the caches
+        covered |= record.get("s3", set())
+    return set(languages) <= covered
+
+def default_checkpoint_path(prefix):
+    safe_prefix = "".join(c if c.isalnum() else "_" for c in prefix).strip("_") or "bucket"
+    return f"batch_checkpoint_{safe_prefix}.jsonl"
+
+def transcript_key(s3_key, language=None):
+    suffix = f".{language}.txt" if language else ".txt"
+    return f"{TRANSCRIPTS_PREFIX}{s3_key}{suffix}"
+
+def process_object(bucket_name, obj, languages, output, limiter):
+    limiter.wait()
+    transcript = transcribe_s3_file(bucket_name, obj['key'])
+    translations = {}
+    start = time.time()
+    for language in languages:
+        limiter.wait()
+        translations[language] = translate_text(transcript, language)
+    engine = get_engine()
+    if engine.cacheable:
+        save_transcripts(bucket_name, obj['key'], obj['etag'], translations, compute_seconds=time.time() - start,
+                         engine=engine.identity)
+
+    if output == "s3":
+        upload_text_to_s3(bucket_name, transcript_key(obj['key']), transcript)
+        for language, text in translations.items():
+            upload_text_to_s3(bucket_name, transcript_key(obj['key'], language), text)
+    return transcript, translations
+
+def run_batch(bucket_name, prefix, languages=(), concurrency=4, per_minute=0,
+              checkpoint_path=None, output="cache", log=print):
+    """Transcribe (and translate) every audio object under `prefix`.
+
+    Returns a dict of counts: processed, skipped, failed.
+    """
+    done = load_checkpoint(checkpoint_path)
+    limiter = RateLimiter(per_minute)
+    counts = {"processed": 0, "skipped": 0, "failed": 0}
+    lock = threading.Lock()
+    checkpoint = open(checkpoint_path, "a", encoding="utf-8") if checkpoint_path else None
+
+    def work(obj):
+        try:
+            process_object(bucket_name, obj, languages, output, limiter)
+        except Exception as e:
+            log(f"FAILED {obj['key']}: {e}")
+            with lock:
+                counts["failed"] += 1
+            return
+        with lock:
+            counts["processed"] += 1
+            if checkpoint:
+                checkpoint.write(json.dumps({
+                    "key": obj['key'],
+                    "etag": obj['etag'],
+                    "languages": list(languages),
+                    "output": output,
+                }) + "\n")
+                checkpoint.flush()
+        log(f"done {obj['key']}")
+
+    try:
+        objects = []
+        for obj in iter_s3_objects(bucket_name, prefix):
+            if not is_audio_key(obj['key']):
+                continue
+            if is_done(done.get((obj['key'], obj['etag'])), languages, output):
+                counts["skipped"] += 1
+                continue
+            objects.append(obj)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(work, objects))
+    finally:
+        if checkpoint:
+            checkpoint.close()
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bucket", default=os.getenv("S3_BUCKET_NAME"))
+    parser.add_argument("--prefix", default="", help="e.g. recordings/ or custom_uploads/<user>/")
+    parser.add_argument("--languages", default="", help="comma-separated target languages, e.g. Hindi,Spanish")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=int, default=50, help="max API calls per minute (0 = unlimited)")
+    parser.add_argument("--checkpoint", default=None,
+                        help="checkpoint file (default: batch_checkpoint_<prefix>.jsonl)")
+    parser.add_argument("--output", choices=["cache", "s3"], default="cache",
+                        help="cache: only warm the local caches; s3: also write transcripts under TRANSCRIPTS_PREFIX")
+    args = parser.parse_args()
+
+    languages = [lang.strip() for lang in args.languages.split(",") if lang.strip()]
+    counts = run_batch(args.bucket, args.prefix, languages, args.concurrency, args.rate,
+                       args.checkpoint or default_checkpoint_path(args.prefix), args.output)
+    print(f"processed={counts['processed']} skipped={counts['skipped']} failed={counts['failed']}")
@@ -0,0 +1,358 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from botocore.exceptions import ClientError
+from dotenv import load_dotenv
+from backend import metrics
+
+load_dotenv()
+
+CACHE_DIR = os.getenv('CACHE_DIR', 'cache')
+CACHE_TTL_SECONDS = int(os.getenv('CACHE_TTL_SECONDS', 7 * 24 * 3600))
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 5000))
+# Disk quota for downloaded audio; 0 turns the blob cache off
+BLOB_CACHE_MAX_BYTES = int(os.getenv('BLOB_CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+# Temp files left behind by a crashed download are removed after this long
+BLOB_CACHE_STALE_TMP_SECONDS = 3600
+
+
+def make_key(*parts):
+    """Build a stable sha256 cache key from any number of parts"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def file_content_hash(local_path, chunk_size=1024 * 1024):
+    """sha256 of a local file, used in place of an ETag for files not in S3"""
+    digest = hashlib.sha256()
+    with open(local_path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class _CacheStats:
+    """Hit/miss counters kept in a SQLite file shared by every process"""
+
+    STAT_NAMES = ("hits", "misses", "saved_seconds", "saved_bytes")
+
+    def _stats_connection(self):
+        os.makedirs(os.path.dirname(self.stats_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.stats_path, timeout=30)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_stats ("
+            "namespace TEXT NOT NULL, name TEXT NOT NULL, value REAL NOT NULL, "
+            "PRIMARY KEY (namespace, name))"
+        )
+        return conn
+
+    def _count(self, **amounts):
+        try:
+            conn = self._stats_connection()
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO cache_stats (namespace, name, value) VALUES (?, ?, ?) "
+                        "ON CONFLICT (namespace, name) DO UPDATE SET value = value + excluded.value",
+                        [(self.namespace, name, amount) for name, amount in amounts.items()]
+                    )
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            # Stats are best effort; never fail a lookup because of them
+            pass
+
+    def _miss(self):
+        metrics.inc("cache_lookups_total", namespace=self.namespace, result="miss")
+        self._count(misses=1)
+
+    def stats(self):
+        """Counters summed over every process sharing this cache directory"""
+        stats = {name: 0 for name in self.STAT_NAMES}
+        try:
+            conn = self._stats_connection()
+            try:
+                rows = conn.execute(
+                    "SELECT name, value FROM cache_stats WHERE namespace = ?", (self.namespace,)
+                ).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            rows = []
+        for name, value in rows:
+            stats[name] = value
+        stats["hits"] = int(stats["hits"])
+        stats["misses"] = int(stats["misses"])
+        stats["saved_bytes"] = int(stats["saved_bytes"])
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+class DiskCache(_CacheStats):
+    """Small JSON-on-disk cache shared by every session on this host.
+
+    Entries older than `ttl` seconds are treated as misses, and once the
+    namespace holds more than `max_entries` files (or, with `max_bytes`,
+    more than that many bytes) the least recently used ones are deleted. Each entry may record how long the value took to
+    compute so the stats show how much time the hits saved. Counters live
+    in a SQLite file next to the entries, so the Streamlit app can report
+    hits made by the job workers in another process.
+    """
+
+    def __init__(self, namespace, ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, root=None, max_bytes=0):
+        self.namespace = namespace
+        self.directory = os.path.join(root or CACHE_DIR, namespace)
+        self.stats_path = os.path.join(root or CACHE_DIR, "stats.sqlite3")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._miss()
+            return None
+
+        if self.ttl and time.time() - entry.get("created_at", 0) > self.ttl:
+            self.delete(key)
+            self._miss()
+            return None
+
+        # Touch the file so eviction keeps recently used entries around
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        metrics.inc("cache_lookups_total", namespace=self.namespace, result="hit")
+        self._count(
+            hits=1,
+            saved_seconds=entry.get("cost_seconds", 0.0),
+            saved_bytes=entry.get("cost_bytes", 0),
+        )
+        return entry["value"]
+
+    def set(self, key, value, cost_seconds=0.0, cost_bytes=0):
+        os.makedirs(self.directory, exist_ok=True)
+        entry = {
+            "value": value,
+            "created_at": time.time(),
+            "cost_seconds": cost_seconds,
+            "cost_bytes": cost_bytes,
+        }
+        # Write to a private temp file first so readers never see half an entry
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._path(key))
+        self._evict()
+
+    def delete(self, key):
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        if not self.max_entries and not self.max_bytes:
+            return
+        try:
+            names = [n for n in os.listdir(self.directory) if n.endswith(".json")]
+        except OSError:
+            return
+        if self.max_entries and len(names) > self.max_entries:
+            paths = [os.path.join(self.directory, n) for n in names]
+            paths.sort(key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+            for path in paths[:len(paths) - self.max_entries]:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            names = [os.path.basename(p) for p in paths[len(paths) - self.max_entries:]]
+        if self.max_bytes:
+            self._evict_bytes(names)
+
+    def _evict_bytes(self, names):
+        entries, total = [], 0
+        for name in names:
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+            total += stat.st_size
+        entries.sort()
+        # The newest entry always stays, even if it alone is over the quota
+        for _, size, name in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            total -= size
+
+
+class BlobCache(_CacheStats):
+    """Local copies of S3 objects, keyed on bucket, key and ETag.
+
+    Each object lives at <namespace>/<hash of bucket+key>/<etag>.blob.
+    Downloads are written to a temp file and renamed into place, so
+    concurrent sessions never see a partial file. A cached copy is reused
+    without any request when the caller already knows the current ETag,
+    and otherwise revalidated with a conditional GET (If-None-Match), which
+    costs a 304 and no body when nothing changed. Once the files exceed
+    `max_bytes` the least recently used ones are deleted.
+    """
+
+    def __init__(self, namespace, get_client, max_bytes=BLOB_CACHE_MAX_BYTES, root=None):
+        self.namespace = namespace
+        self.directory = os.path.join(root or CACHE_DIR, namespace)
+        self.stats_path = os.path.join(root or CACHE_DIR, "stats.sqlite3")
+        self.get_client = get_client
+        self.max_bytes = max_bytes
+
+    def _entry_dir(self, bucket_name, s3_key):
+        return os.path.join(self.directory, make_key(bucket_name, s3_key))
+
+    def _cached(self, entry_dir):
+        """(etag, path) of the copy in `entry_dir`, or (None, None)"""
+        try:
+            names = [n for n in os.listdir(entry_dir) if n.endswith(".blob")]
+        except OSError:
+            return None, None
+        if not names:
+            return None, None
+        paths = [os.path.join(entry_dir, n) for n in names]
+        path = max(paths, key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+        return os.path.basename(path)[:-len(".blob")], path
+
+    def _hit(self, path):
+        try:
+            os.utime(path, None)
+            size = os.path.getsize(path)
+        except OSError:
+            return False
+        metrics.inc("cache_lookups_total", namespace=self.namespace, result="hit")
+        self._count(hits=1, saved_bytes=size)
+        return True
+
+    def get_path(self, bucket_name, s3_key, etag=None):
+        """Path of an up-to-date local copy, downloading it if needed.
+
+        The file may be evicted later; open it right away (or use open()).
+        """
+        entry_dir = self._entry_dir(bucket_name, s3_key)
+        cached_etag, path = self._cached(entry_dir)
+        if cached_etag is not None and cached_etag == etag and self._hit(path):
+            return path
+
+        request = {"Bucket": bucket_name, "Key": s3_key}
+        if cached_etag is not None:
+            request["IfNoneMatch"] = f'"{cached_etag}"'
+        with metrics.timer("s3.download"):
+            try:
+                response = self.get_client().get_object(**request)
+            except ClientError as err:
+                if cached_etag is None or err.response["Error"]["Code"] not in ("304", "NotModified"):
+                    raise
+                if self._hit(path):
+                    return path
+                # Our copy was evicted while the revalidation was in flight
+                response = self.get_client().get_object(Bucket=bucket_name, Key=s3_key)
+            self._miss()
+            return self._store(entry_dir, response)
+
+    def _store(self, entry_dir, response):
+        os.makedirs(entry_dir, exist_ok=True)
+        etag = response["ETag"].strip('"')
+        path = os.path.join(entry_dir, f"{etag}.blob")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                for block in iter(lambda: response["Body"].read(1024 * 1024), b''):
+                    f.write(block)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        finally:
+            response["Body"].close()
+        size = os.path.getsize(path)
+        metrics.record_bytes("s3.download", size, "in")
+        # Older versions of this object are never served again
+        for name in os.listdir(entry_dir):
+            if name.endswith(".blob") and name != os.path.basename(path):
+                try:
+                    os.unlink(os.path.join(entry_dir, name))
+                except OSError:
+                    pass
+        self._evict(keep=path)
+        return path
+
+    def open_cached(self, bucket_name, s3_key, etag):
+        """An open binary file of the copy with this ETag if one is already
+        cached, else None; never makes a request"""
+        cached_etag, path = self._cached(self._entry_dir(bucket_name, s3_key))
+        if etag is None or cached_etag != etag or not self._hit(path):
+            return None
+        try:
+            return open(path, "rb")
+        except FileNotFoundError:
+            return None
+
+    def open(self, bucket_name, s3_key, etag=None):
+        """An open binary file with the object's current content"""
+        path = self.get_path(bucket_name, s3_key, etag)
+        try:
+            return open(path, "rb")
+        except FileNotFoundError:
+            # Evicted by another session between download and open
+            return open(self.get_path(bucket_name, s3_key, etag), "rb")
+
+    def _evict(self, keep=None):
+        blobs, total, now = [], 0, time.time()
+        for dirpath, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith(".tmp") and now - stat.st_mtime > BLOB_CACHE_STALE_TMP_SECONDS:
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                elif name.endswith(".blob"):
+                    blobs.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+        blobs.sort()
+        for _, size, path in blobs:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+
+
+transcript_cache = DiskCache("transcripts")
+translation_cache = DiskCache("translations")
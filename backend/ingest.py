@@ -0,0 +1,196 @@
+"""Keep the local S3 index fresh from S3 event notifications.
+
+Point the bucket's ObjectCreated/ObjectRemoved notifications at an SQS
+queue (directly or through SNS) and run, on the same host as the app:
+
+    python -m backend.ingest --queue-url https://sqs.../recordings-events --transcribe
+
+New uploads show up in View Files as soon as their event arrives, and while
+the worker keeps polling without errors, listed prefixes count as fresh, so
+the app re-lists the bucket every S3_INDEX_RELIST_SECONDS instead of every
+S3_INDEX_TTL_SECONDS. Events are applied in S3's per-key `sequencer` order,
+whatever order they arrive in. With --transcribe every new recording is
+also queued for the job workers.
+"""
+import os
+import json
+import time
+import argparse
+import threading
+from urllib.parse import unquote_plus
+import boto3
+from botocore.config import Config
+from dotenv import load_dotenv
+from backend import s3_utils
+from backend.s3_index import upsert_object, delete_object, touch_prefixes
+from backend.jobs import submit_job
+from backend import metrics
+from backend.metrics import inc, instrument
+
+load_dotenv()
+
+INGEST_QUEUE_URL = os.getenv('INGEST_QUEUE_URL')
+SQS_ENDPOINT_URL = os.getenv('SQS_ENDPOINT_URL')  # e.g. a local moto/elasticmq server
+INGEST_WAIT_SECONDS = int(os.getenv('INGEST_WAIT_SECONDS', 20))
+INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', 10))
+INGEST_AUTO_TRANSCRIBE = os.getenv('INGEST_AUTO_TRANSCRIBE', 'false').lower() in ('1', 'true', 'yes')
+INGEST_LANGUAGE = os.getenv('INGEST_LANGUAGE') or None
+
+# Only user recordings are transcribed automatically (not originals/ or transcripts/)
+AUTO_TRANSCRIBE_PREFIXES = ("recordings/", "custom_uploads/")
+
+_client_lock = threading.Lock()
+_sqs_client = None
+
+
+def get_sqs_client():
+    """Process-wide SQS client, configured like the shared S3 client"""
+    global _sqs_client
+    if _sqs_client is None:
+        with _client_lock:
+            if _sqs_client is None:
+                session = boto3.session.Session(
+                    aws_access_key_id=s3_utils.aws_access_key_id,
+                    aws_secret_access_key=s3_utils.aws_secret_access_key,
+                    region_name=s3_utils.aws_region
+                )
+                _sqs_client = session.client(
+                    'sqs',
+                    endpoint_url=SQS_ENDPOINT_URL,
+                    config=Config(
+                        tcp_keepalive=True,
+                        # Long polls hold the connection for INGEST_WAIT_SECONDS
+                        read_timeout=INGEST_WAIT_SECONDS + 10,
+                        retries={'max_attempts': s3_utils.S3_MAX_ATTEMPTS, 'mode': s3_utils.S3_RETRY_MODE}
+                    )
+                )
+    return _sqs_client
+
+def parse_s3_events(body):
+    """Turn one SQS message body into a list of S3 event dicts.
+
+    Accepts direct S3 notifications and SNS-wrapped ones. Each event has
+    action ("created" or "removed"), bucket, and the object's key, size,
+    etag, last_modified and sequencer. S3's test event yields an empty list.
+    """
+    message = json.loads(body)
+    if message.get("Type") == "Notification" and "Message" in message:
+        message = json.loads(message["Message"])
+    events = []
+    for record in message.get("Records", []):
+        name = record.get("eventName", "")
+        if name.startswith("ObjectCreated"):
+            action = "created"
+        elif name.startswith("ObjectRemoved"):
+            action = "removed"
+        else:
+            continue
+        obj = record["s3"]["object"]
+        events.append({
+            "action": action,
+            "bucket": record["s3"]["bucket"]["name"],
+            # Keys arrive URL-encoded with spaces as '+'
+            "key": unquote_plus(obj["key"]),
+            "size": obj.get("size", 0),
+            "etag": obj.get("eTag", "").strip('"'),
+            "last_modified": record.get("eventTime", ""),
+            "sequencer": obj.get("sequencer", ""),
+        })
+    return events
+
+def apply_event(event, auto_transcribe=INGEST_AUTO_TRANSCRIBE, language=INGEST_LANGUAGE):
+    """Update the index for one event and queue a transcription if asked to.
+
+    Events older than one already applied to the same key (e.g. a Created
+    delivered after the object's Removed) are dropped.
+    """
+    if event["action"] == "removed":
+        applied = delete_object(event["bucket"], event["key"], event.get("sequencer"))
+    else:
+        applied = upsert_object(event["bucket"], event, event.get("sequencer"))
+        if applied and auto_transcribe and event["key"].startswith(AUTO_TRANSCRIBE_PREFIXES):
+            submit_job(event["bucket"], event["key"], language)
+    if not applied and s3_utils.is_audio_key(event["key"]):
+        inc("ingest_stale_events_total", action=event["action"])
+        return
+    inc("ingest_events_total", action=event["action"])
+
+@instrument("sqs.poll")
+def poll_once(queue_url, auto_transcribe=INGEST_AUTO_TRANSCRIBE, language=INGEST_LANGUAGE,
+              wait_seconds=INGEST_WAIT_SECONDS):
+    """Receive one batch, apply it and delete the messages that succeeded.
+
+    A message that fails stays on the queue and is redelivered after its
+    visibility timeout (and lands in the dead-letter queue, if configured).
+    Returns (events applied, buckets seen, messages that failed).
+    """
+    sqs = get_sqs_client()
+    response = sqs.receive_message(
+        QueueUrl=queue_url,
+        MaxNumberOfMessages=INGEST_BATCH_SIZE,
+        WaitTimeSeconds=wait_seconds
+    )
+    applied, buckets, failed, done = 0, set(), 0, []
+    for message in response.get("Messages", []):
+        try:
+            for event in parse_s3_events(message["Body"]):
+                apply_event(event, auto_transcribe, language)
+                buckets.add(event["bucket"])
+                applied += 1
+        except Exception:
+            failed += 1
+            inc("ingest_failed_messages_total")
+            continue
+        done.append({"Id": message["MessageId"], "ReceiptHandle": message["ReceiptHandle"]})
+    if done:
+        sqs.delete_message_batch(QueueUrl=queue_url, Entries=done)
+    return applied, buckets, failed
+
+def run_ingest(queue_url=INGEST_QUEUE_URL, bucket_name=None, auto_transcribe=INGEST_AUTO_TRANSCRIBE,
+               language=INGEST_LANGUAGE, stop_event=None, log=print):
+    """Poll until `stop_event` is set.
+
+    After every receive in which all messages were applied, the bucket's
+    listed prefixes are marked fresh as of the start of that receive, since
+    any change before then has been delivered. A receive with a failed
+    message doesn't extend freshness, since the index may be missing that
+    change; one that keeps failing is covered by the S3_INDEX_RELIST_SECONDS
+    re-list. If this worker stops, the index falls back to TTL re-listing.
+    """
+    stop_event = stop_event or threading.Event()
+    bucket_name = bucket_name or s3_utils.bucket_name
+    while not stop_event.is_set():
+        started = time.time()
+        try:
+            applied, buckets, failed = poll_once(queue_url, auto_transcribe, language)
+        except Exception as e:
+            log(f"poll failed: {e}")
+            stop_event.wait(5)
+            continue
+        if not failed:
+            for bucket in buckets | ({bucket_name} if bucket_name else set()):
+                touch_prefixes(bucket, started)
+        if applied or failed:
+            log(f"applied {applied} events, {failed} messages failed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queue-url", default=INGEST_QUEUE_URL)
+    parser.add_argument("--bucket", default=os.getenv("S3_BUCKET_NAME"),
+                        help="bucket whose index is kept fresh while polling")
+    parser.add_argument("--transcribe", action="store_true", default=INGEST_AUTO_TRANSCRIBE,
+                        help="queue a transcription job for every new recording")
+    parser.add_argument("--language", default=INGEST_LANGUAGE, help="also translate new recordings to this language")
+    parser.add_argument("--metrics-port", type=int, default=metrics.METRICS_PORT,
+                        help="serve Prometheus metrics on this port (0 = off)")
+    args = parser.parse_args()
+    if not args.queue_url:
+        parser.error("--queue-url or INGEST_QUEUE_URL is required")
+    if args.metrics_port:
+        metrics.start_metrics_server(args.metrics_port)
+    metrics.start_log_summary()
+    try:
+        run_ingest(args.queue_url, args.bucket, args.transcribe, args.language)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,263 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import threading
+from dotenv import load_dotenv
+from backend.pipeline import transcribe_s3_object
+from backend.transcript_store import save_transcripts
+from backend.openai_utils import translate_text, translate_text_multi, LANGUAGES
+from backend.transcription import get_engine
+from backend import metrics
+
+load_dotenv()
+
+JOBS_DB_PATH = os.getenv('JOBS_DB_PATH', os.path.join('cache', 'jobs.sqlite3'))
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))
+JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', 1))
+# A running job whose worker hasn't sent a heartbeat within this time is re-queued
+JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', 5 * 60))
+JOB_HEARTBEAT_SECONDS = float(os.getenv('JOB_HEARTBEAT_SECONDS', JOB_LEASE_SECONDS / 5))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+# The UI warns when a job has waited this long without a worker picking it up
+JOB_QUEUED_WARNING_SECONDS = int(os.getenv('JOB_QUEUED_WARNING_SECONDS', 60))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_schema_lock = threading.Lock()
+_schema_ready = set()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket TEXT NOT NULL,
+    s3_key TEXT NOT NULL,
+    language TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    transcript TEXT,
+    translations TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS jobs_lookup ON jobs (bucket, s3_key, language, status);
+"""
+
+
+def get_jobs_connection():
+    db_dir = os.path.dirname(JOBS_DB_PATH)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    # isolation_level=None lets us issue BEGIN IMMEDIATE ourselves, which
+    # takes the write lock up front so two workers can't claim the same job
+    conn = sqlite3.connect(JOBS_DB_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    with _schema_lock:
+        if JOBS_DB_PATH not in _schema_ready:
+            conn.executescript(_SCHEMA)
+            _schema_ready.add(JOBS_DB_PATH)
+    return conn
+
+def _row_to_job(row):
+    if row is None:
+        return None
+    job = dict(row)
+    job["translations"] = json.loads(job["translations"]) if job["translations"] else {}
+    return job
+
+def submit_job(bucket_name, s3_key, language=None):
+    """Queue a transcription (and optional translation) job and return its id.
+
+    If an identical job is already queued or running, its id is returned
+    instead, so many users clicking the same file trigger one API call.
+    `language` may be a single language, "all", or None for no translation.
+    """
+    conn = get_jobs_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT id FROM jobs WHERE bucket = ? AND s3_key = ? AND language IS ? AND status IN (?, ?) "
+            "ORDER BY id LIMIT 1",
+            (bucket_name, s3_key, language, QUEUED, RUNNING)
+        ).fetchone()
+        if row:
+            conn.execute("COMMIT")
+            return row["id"]
+        now = time.time()
+        cursor = conn.execute(
+            "INSERT INTO jobs (bucket, s3_key, language, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (bucket_name, s3_key, language, QUEUED, now, now)
+        )
+        conn.execute("COMMIT")
+        return cursor.lastrowid
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+def get_job(job_id):
+    conn = get_jobs_connection()
+    try:
+        return _row_to_job(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+    finally:
+        conn.close()
+
+def claim_next_job(worker_name):
+    """Atomically move the oldest queued job to running and return it"""
+    conn = get_jobs_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        now = time.time()
+        # Jobs whose worker died mid-way are re-queued, unless they have
+        # already used up their attempts (e.g. a file that OOMs every worker)
+        conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ? "
+            "WHERE status = ? AND updated_at < ? AND attempts >= ?",
+            (FAILED, "Worker stopped responding while processing this job", now,
+             RUNNING, now - JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS)
+        )
+        conn.execute(
+            "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ? AND updated_at < ?",
+            (QUEUED, now, RUNNING, now - JOB_LEASE_SECONDS)
+        )
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE status = ? ORDER BY id LIMIT 1", (QUEUED,)
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute(
+            "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+            (RUNNING, worker_name, now, row["id"])
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    job = _row_to_job(row)
+    job["status"] = RUNNING
+    job["attempts"] += 1
+    return job
+
+def heartbeat_job(job_id, worker_name):
+    """Extend a running job's lease so it isn't handed to another worker"""
+    conn = get_jobs_connection()
+    try:
+        conn.execute(
+            "UPDATE jobs SET updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+            (time.time(), job_id, worker_name, RUNNING)
+        )
+    finally:
+        conn.close()
+
+def complete_job(job_id, worker_name, transcript, translations=None):
+    """Record a finished job; returns False if `worker_name` no longer holds it
+    (its lease expired and the job was re-queued or claimed by another worker)"""
+    conn = get_jobs_connection()
+    try:
+        cursor = conn.execute(
+            "UPDATE jobs SET status = ?, transcript = ?, translations = ?, error = NULL, updated_at = ? "
+            "WHERE id = ? AND worker = ? AND status = ?",
+            (DONE, transcript, json.dumps(translations or {}), time.time(), job_id, worker_name, RUNNING)
+        )
+        return cursor.rowcount > 0
+    finally:
+        conn.close()
+
+def fail_job(job_id, worker_name, error, retry=False):
+    """Like complete_job, for a failed attempt"""
+    conn = get_jobs_connection()
+    try:
+        cursor = conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+            (QUEUED if retry else FAILED, error, time.time(), job_id, worker_name, RUNNING)
+        )
+        return cursor.rowcount > 0
+    finally:
+        conn.close()
+
+def process_job(job):
+    """Run one job through the cached transcription/translation pipeline"""
+    transcript, etag = transcribe_s3_object(job["bucket"], job["s3_key"])
+    language = job["language"]
+    start = time.time()
+    if language == "all":
+        translations = translate_text_multi(transcript, [lang for lang in LANGUAGES.values() if lang])
+    elif language:
+        translations = {language: translate_text(transcript, language)}
+    else:
+        translations = {}
+    # Keep translations searchable alongside the transcript
+    engine = get_engine()
+    if engine.cacheable:
+        save_transcripts(job["bucket"], job["s3_key"], etag, translations, compute_seconds=time.time() - start,
+                         engine=engine.identity)
+    return transcript, translations
+
+def _worker_loop(worker_name, stop_event):
+    while not stop_event.is_set():
+        job = claim_next_job(worker_name)
+        if job is None:
+            stop_event.wait(JOB_POLL_SECONDS)
+            continue
+        done = threading.Event()
+        heartbeat = threading.Thread(target=_heartbeat_loop, args=(job["id"], worker_name, done), daemon=True)
+        heartbeat.start()
+        try:
+            transcript, translations = process_job(job)
+        except Exception as e:
+            owned = fail_job(job["id"], worker_name, str(e), retry=job["attempts"] < JOB_MAX_ATTEMPTS)
+        else:
+            owned = complete_job(job["id"], worker_name, transcript, translations)
+        finally:
+            done.set()
+            heartbeat.join()
+        if not owned:
+            # Another worker re-ran it after our lease lapsed; its result wins
+            metrics.inc("jobs_lost_lease_total")
+
+def _heartbeat_loop(job_id, worker_name, done):
+    while not done.wait(JOB_HEARTBEAT_SECONDS):
+        try:
+            heartbeat_job(job_id, worker_name)
+        except sqlite3.Error:
+            pass
+
+def run_workers(num_workers=JOB_WORKERS, stop_event=None):
+    """Process jobs on `num_workers` threads until `stop_event` is set"""
+    stop_event = stop_event or threading.Event()
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    threads = [
+        threading.Thread(target=_worker_loop, args=(f"{prefix}:{i}", stop_event), daemon=True)
+        for i in range(num_workers)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=1)
+    except KeyboardInterrupt:
+        stop_event.set()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run transcription/translation job workers")
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS)
+    parser.add_argument("--metrics-port", type=int, default=metrics.METRICS_PORT,
+                        help="serve Prometheus metrics on this port (0 = off)")
+    args = parser.parse_args()
+    if args.metrics_port:
+        metrics.start_metrics_server(args.metrics_port)
+    metrics.start_log_summary()
+    # Load a local model (TRANSCRIBE_ENGINE=local/auto) before the first job, not during it
+    get_engine().warm_up()
+    run_workers(args.workers)
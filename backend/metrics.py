@@ -0,0 +1,248 @@
+import os
+import time
+import inspect
+import logging
+import threading
+import functools
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Serve Prometheus text on this port (0 = off); each process exposes its own
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+# Log a one-line-per-stage latency summary this often (0 = off)
+METRICS_LOG_SECONDS = float(os.getenv('METRICS_LOG_SECONDS', 0))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_collectors = []
+_server = None
+_log_thread = None
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus layout"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for upper, count in zip(self.buckets, self.counts):
+            if count >= rank:
+                return upper
+        return float("inf")
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+def inc(name, amount=1, **labels):
+    key = (name, _labels_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+def observe(name, value, **labels):
+    key = (name, _labels_key(labels))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(value)
+
+def record_bytes(stage, amount, direction):
+    """Count bytes moved by a stage; direction is "in" (received) or "out" (sent)"""
+    if amount:
+        inc("stage_bytes_total", amount, stage=stage, direction=direction)
+
+@contextmanager
+def timer(stage):
+    """Time a block as `stage`, counting calls and errors by exception type"""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as err:
+        inc("stage_errors_total", stage=stage, error=type(err).__name__)
+        raise
+    finally:
+        observe("stage_latency_seconds", time.perf_counter() - start, stage=stage)
+        inc("stage_calls_total", stage=stage)
+
+def instrument(stage):
+    """Decorator form of timer(); generators are timed until exhausted"""
+    def decorator(fn):
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with timer(stage):
+                    yield from fn(*args, **kwargs)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with timer(stage):
+                    return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def register_collector(collect):
+    """Have render_prometheus also call `collect()`, which returns
+    (name, type, value) samples read from elsewhere (e.g. pool gauges)"""
+    with _lock:
+        _collectors.append(collect)
+
+def reset():
+    """Drop every recorded value (for tests and benchmarks)"""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = [(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+def render_prometheus():
+    """Every counter and histogram in the Prometheus text exposition format"""
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted(
+            (key, (list(h.buckets), list(h.counts), h.sum, h.count)) for key, h in _histograms.items()
+        )
+    lines = []
+    typed = set()
+    for (name, labels), value in counters:
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    for (name, labels), (buckets, counts, total, count) in histograms:
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        for upper, bucket_count in zip(buckets, counts):
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', upper)])} {bucket_count}")
+        lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    with _lock:
+        collectors = list(_collectors)
+    for collect in collectors:
+        for name, kind, value in collect():
+            if name not in typed:
+                lines.append(f"# TYPE {name} {kind}")
+                typed.add(name)
+            lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+def stage_summary():
+    """Per-stage calls, errors, mean/p50/p95 latency and bytes, for the UI and logs"""
+    summary = {}
+    with _lock:
+        for (name, labels), histogram in _histograms.items():
+            stage = dict(labels).get("stage")
+            if name != "stage_latency_seconds" or stage is None:
+                continue
+            summary[stage] = {
+                "calls": histogram.count,
+                "errors": 0,
+                "avg_seconds": histogram.sum / histogram.count if histogram.count else 0.0,
+                "p50_seconds": histogram.quantile(0.5),
+                "p95_seconds": histogram.quantile(0.95),
+                "bytes": 0,
+            }
+        for (name, labels), value in _counters.items():
+            labels = dict(labels)
+            row = summary.get(labels.get("stage"))
+            if row is None:
+                continue
+            if name == "stage_errors_total":
+                row["errors"] += value
+            elif name == "stage_bytes_total":
+                row["bytes"] += value
+    return dict(sorted(summary.items()))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port, host="0.0.0.0"):
+    """Serve /metrics from a daemon thread and return the bound port.
+
+    Only the first call starts a server, so it is safe to call on every
+    Streamlit rerun. Port 0 picks a free port.
+    """
+    global _server
+    with _lock:
+        if _server is None:
+            server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+            _server = server
+        return _server.server_address[1]
+
+def start_log_summary(interval=METRICS_LOG_SECONDS):
+    """Log stage_summary() every `interval` seconds from a daemon thread"""
+    global _log_thread
+    if not interval:
+        return
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            for stage, row in stage_summary().items():
+                logger.info(
+                    "%s calls=%d errors=%d avg=%.3fs p50<=%.3fs p95<=%.3fs bytes=%d",
+                    stage, row["calls"], row["errors"], row["avg_seconds"],
+                    row["p50_seconds"], row["p95_seconds"], row["bytes"]
+                )
+
+    if not logging.getLogger().handlers and not logger.handlers:
+        # Nothing configured logging (e.g. under Streamlit); still get the lines out
+        logger.addHandler(logging.StreamHandler())
+        logger.setLevel(logging.INFO)
+    with _lock:
+        if _log_thread is None:
+            _log_thread = threading.Thread(target=loop, name="metrics-log", daemon=True)
+            _log_thread.start()
+
+def start_from_env():
+    """Start whatever METRICS_PORT / METRICS_LOG_SECONDS ask for"""
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+    start_log_summary(METRICS_LOG_SECONDS)
@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import random
+import asyncio
+import threading
+import openai
+from openai import error as openai_error
+from dotenv import load_dotenv
+
+load_dotenv()
+
+OPENAI_REQUESTS_PER_MINUTE = int(os.getenv('OPENAI_REQUESTS_PER_MINUTE', 500))
+OPENAI_TOKENS_PER_MINUTE = int(os.getenv('OPENAI_TOKENS_PER_MINUTE', 80000))
+OPENAI_MAX_CONCURRENCY = int(os.getenv('OPENAI_MAX_CONCURRENCY', 8))
+OPENAI_TIMEOUT_SECONDS = float(os.getenv('OPENAI_TIMEOUT_SECONDS', 120))
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', 5))
+OPENAI_BACKOFF_BASE_SECONDS = float(os.getenv('OPENAI_BACKOFF_BASE_SECONDS', 1))
+OPENAI_BACKOFF_MAX_SECONDS = float(os.getenv('OPENAI_BACKOFF_MAX_SECONDS', 60))
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) for rate limiting"""
+    return max(1, len(text) // 4)
+
+def _is_retryable(err):
+    if isinstance(err, (openai_error.RateLimitError, openai_error.ServiceUnavailableError,
+                        openai_error.Timeout, openai_error.APIConnectionError,
+                        openai_error.TryAgain, asyncio.TimeoutError)):
+        return True
+    if isinstance(err, openai_error.APIError):
+        return err.http_status is None or err.http_status >= 500
+    return False
+
+def _retry_after(err):
+    headers = getattr(err, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at `rate_per_minute`"""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount=1):
+        # Requests bigger than the whole bucket would wait forever; cap them
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class AsyncOpenAIClient:
+    """Rate-limited, retrying asyncio wrapper around the Whisper and chat endpoints.
+
+    Every call waits for a request-per-minute and a token-per-minute budget
+    and for a slot in a concurrency semaphore, runs under a timeout, and is
+    retried with exponential backoff plus jitter on 429s, 5xx and timeouts.
+    """
+
+    def __init__(self, requests_per_minute=OPENAI_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=OPENAI_TOKENS_PER_MINUTE,
+                 max_concurrency=OPENAI_MAX_CONCURRENCY,
+                 timeout=OPENAI_TIMEOUT_SECONDS,
+                 max_retries=OPENAI_MAX_RETRIES):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.stats = {"calls": 0, "retries": 0, "failures": 0}
+
+    async def _call(self, make_request, tokens=0, before_attempt=None):
+        attempt = 0
+        while True:
+            await self.request_bucket.acquire(1)
+            if tokens:
+                await self.token_bucket.acquire(tokens)
+            async with self.semaphore:
+                if before_attempt:
+                    before_attempt()
+                self.stats["calls"] += 1
+                try:
+                    return await asyncio.wait_for(make_request(), self.timeout)
+                except Exception as err:
+                    if not _is_retryable(err) or attempt >= self.max_retries:
+                        self.stats["failures"] += 1
+                        raise
+                    delay = _retry_after(err)
+            if delay is None:
+                delay = min(OPENAI_BACKOFF_MAX_SECONDS, OPENAI_BACKOFF_BASE_SECONDS * 2 ** attempt)
+                delay = random.uniform(0, delay)  # full jitter
+            attempt += 1
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    async def transcribe(self, audio_file, filename, model="whisper-1"):
+        start = audio_file.tell()
+        response = await self._call(
+            lambda: openai.Audio.atranscribe_raw(model, audio_file, filename),
+            # Rewind so a retried upload sends the whole file again
+            before_attempt=lambda: audio_file.seek(start)
+        )
+        return response.text
+
+    async def chat(self, messages, model, temperature=0, max_tokens=1000):
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        response = await self._call(
+            lambda: openai.ChatCompletion.acreate(
+                model=model, messages=messages, temperature=temperature, max_tokens=max_tokens
+            ),
+            tokens=prompt_tokens + max_tokens
+        )
+        return response.choices[0].message.content
+
+    async def speech(self, text, voice, model="tts-1", response_format="mp3"):
+        """Synthesize `text` and return the audio bytes.
+
+        openai 0.28 has no text-to-speech helper, so /audio/speech is called
+        through its requestor, which keeps its auth, proxy and error types.
+        """
+        async def request():
+            requestor = openai.api_requestor.APIRequestor()
+            async with openai.api_requestor.aiohttp_session() as session:
+                result = await requestor.arequest_raw(
+                    "post", "/audio/speech", session,
+                    params={"model": model, "input": text, "voice": voice, "response_format": response_format},
+                    request_timeout=self.timeout
+                )
+                body = await result.read()
+            if result.status != 200:
+                try:
+                    payload = json.loads(body)
+                except ValueError:
+                    payload = None
+                raise requestor.handle_error_response(body, result.status, payload, result.headers)
+            return body
+
+        return await self._call(request, tokens=estimate_tokens(text))
+
+    async def chat_stream(self, messages, model, temperature=0, max_tokens=1000):
+        """Like chat(), but yields the reply's text deltas as they arrive.
+
+        Opening the stream is rate limited and retried like any other call;
+        once tokens have been yielded a failure is raised rather than retried,
+        and each delta must arrive within the call timeout.
+        """
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        stream = await self._call(
+            lambda: openai.ChatCompletion.acreate(
+                model=model, messages=messages, temperature=temperature, max_tokens=max_tokens, stream=True
+            ),
+            tokens=prompt_tokens + max_tokens
+        )
+        iterator = stream.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(iterator.__anext__(), self.timeout)
+            except StopAsyncIteration:
+                return
+            delta = chunk["choices"][0]["delta"].get("content") if chunk["choices"] else None
+            if delta:
+                yield delta
+
+
+_loop = None
+_client = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop():
+    """Background event loop shared by every thread in the process"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="openai-client", daemon=True).start()
+                _loop = loop
+    return _loop
+
+def get_openai_client():
+    """The process-wide client; its limits apply across all sessions and workers"""
+    global _client
+    if _client is None:
+        loop = _get_loop()
+        with _loop_lock:
+            if _client is None:
+                # Create on the loop so its asyncio primitives belong to it
+                _client = asyncio.run_coroutine_threadsafe(_create_client(), loop).result()
+    return _client
+
+async def _create_client():
+    return AsyncOpenAIClient()
+
+def run_sync(coro):
+    """Run a coroutine on the shared loop from synchronous code and wait for it"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+def iter_sync(agen):
+    """Iterate an async generator on the shared loop from synchronous code.
+
+    Items are handed over one at a time as they are produced; if the caller
+    stops early the generator is closed on the loop.
+    """
+    loop = _get_loop()
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
@@ -1,23 +1,240 @@
+import io
 import os
+import re
+import time
+import asyncio
 import openai
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from backend.cache import translation_cache, make_key
+from backend.audio_utils import split_audio, WHISPER_MAX_BYTES
+from backend.openai_client import get_openai_client, run_sync, iter_sync, estimate_tokens
+from backend.transcription import get_engine
+from backend.metrics import instrument, observe
 
 load_dotenv()
 openai.api_key = os.getenv('OPENAI_API_KEY')
 
-def transcribe_audio(audio_path):
-    with open(audio_path, "rb") as audio_file:
-        transcript = openai.Audio.transcribe("whisper-1", audio_file)
-    return transcript.text
+# UI label -> target language passed to translate_text
+LANGUAGES = {
+    "Original (No Translation)": None,
+    "Hindi": "Hindi",
+    "Marathi": "Marathi",
+    "Japanese": "Japanese",
+    "Spanish": "Spanish",
+    "French": "French",
+    "German": "German"
+}
 
-def translate_text(text, target_language):
-    response = openai.ChatCompletion.create(
-        model="gpt-4",
+TRANSLATION_MODEL = os.getenv('TRANSLATION_MODEL', 'gpt-4')
+TRANSLATION_MAX_WORKERS = int(os.getenv('TRANSLATION_MAX_WORKERS', 4))
+# Input budget per translation request; longer transcripts are split on sentences
+TRANSLATION_CHUNK_TOKENS = int(os.getenv('TRANSLATION_CHUNK_TOKENS', 700))
+TRANSLATION_MAX_OUTPUT_TOKENS = int(os.getenv('TRANSLATION_MAX_OUTPUT_TOKENS', 4000))
+TRANSCRIBE_MAX_WORKERS = int(os.getenv('TRANSCRIBE_MAX_WORKERS', 4))
+
+def transcribe_audio(source, filename=None, engine=None):
+    """Transcribe a local path or an open binary file-like object.
+
+    Whisper picks the decoder from the file name, so pass `filename` (e.g.
+    the S3 key) when `source` is a stream without a usable `.name`. The
+    work goes to `engine`, by default the one chosen by TRANSCRIBE_ENGINE.
+    """
+    engine = engine or get_engine()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as audio_file:
+            return engine.transcribe(audio_file, os.path.basename(source))
+    filename = os.path.basename(filename or getattr(source, "name", None) or "audio.mp3")
+    return engine.transcribe(source, filename)
+
+@instrument("openai.transcribe_chunked")
+def transcribe_audio_chunked(data, filename, max_workers=TRANSCRIBE_MAX_WORKERS, engine=None):
+    """Transcribe long audio as overlapping chunks in parallel.
+
+    Chunks are transcribed on a bounded thread pool and stitched back in
+    order, so wall-clock time tracks the chunk length rather than the file
+    length, and files over Whisper's 25 MB limit are split before upload.
+    """
+    # Route the whole recording, not each (shorter) chunk
+    engine = (engine or get_engine()).select(len(data))
+    chunks = split_audio(data, filename)
+    if len(chunks) == 1:
+        return transcribe_audio(io.BytesIO(chunks[0][0]), filename=filename, engine=engine)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        texts = list(executor.map(
+            lambda chunk: transcribe_audio(io.BytesIO(chunk[0]), filename=chunk[1], engine=engine),
+            chunks
+        ))
+    return stitch_transcripts(texts)
+
+@instrument("openai.transcribe_chunked_stream")
+def transcribe_audio_chunked_stream(data, filename, max_workers=TRANSCRIBE_MAX_WORKERS, engine=None):
+    """Like transcribe_audio_chunked, but yields each chunk's text once it
+    and every chunk before it are done.
+
+    Chunks still run in parallel; the pieces join (with "".join) into the
+    same stitched transcript.
+    """
+    engine = (engine or get_engine()).select(len(data))
+    chunks = split_audio(data, filename)
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        futures = [
+            executor.submit(transcribe_audio, io.BytesIO(chunk), filename=chunk_name, engine=engine)
+            for chunk, chunk_name in chunks
+        ]
+        try:
+            words = []
+            for future in futures:
+                next_words = _drop_overlap(words, future.result().split())
+                if not next_words:
+                    continue
+                if not words:
+                    observe("stream_first_text_seconds", time.time() - start, stage="openai.transcribe_chunked_stream")
+                piece = (" " if words else "") + " ".join(next_words)
+                words.extend(next_words)
+                yield piece
+        finally:
+            for future in futures:
+                future.cancel()
+
+def _normalize_word(word):
+    return re.sub(r"[^\w']", "", word.lower())
+
+def _drop_overlap(words, next_words, max_overlap_words=30):
+    """`next_words` without the leading words that repeat the end of `words`"""
+    if words:
+        tail = [_normalize_word(w) for w in words[-max_overlap_words:]]
+        head = [_normalize_word(w) for w in next_words[:max_overlap_words]]
+        for size in range(min(len(tail), len(head)), 0, -1):
+            if tail[-size:] == head[:size]:
+                return next_words[size:]
+    return next_words
+
+def stitch_transcripts(texts, max_overlap_words=30):
+    """Join chunk transcripts, dropping words repeated across the chunk overlap"""
+    words = []
+    for text in texts:
+        words.extend(_drop_overlap(words, text.split(), max_overlap_words))
+    return " ".join(words)
+
+def split_sentences(text):
+    """Split text after sentence-ending punctuation (Latin, Devanagari and CJK)"""
+    return [sentence for sentence in re.split(r"(?<=[.!?।。！？])\s+", text.strip()) if sentence]
+
+def chunk_text(text, max_tokens):
+    """Group whole sentences into chunks of at most ~max_tokens each.
+
+    A single sentence longer than the budget is split on word boundaries.
+    """
+    chunks, current, current_tokens = [], [], 0
+    for sentence in split_sentences(text):
+        pieces = [sentence]
+        if estimate_tokens(sentence) > max_tokens:
+            words, pieces, piece = sentence.split(), [], []
+            for word in words:
+                if piece and estimate_tokens(" ".join(piece + [word])) > max_tokens:
+                    pieces.append(" ".join(piece))
+                    piece = []
+                piece.append(word)
+            if piece:
+                pieces.append(" ".join(piece))
+        for piece in pieces:
+            tokens = estimate_tokens(piece)
+            if current and current_tokens + tokens > max_tokens:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+def _chunk_request(chunk, prompt):
+    return dict(
+        model=TRANSLATION_MODEL,
         messages=[
-            {"role": "system", "content": f"Translate this to {target_language}"},
-            {"role": "user", "content": text}
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": chunk}
         ],
         temperature=0,
-        max_tokens=1000
+        # Translations into non-Latin scripts can use several times the input tokens
+        max_tokens=min(TRANSLATION_MAX_OUTPUT_TOKENS, max(256, estimate_tokens(chunk) * 3))
     )
-    return response.choices[0].message.content
\ No newline at end of file
+
+async def _translate_chunks(client, chunks, prompt):
+    return await asyncio.gather(*[client.chat(**_chunk_request(chunk, prompt)) for chunk in chunks])
+
+async def _translate_chunks_stream(client, chunks, prompt):
+    # The first chunk streams token by token; the rest are translated
+    # concurrently meanwhile and follow in order
+    rest = [asyncio.ensure_future(client.chat(**_chunk_request(chunk, prompt))) for chunk in chunks[1:]]
+    try:
+        async for delta in client.chat_stream(**_chunk_request(chunks[0], prompt)):
+            yield delta
+        for task in rest:
+            yield " " + (await task).strip()
+    finally:
+        for task in rest:
+            task.cancel()
+
+@instrument("openai.translate")
+def translate_text(text, target_language):
+    """Translate text, splitting long transcripts into sentence-aligned chunks.
+
+    Chunks are translated concurrently and reassembled in order, so long
+    recordings are neither truncated by max_tokens nor stuck behind one
+    giant completion.
+    """
+    prompt = f"Translate this to {target_language}"
+    cache_key = make_key("translation", text, target_language, TRANSLATION_MODEL, prompt)
+    cached = translation_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    start = time.time()
+    chunks = chunk_text(text, TRANSLATION_CHUNK_TOKENS) or [text]
+    translated = " ".join(part.strip() for part in run_sync(_translate_chunks(get_openai_client(), chunks, prompt)))
+    translation_cache.set(cache_key, translated, cost_seconds=time.time() - start)
+    return translated
+
+@instrument("openai.translate_stream")
+def translate_text_stream(text, target_language):
+    """Like translate_text, but yields the translation as it is generated.
+
+    Shares translate_text's cache: a hit is yielded whole, and a stream
+    that runs to the end is cached for both.
+    """
+    prompt = f"Translate this to {target_language}"
+    cache_key = make_key("translation", text, target_language, TRANSLATION_MODEL, prompt)
+    cached = translation_cache.get(cache_key)
+    if cached is not None:
+        yield cached
+        return
+
+    start = time.time()
+    chunks = chunk_text(text, TRANSLATION_CHUNK_TOKENS) or [text]
+    parts = []
+    for delta in iter_sync(_translate_chunks_stream(get_openai_client(), chunks, prompt)):
+        if not parts:
+            delta = delta.lstrip()
+            if not delta:
+                continue
+            observe("stream_first_text_seconds", time.time() - start, stage="openai.translate_stream")
+        parts.append(delta)
+        yield delta
+    translation_cache.set(cache_key, "".join(parts).strip(), cost_seconds=time.time() - start)
+
+@instrument("openai.translate_multi")
+def translate_text_multi(text, target_languages, max_workers=TRANSLATION_MAX_WORKERS):
+    """Translate one transcript into several languages concurrently.
+
+    Returns a dict of language -> translation in the order requested.
+    Cached languages come back immediately; only the misses hit the API.
+    """
+    target_languages = list(dict.fromkeys(target_languages))
+    if not target_languages:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(target_languages))) as executor:
+        results = executor.map(lambda language: translate_text(text, language), target_languages)
+        return dict(zip(target_languages, results))
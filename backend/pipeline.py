@@ -0,0 +1,211 @@
+import os
+import time
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from backend.cache import transcript_cache, make_key, file_content_hash
+from backend.s3_utils import get_s3_etag, open_s3_stream, S3_SPOOL_MAX_BYTES
+from backend.openai_utils import (transcribe_audio, transcribe_audio_chunked, transcribe_audio_chunked_stream,
+                                  translate_text_stream, translate_text_multi, WHISPER_MAX_BYTES)
+from backend.audio_utils import estimate_duration, CHUNK_SECONDS, CHUNK_OVERLAP_SECONDS
+from backend.transcription import get_engine
+from backend import transcript_store
+
+load_dotenv()
+
+# WAV/MP3 longer than one chunk window (TRANSCRIBE_CHUNK_SECONDS plus the
+# overlap) is split and transcribed in parallel chunks. Other formats can't be
+# measured, so they are chunked above this size; nothing over Whisper's 25 MB
+# limit is ever sent whole.
+TRANSCRIBE_CHUNK_THRESHOLD_BYTES = int(os.getenv('TRANSCRIBE_CHUNK_THRESHOLD_BYTES', 10 * 1024 * 1024))
+
+
+def _chunked_audio(stream, size, filename):
+    """The recording's bytes if it should be transcribed in chunks, else None
+    (with the stream left where it was)"""
+    if size > min(TRANSCRIBE_CHUNK_THRESHOLD_BYTES, WHISPER_MAX_BYTES):
+        return stream.read()
+    if not filename.lower().endswith(('.wav', '.mp3')):
+        return None
+    position = stream.tell()
+    data = stream.read()
+    duration = estimate_duration(data, filename)
+    if duration is not None and duration > CHUNK_SECONDS + CHUNK_OVERLAP_SECONDS:
+        return data
+    stream.seek(position)
+    return None
+
+def _transcribe_stream(stream, size, filename, engine):
+    data = _chunked_audio(stream, size, filename)
+    if data is not None:
+        return transcribe_audio_chunked(data, filename, engine=engine)
+    return transcribe_audio(stream, filename=filename, engine=engine)
+
+def transcribe_s3_file(bucket_name, s3_key):
+    """Transcribe an S3 object, skipping the download and Whisper call on a cache hit.
+
+    The cache key includes the object's ETag and the transcription engine,
+    so re-uploading a different file under the same key, or switching
+    engine or model, is picked up as a miss. On a miss the object is
+    streamed straight into the Whisper request without touching disk.
+    """
+    return transcribe_s3_object(bucket_name, s3_key)[0]
+
+def transcribe_s3_object(bucket_name, s3_key):
+    """Like transcribe_s3_file, but returns (transcript, etag).
+
+    After the local cache, the MySQL transcript store is tried, so a new
+    host or a cleared cache doesn't pay for Whisper again; new transcripts
+    are saved there for search.
+    """
+    engine = get_engine()
+    transcript, etag, cache_key = _lookup_transcript(bucket_name, s3_key, engine)
+    if transcript is not None:
+        return transcript, etag
+
+    start = time.time()
+    with open_s3_stream(bucket_name, s3_key, etag=etag) as stream:
+        size = _stream_size(stream)
+        transcript = _transcribe_stream(stream, size, s3_key, engine)
+    _save_transcript(bucket_name, s3_key, etag, engine, cache_key, transcript, time.time() - start, size)
+    return transcript, etag
+
+def _lookup_transcript(bucket_name, s3_key, engine):
+    """(transcript or None, etag, cache key) from the disk cache, then the
+    store; the key is None for engines whose output isn't cached"""
+    etag = get_s3_etag(bucket_name, s3_key)
+    if not engine.cacheable:
+        return None, etag, None
+    cache_key = make_key("s3", bucket_name, s3_key, etag, engine.identity)
+    transcript = transcript_cache.get(cache_key)
+    if transcript is None:
+        transcript = transcript_store.get_transcript(bucket_name, s3_key, etag, engine=engine.identity)
+        if transcript is not None:
+            transcript_cache.set(cache_key, transcript)
+    return transcript, etag, cache_key
+
+def _stream_size(stream):
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    return size
+
+def _save_transcript(bucket_name, s3_key, etag, engine, cache_key, transcript, elapsed, size):
+    if cache_key is None:
+        return
+    transcript_cache.set(cache_key, transcript, cost_seconds=elapsed, cost_bytes=size)
+    transcript_store.save_transcript(bucket_name, s3_key, etag, transcript, compute_seconds=elapsed,
+                                     engine=engine.identity)
+
+def stream_s3_transcript(bucket_name, s3_key):
+    """Yield an S3 object's transcript in pieces as they become available.
+
+    Cached/stored transcripts come back in one piece; long recordings are
+    yielded chunk by chunk; short ones still need a single Whisper call.
+    The joined pieces are cached and stored like transcribe_s3_object's.
+    """
+    engine = get_engine()
+    transcript, etag, cache_key = _lookup_transcript(bucket_name, s3_key, engine)
+    if transcript is not None:
+        yield transcript
+        return
+
+    start = time.time()
+    with open_s3_stream(bucket_name, s3_key, etag=etag) as stream:
+        size = _stream_size(stream)
+        data = _chunked_audio(stream, size, s3_key)
+        if data is not None:
+            pieces = []
+            for piece in transcribe_audio_chunked_stream(data, s3_key, engine=engine):
+                pieces.append(piece)
+                yield piece
+            transcript = "".join(pieces)
+        else:
+            transcript = transcribe_audio(stream, filename=s3_key, engine=engine)
+            yield transcript
+    _save_transcript(bucket_name, s3_key, etag, engine, cache_key, transcript, time.time() - start, size)
+
+def stream_s3_translation(bucket_name, s3_key, transcript, target_language):
+    """Yield the translation of an object's transcript as it is generated,
+    storing it for search once complete"""
+    start = time.time()
+    pieces = []
+    engine = get_engine()
+    for piece in translate_text_stream(transcript, target_language):
+        pieces.append(piece)
+        yield piece
+    if engine.cacheable:
+        transcript_store.save_transcript(bucket_name, s3_key, get_s3_etag(bucket_name, s3_key), "".join(pieces).strip(),
+                                         language=target_language, compute_seconds=time.time() - start,
+                                         engine=engine.identity)
+
+def start_s3_translations(bucket_name, s3_key, transcript, target_languages):
+    """Translate an object's transcript into several languages in the background.
+
+    Returns a Future of {language: translation}; the languages are
+    translated concurrently and stored for search once all are done.
+    """
+    engine = get_engine()
+
+    def translate_all():
+        start = time.time()
+        translations = translate_text_multi(transcript, target_languages)
+        if engine.cacheable:
+            transcript_store.save_transcripts(bucket_name, s3_key, get_s3_etag(bucket_name, s3_key), translations,
+                                              compute_seconds=time.time() - start, engine=engine.identity)
+        return translations
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        return executor.submit(translate_all)
+    finally:
+        executor.shutdown(wait=False)
+
+def transcribe_local_file(local_path):
+    """Transcribe a local file, keyed on its content hash and the engine"""
+    engine = get_engine()
+    if not engine.cacheable:
+        with open(local_path, "rb") as f:
+            return _transcribe_stream(f, os.path.getsize(local_path), local_path, engine)
+    cache_key = make_key("file", file_content_hash(local_path), engine.identity)
+    transcript = transcript_cache.get(cache_key)
+    if transcript is not None:
+        return transcript
+
+    start = time.time()
+    with open(local_path, "rb") as f:
+        transcript = _transcribe_stream(f, os.path.getsize(local_path), local_path, engine)
+    transcript_cache.set(
+        cache_key,
+        transcript,
+        cost_seconds=time.time() - start,
+        cost_bytes=os.path.getsize(local_path),
+    )
+    return transcript
+
+def transcribe_upload(stream, filename, spool_max_bytes=S3_SPOOL_MAX_BYTES):
+    """Transcribe a forward-only stream such as an HTTP request body.
+
+    The body is spooled (in memory up to `spool_max_bytes`, then to a temp
+    file) while it is hashed, and cached under the same content-hash key as
+    transcribe_local_file.
+    """
+    engine = get_engine()
+    digest = hashlib.sha256()
+    with tempfile.SpooledTemporaryFile(max_size=spool_max_bytes) as spool:
+        for block in iter(lambda: stream.read(1024 * 1024), b''):
+            digest.update(block)
+            spool.write(block)
+        cache_key = make_key("file", digest.hexdigest(), engine.identity) if engine.cacheable else None
+        transcript = transcript_cache.get(cache_key) if cache_key else None
+        if transcript is not None:
+            return transcript
+
+        start = time.time()
+        size = spool.tell()
+        spool.seek(0)
+        transcript = _transcribe_stream(spool, size, filename, engine)
+    if cache_key:
+        transcript_cache.set(cache_key, transcript, cost_seconds=time.time() - start, cost_bytes=size)
+    return transcript
@@ -0,0 +1,196 @@
+import os
+import time
+import sqlite3
+import threading
+from dotenv import load_dotenv
+from backend.s3_utils import iter_s3_objects, get_s3_object_info, is_audio_key
+
+load_dotenv()
+
+S3_INDEX_DB_PATH = os.getenv('S3_INDEX_DB_PATH', os.path.join('cache', 's3_index.sqlite3'))
+S3_INDEX_TTL_SECONDS = int(os.getenv('S3_INDEX_TTL_SECONDS', 300))
+# While the ingestion worker keeps prefixes fresh, still re-list each one at
+# least this often, in case a notification was lost or never configured
+S3_INDEX_RELIST_SECONDS = int(os.getenv('S3_INDEX_RELIST_SECONDS', 3600))
+# S3 sequencers are hex strings of varying length; left-padded they compare as strings
+SEQUENCER_WIDTH = 32
+
+_schema_lock = threading.Lock()
+_schema_ready = set()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS s3_objects (
+    bucket TEXT NOT NULL,
+    key TEXT NOT NULL,
+    size INTEGER,
+    etag TEXT,
+    last_modified TEXT,
+    PRIMARY KEY (bucket, key)
+);
+CREATE TABLE IF NOT EXISTS s3_prefixes (
+    bucket TEXT NOT NULL,
+    prefix TEXT NOT NULL,
+    refreshed_at REAL NOT NULL,
+    PRIMARY KEY (bucket, prefix)
+);
+CREATE TABLE IF NOT EXISTS s3_event_sync (
+    bucket TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS s3_sequencers (
+    bucket TEXT NOT NULL,
+    key TEXT NOT NULL,
+    sequencer TEXT NOT NULL,
+    PRIMARY KEY (bucket, key)
+);
+"""
+
+
+def get_index_connection():
+    """Open the local listing index, creating the schema on first use"""
+    db_dir = os.path.dirname(S3_INDEX_DB_PATH)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    conn = sqlite3.connect(S3_INDEX_DB_PATH, timeout=30)
+    with _schema_lock:
+        if S3_INDEX_DB_PATH not in _schema_ready:
+            conn.executescript(_SCHEMA)
+            _schema_ready.add(S3_INDEX_DB_PATH)
+    return conn
+
+def refresh_prefix(bucket_name, prefix=""):
+    """Re-list one prefix from S3 and replace its rows in the index"""
+    objects = [obj for obj in iter_s3_objects(bucket_name, prefix) if is_audio_key(obj['key'])]
+    conn = get_index_connection()
+    try:
+        with conn:
+            conn.execute(
+                "DELETE FROM s3_objects WHERE bucket = ? AND substr(key, 1, ?) = ?",
+                (bucket_name, len(prefix), prefix)
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO s3_objects (bucket, key, size, etag, last_modified) VALUES (?, ?, ?, ?, ?)",
+                [(bucket_name, o['key'], o['size'], o['etag'], o['last_modified']) for o in objects]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO s3_prefixes (bucket, prefix, refreshed_at) VALUES (?, ?, ?)",
+                (bucket_name, prefix, time.time())
+            )
+    finally:
+        conn.close()
+    return len(objects)
+
+def _is_fresh(conn, bucket_name, prefix, ttl):
+    # A refresh of any parent prefix (e.g. the whole bucket) also covers this one
+    row = conn.execute(
+        "SELECT MAX(refreshed_at) FROM s3_prefixes WHERE bucket = ? AND substr(?, 1, length(prefix)) = prefix",
+        (bucket_name, prefix)
+    ).fetchone()
+    if row[0] is None:
+        return False
+    now = time.time()
+    if now - row[0] < ttl:
+        return True
+    # Applied notifications stand in for a re-list, up to S3_INDEX_RELIST_SECONDS
+    synced = conn.execute("SELECT synced_at FROM s3_event_sync WHERE bucket = ?", (bucket_name,)).fetchone()
+    return synced is not None and now - synced[0] < ttl and now - row[0] < S3_INDEX_RELIST_SECONDS
+
+def list_indexed_audio_files(bucket_name, prefixes=("",), ttl=S3_INDEX_TTL_SECONDS, force_refresh=False):
+    """List audio keys under the given prefixes from the local index.
+
+    Only prefixes whose last refresh is older than `ttl` seconds are
+    re-listed from S3; everything else is served from SQLite.
+    """
+    conn = get_index_connection()
+    try:
+        stale = [p for p in prefixes if force_refresh or not _is_fresh(conn, bucket_name, p, ttl)]
+    finally:
+        conn.close()
+    for prefix in stale:
+        refresh_prefix(bucket_name, prefix)
+
+    conn = get_index_connection()
+    try:
+        keys = []
+        for prefix in prefixes:
+            rows = conn.execute(
+                "SELECT key FROM s3_objects WHERE bucket = ? AND substr(key, 1, ?) = ? ORDER BY key",
+                (bucket_name, len(prefix), prefix)
+            ).fetchall()
+            keys.extend(row[0] for row in rows)
+    finally:
+        conn.close()
+    return list(dict.fromkeys(keys))
+
+def _is_newer_event(conn, bucket_name, s3_key, sequencer):
+    """Record an event's sequencer and say whether it is newer than the last
+    one applied to this key (events without one always apply)"""
+    if not sequencer:
+        return True
+    sequencer = sequencer.upper().zfill(SEQUENCER_WIDTH)
+    row = conn.execute(
+        "SELECT sequencer FROM s3_sequencers WHERE bucket = ? AND key = ?", (bucket_name, s3_key)
+    ).fetchone()
+    if row is not None and row[0] >= sequencer:
+        return False
+    conn.execute(
+        "INSERT OR REPLACE INTO s3_sequencers (bucket, key, sequencer) VALUES (?, ?, ?)",
+        (bucket_name, s3_key, sequencer)
+    )
+    return True
+
+def upsert_object(bucket_name, obj, sequencer=None):
+    """Add or update a single object row (dict with key/size/etag/last_modified).
+
+    With an S3 event `sequencer`, an event older than one already applied to
+    the key is ignored. Returns whether the row was written.
+    """
+    if not is_audio_key(obj['key']):
+        return False
+    conn = get_index_connection()
+    try:
+        with conn:
+            if not _is_newer_event(conn, bucket_name, obj['key'], sequencer):
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO s3_objects (bucket, key, size, etag, last_modified) VALUES (?, ?, ?, ?, ?)",
+                (bucket_name, obj['key'], obj['size'], obj['etag'], obj['last_modified'])
+            )
+    finally:
+        conn.close()
+    return True
+
+def add_uploaded_object(bucket_name, s3_key):
+    """Record a freshly uploaded object so it shows up without a re-list"""
+    upsert_object(bucket_name, get_s3_object_info(bucket_name, s3_key))
+
+def delete_object(bucket_name, s3_key, sequencer=None):
+    """Remove an object row; `sequencer` works as for upsert_object"""
+    conn = get_index_connection()
+    try:
+        with conn:
+            if not _is_newer_event(conn, bucket_name, s3_key, sequencer):
+                return False
+            conn.execute("DELETE FROM s3_objects WHERE bucket = ? AND key = ?", (bucket_name, s3_key))
+    finally:
+        conn.close()
+    return True
+
+def touch_prefixes(bucket_name, refreshed_at=None):
+    """Mark every listed prefix of a bucket as fresh.
+
+    Used by the event ingestion worker: once all changes up to
+    `refreshed_at` have been applied from S3 notifications, the indexed
+    listings are as good as a re-list. Each prefix is still re-listed
+    S3_INDEX_RELIST_SECONDS after its last real listing.
+    """
+    conn = get_index_connection()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO s3_event_sync (bucket, synced_at) VALUES (?, ?) "
+                "ON CONFLICT (bucket) DO UPDATE SET synced_at = MAX(synced_at, excluded.synced_at)",
+                (bucket_name, refreshed_at or time.time())
+            )
+    finally:
+        conn.close()
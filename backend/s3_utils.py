@@ -1,7 +1,14 @@
 import os
+import shutil
+import tempfile
+import threading
 import boto3
+from botocore.config import Config
+from boto3.s3.transfer import TransferConfig
 from dotenv import load_dotenv
 from datetime import datetime
+from backend.metrics import instrument, record_bytes, timer
+from backend.cache import BlobCache
 
 load_dotenv()
 
@@ -9,65 +16,243 @@ aws_access_key_id = os.getenv('AWS_ACCESS_KEY_ID')
 aws_secret_access_key = os.getenv('AWS_SECRET_ACCESS_KEY')
 aws_region = os.getenv('AWS_REGION')
 bucket_name = os.getenv('S3_BUCKET_NAME')
+s3_endpoint_url = os.getenv('S3_ENDPOINT_URL')  # e.g. a local minio/moto server
 
-s3_client = boto3.client(
-    's3',
-    aws_access_key_id=aws_access_key_id,
-    aws_secret_access_key=aws_secret_access_key,
-    region_name=aws_region
-)
+S3_MAX_POOL_CONNECTIONS = int(os.getenv('S3_MAX_POOL_CONNECTIONS', 50))
+S3_MAX_ATTEMPTS = int(os.getenv('S3_MAX_ATTEMPTS', 5))
+S3_RETRY_MODE = os.getenv('S3_RETRY_MODE', 'adaptive')
+S3_SPOOL_MAX_BYTES = int(os.getenv('S3_SPOOL_MAX_BYTES', 32 * 1024 * 1024))
+S3_MULTIPART_THRESHOLD_MB = int(os.getenv('S3_MULTIPART_THRESHOLD_MB', 8))
+S3_MULTIPART_CHUNKSIZE_MB = int(os.getenv('S3_MULTIPART_CHUNKSIZE_MB', 8))
+S3_UPLOAD_MAX_CONCURRENCY = int(os.getenv('S3_UPLOAD_MAX_CONCURRENCY', 10))
 
+_client_lock = threading.Lock()
+_s3_client = None
 
-def list_s3_audio_files(bucket_name):
-    s3 = boto3.client('s3')
-    response = s3.list_objects_v2(Bucket=bucket_name)
-    return [obj['Key'] for obj in response.get('Contents', [])]
 
-def download_s3_file(bucket_name, s3_key, local_path):
-    s3 = boto3.client('s3')
-    s3.download_file(bucket_name, s3_key, local_path)
+def get_s3_client():
+    """Return the process-wide S3 client, creating it on first use.
 
-def upload_to_s3(bucket_name, local_path, s3_key=None, user_email=None):
-    """Upload a file to S3 with automatically generated key if not provided"""
+    boto3 clients are thread-safe, so every session and worker thread shares
+    one client and its keep-alive connection pool instead of paying client
+    construction, credential resolution and a TLS handshake per call.
+    """
+    global _s3_client
+    if _s3_client is None:
+        with _client_lock:
+            if _s3_client is None:
+                session = boto3.session.Session(
+                    aws_access_key_id=aws_access_key_id,
+                    aws_secret_access_key=aws_secret_access_key,
+                    region_name=aws_region
+                )
+                _s3_client = session.client(
+                    's3',
+                    endpoint_url=s3_endpoint_url,
+                    config=Config(
+                        max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+                        tcp_keepalive=True,
+                        retries={'max_attempts': S3_MAX_ATTEMPTS, 'mode': S3_RETRY_MODE}
+                    )
+                )
+    return _s3_client
+
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.m4a', '.flac', '.webm', '.mp4', '.mpeg', '.mpga', '.opus')
+
+
+def is_audio_key(s3_key):
+    return s3_key.lower().endswith(AUDIO_EXTENSIONS)
+
+@instrument("s3.list")
+def iter_s3_objects(bucket_name, prefix=""):
+    """Yield every object under a prefix, following list_objects_v2 pagination"""
+    s3 = get_s3_client()
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            yield {
+                'key': obj['Key'],
+                'size': obj['Size'],
+                'etag': obj['ETag'].strip('"'),
+                'last_modified': obj['LastModified'].isoformat(),
+            }
+
+def list_s3_audio_files(bucket_name, prefix=""):
+    return [obj['key'] for obj in iter_s3_objects(bucket_name, prefix) if is_audio_key(obj['key'])]
+
+@instrument("s3.head")
+def get_s3_object_info(bucket_name, s3_key):
+    """Return key/size/etag/last_modified for one object without downloading it"""
+    s3 = get_s3_client()
+    response = s3.head_object(Bucket=bucket_name, Key=s3_key)
+    return {
+        'key': s3_key,
+        'size': response['ContentLength'],
+        'etag': response['ETag'].strip('"'),
+        'last_modified': response['LastModified'].isoformat(),
+    }
+
+def get_s3_etag(bucket_name, s3_key):
+    """Return the object's ETag without downloading it"""
+    return get_s3_object_info(bucket_name, s3_key)['etag']
+
+# Local copies of downloaded audio (BLOB_CACHE_MAX_BYTES, 0 = off)
+blob_cache = BlobCache("blobs", get_client=lambda: get_s3_client())
+
+def download_s3_file(bucket_name, s3_key, local_path, etag=None):
+    """Copy an object to `local_path` through the local blob cache.
+
+    Repeated downloads of an unchanged object cost one conditional GET (or
+    nothing, when `etag` is passed and matches) instead of the whole body.
+    """
+    if not blob_cache.max_bytes:
+        with timer("s3.download"):
+            get_s3_client().download_file(bucket_name, s3_key, local_path)
+        record_bytes("s3.download", os.path.getsize(local_path), "in")
+        return
+    with blob_cache.open(bucket_name, s3_key, etag) as src, open(local_path, "wb") as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+@instrument("s3.stream")
+def open_s3_stream(bucket_name, s3_key, spool_max_bytes=S3_SPOOL_MAX_BYTES, etag=None, reuse=False):
+    """Open an object as a rewindable binary file without a named temp file.
+
+    A copy already in the blob cache under `etag` is used as is. Otherwise
+    the body is kept in memory up to `spool_max_bytes` and only spills to
+    an anonymous temp file beyond that, so concurrent sessions never collide
+    on file names. One-shot reads (e.g. audio whose transcript is about to
+    be cached) don't pay for writing a disk copy; pass `reuse=True` to keep
+    one in the blob cache for later reads. The caller owns the returned
+    file and should close it.
+    """
+    if blob_cache.max_bytes:
+        if reuse:
+            return blob_cache.open(bucket_name, s3_key, etag)
+        cached = blob_cache.open_cached(bucket_name, s3_key, etag)
+        if cached is not None:
+            return cached
+    s3 = get_s3_client()
+    response = s3.get_object(Bucket=bucket_name, Key=s3_key)
+    buffer = tempfile.SpooledTemporaryFile(max_size=spool_max_bytes)
+    try:
+        shutil.copyfileobj(response['Body'], buffer, 1024 * 1024)
+    except Exception:
+        buffer.close()
+        raise
+    finally:
+        response['Body'].close()
+    record_bytes("s3.stream", buffer.tell(), "in")
+    buffer.seek(0)
+    return buffer
+
+@instrument("s3.put_text")
+def upload_text_to_s3(bucket_name, s3_key, text):
+    """Store a UTF-8 text object, e.g. a transcript next to its recording"""
+    s3 = get_s3_client()
+    body = text.encode('utf-8')
+    s3.put_object(Bucket=bucket_name, Key=s3_key, Body=body,
+                  ContentType='text/plain; charset=utf-8')
+    record_bytes("s3.put_text", len(body), "out")
+
+def get_user_folder(user_email):
+    """Folder name used for a user's uploads (the part before @ in their email)"""
+    if user_email:
+        return user_email.split("@")[0]
+    return "unknown_user"
+
+def get_user_prefixes(user_email):
+    """S3 prefixes holding a user's recordings and custom uploads"""
+    user_folder = get_user_folder(user_email)
+    return [f"recordings/{user_folder}/", f"custom_uploads/{user_folder}/"]
+
+def get_transfer_config():
+    """Multipart/concurrency settings shared by every upload"""
+    return TransferConfig(
+        multipart_threshold=S3_MULTIPART_THRESHOLD_MB * 1024 * 1024,
+        multipart_chunksize=S3_MULTIPART_CHUNKSIZE_MB * 1024 * 1024,
+        max_concurrency=S3_UPLOAD_MAX_CONCURRENCY,
+        use_threads=True
+    )
+
+
+class UploadProgress:
+    """boto3 transfer callback that turns byte increments into a 0..1 fraction.
+
+    boto3 calls it from its transfer threads, so the running total is kept
+    under a lock before being handed to `on_progress(fraction, bytes_sent)`.
+    """
+
+    def __init__(self, total_bytes, on_progress):
+        self.total_bytes = total_bytes
+        self.on_progress = on_progress
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, bytes_amount):
+        with self._lock:
+            self.bytes_sent += bytes_amount
+            fraction = min(1.0, self.bytes_sent / self.total_bytes) if self.total_bytes else 1.0
+            self.on_progress(fraction, self.bytes_sent)
+
+
+@instrument("s3.upload")
+def _upload(bucket_name, s3_key, local_path=None, fileobj=None, progress_callback=None):
+    s3 = get_s3_client()
+    sent = []
+
+    def callback(bytes_amount):
+        sent.append(bytes_amount)
+        if progress_callback:
+            progress_callback(bytes_amount)
+
+    if fileobj is not None:
+        s3.upload_fileobj(fileobj, bucket_name, s3_key, Config=get_transfer_config(), Callback=callback)
+    else:
+        s3.upload_file(local_path, bucket_name, s3_key, Config=get_transfer_config(), Callback=callback)
+    record_bytes("s3.upload", sum(sent), "out")
+
+def upload_to_s3(bucket_name, local_path=None, s3_key=None, user_email=None,
+                 fileobj=None, filename=None, progress_callback=None):
+    """Upload a file to S3 with automatically generated key if not provided
+
+    Pass either `local_path` or an open binary `fileobj` (with `filename`
+    for the key); file objects are streamed with upload_fileobj, so an
+    in-memory upload never needs a temp-file copy.
+    """
     # Generate a unique key if not provided
     if s3_key is None:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = os.path.basename(local_path)
+        filename = os.path.basename(filename or local_path)
         
         # Create user folder if email provided
-        user_folder = "unknown_user"
-        if user_email:
-            user_folder = user_email.split("@")[0]  # Use the part before @ in email
+        user_folder = get_user_folder(user_email)
         
         s3_key = f"recordings/{user_folder}/{timestamp}_{filename}"
     
     # Upload the file
-    s3 = boto3.client('s3')
     try:
-        s3.upload_file(local_path, bucket_name, s3_key)
+        _upload(bucket_name, s3_key, local_path, fileobj, progress_callback)
         return True, s3_key
     except Exception as e:
         return False, str(e)
 
-def upload_custom_file_to_s3(bucket_name, local_file_path, user_email=None):
+def upload_custom_file_to_s3(bucket_name, local_file_path=None, user_email=None,
+                             fileobj=None, filename=None, progress_callback=None):
 
     # Generate a unique key for the file
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = os.path.basename(local_file_path)
+    filename = os.path.basename(filename or local_file_path)
     
     # Define user folder based on email
-    user_folder = "unknown_user"
-    if user_email:
-        user_folder = user_email.split("@")[0]
+    user_folder = get_user_folder(user_email)
     
     # Create the S3 key path
     s3_key = f"custom_uploads/{user_folder}/{timestamp}_{filename}"
     
-    # Initialize S3 client
-    s3 = boto3.client('s3')
     try:
         # Upload file
-        s3.upload_file(local_file_path, bucket_name, s3_key)
+        _upload(bucket_name, s3_key, local_file_path, fileobj, progress_callback)
         return True, s3_key
     except Exception as e:
-        return False, str(e)
\ No newline at end of file
+        return False, str(e)
@@ -0,0 +1,208 @@
+import os
+import hmac
+import time
+import secrets
+import hashlib
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+from backend.auth import db_connection
+from backend.metrics import instrument
+
+load_dotenv()
+
+# Signs session tokens; without it tokens only survive until the process restarts
+SESSION_SECRET = os.getenv("SESSION_SECRET") or secrets.token_hex(32)
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", 7 * 24 * 3600))
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", 1000))
+# Cached sessions are re-checked against MySQL after this long, so a logout
+# in another process takes effect everywhere within this bound
+SESSION_CACHE_TTL_SECONDS = int(os.getenv("SESSION_CACHE_TTL_SECONDS", 60))
+# How often create_session() also deletes expired rows from MySQL
+SESSION_SWEEP_SECONDS = int(os.getenv("SESSION_SWEEP_SECONDS", 3600))
+SESSION_SWEEP_BATCH = int(os.getenv("SESSION_SWEEP_BATCH", 1000))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    token_hash CHAR(64) PRIMARY KEY,
+    email VARCHAR(255) NOT NULL,
+    created_at DOUBLE NOT NULL,
+    expires_at DOUBLE NOT NULL,
+    INDEX sessions_expires (expires_at),
+    INDEX sessions_email (email)
+)
+"""
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+_last_sweep = 0.0
+
+
+class SessionCache:
+    """Thread-safe LRU of token hash -> (email, expires_at).
+
+    Entries live at most `ttl` seconds, however long the session itself has left.
+    """
+
+    def __init__(self, max_entries=SESSION_CACHE_SIZE, ttl=SESSION_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token_hash):
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[token_hash]
+                return None
+            self._entries.move_to_end(token_hash)
+            return entry[0]
+
+    def set(self, token_hash, email, expires_at):
+        with self._lock:
+            self._entries[token_hash] = (email, min(expires_at, time.time() + self.ttl))
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, token_hash):
+        with self._lock:
+            self._entries.pop(token_hash, None)
+
+    def expire(self):
+        now = time.time()
+        with self._lock:
+            for token_hash in [h for h, (_, expires_at) in self._entries.items() if expires_at <= now]:
+                del self._entries[token_hash]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+session_cache = SessionCache()
+
+
+def _sign(session_id):
+    return hmac.new(SESSION_SECRET.encode("utf-8"), session_id.encode("utf-8"), hashlib.sha256).hexdigest()
+
+def _token_hash(session_id):
+    # Only a hash is stored, so a leaked sessions table can't be replayed
+    return hashlib.sha256(session_id.encode("utf-8")).hexdigest()
+
+def _parse_token(token):
+    """Return the session id of a correctly signed token, else None"""
+    if not token or "." not in token:
+        return None
+    session_id, signature = token.rsplit(".", 1)
+    if not hmac.compare_digest(signature, _sign(session_id)):
+        return None
+    return session_id
+
+def _ensure_schema(conn):
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            cursor = conn.cursor()
+            cursor.execute(_SCHEMA)
+            conn.commit()
+            _schema_ready = True
+
+@instrument("auth.session_create")
+def create_session(email, ttl=SESSION_TTL_SECONDS):
+    """Start a session for an authenticated user and return its signed token"""
+    session_id = secrets.token_urlsafe(32)
+    token_hash = _token_hash(session_id)
+    now = time.time()
+    with db_connection() as conn:
+        _ensure_schema(conn)
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO sessions (token_hash, email, created_at, expires_at) VALUES (%s, %s, %s, %s)",
+            (token_hash, email, now, now + ttl)
+        )
+        conn.commit()
+    session_cache.set(token_hash, email, now + ttl)
+    _maybe_sweep()
+    return f"{session_id}.{_sign(session_id)}"
+
+@instrument("auth.session_validate")
+def validate_session(token):
+    """Email of the user owning `token`, or None if it is forged, revoked or expired.
+
+    Forged tokens are rejected by the signature check and live ones are
+    usually answered from the in-memory cache, so a Streamlit rerun or page
+    refresh costs no bcrypt and normally no MySQL round trip.
+    """
+    session_id = _parse_token(token)
+    if session_id is None:
+        return None
+    token_hash = _token_hash(session_id)
+    email = session_cache.get(token_hash)
+    if email is not None:
+        return email
+    with db_connection() as conn:
+        _ensure_schema(conn)
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT email, expires_at FROM sessions WHERE token_hash = %s AND expires_at > %s",
+            (token_hash, time.time())
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    session_cache.set(token_hash, row[0], row[1])
+    return row[0]
+
+def revoke_session(token):
+    """Log a session out everywhere; unknown or forged tokens are ignored.
+
+    Other processes may keep accepting the token from their caches for up
+    to SESSION_CACHE_TTL_SECONDS.
+    """
+    session_id = _parse_token(token)
+    if session_id is None:
+        return
+    token_hash = _token_hash(session_id)
+    session_cache.delete(token_hash)
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM sessions WHERE token_hash = %s", (token_hash,))
+        conn.commit()
+
+def expire_sessions(batch_size=SESSION_SWEEP_BATCH):
+    """Delete expired sessions in batches and return how many were removed.
+
+    Batches keep each DELETE short so logins aren't blocked behind one
+    large lock on the sessions table.
+    """
+    session_cache.expire()
+    removed = 0
+    now = time.time()
+    while True:
+        with db_connection() as conn:
+            _ensure_schema(conn)
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM sessions WHERE expires_at <= %s LIMIT %s", (now, batch_size))
+            conn.commit()
+            deleted = cursor.rowcount or 0
+        removed += deleted
+        if deleted < batch_size:
+            return removed
+
+def _maybe_sweep():
+    global _last_sweep
+    now = time.time()
+    if now - _last_sweep < SESSION_SWEEP_SECONDS:
+        return
+    _last_sweep = now
+    try:
+        expire_sessions()
+    except Exception:
+        # Cleanup is best effort; never fail a login because of it
+        pass
@@ -0,0 +1,180 @@
+import os
+import re
+import time
+import threading
+import mysql.connector
+from dotenv import load_dotenv
+from backend.auth import db_connection, MYSQL_HOST
+from backend.metrics import instrument, inc
+from backend.s3_utils import get_user_folder
+
+load_dotenv()
+
+# "mysql" keeps every transcript/translation in MySQL for search; "off" disables it
+TRANSCRIPT_STORE = os.getenv("TRANSCRIPT_STORE", "mysql" if MYSQL_HOST else "off")
+SEARCH_SNIPPET_CHARS = int(os.getenv("SEARCH_SNIPPET_CHARS", 160))
+
+# language is '' for the original transcript so it can be part of the unique key;
+# engine is the transcription engine/model the text (or its source transcript) came from
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    bucket VARCHAR(100) NOT NULL,
+    s3_key VARCHAR(512) NOT NULL,
+    etag VARCHAR(64) NOT NULL,
+    language VARCHAR(32) NOT NULL DEFAULT '',
+    engine VARCHAR(128) NOT NULL DEFAULT '',
+    user_folder VARCHAR(255),
+    text MEDIUMTEXT NOT NULL,
+    compute_seconds DOUBLE,
+    created_at DOUBLE NOT NULL,
+    UNIQUE KEY transcripts_version (bucket, s3_key, etag, language, engine),
+    KEY transcripts_user (user_folder, language),
+    FULLTEXT KEY transcripts_text (text)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Tables created before the engine column existed
+_ADD_ENGINE_COLUMN = """
+ALTER TABLE transcripts
+    ADD COLUMN engine VARCHAR(128) NOT NULL DEFAULT '' AFTER language,
+    DROP INDEX transcripts_version,
+    ADD UNIQUE KEY transcripts_version (bucket, s3_key, etag, language, engine)
+"""
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+_USER_PREFIXES = ("recordings/", "custom_uploads/")
+
+
+def is_enabled():
+    return TRANSCRIPT_STORE == "mysql"
+
+def user_folder_from_key(s3_key):
+    """The <user> part of recordings/<user>/... and custom_uploads/<user>/... keys"""
+    for prefix in _USER_PREFIXES:
+        if s3_key.startswith(prefix):
+            folder = s3_key[len(prefix):].split("/", 1)[0]
+            return folder or None
+    return None
+
+def _ensure_schema(conn):
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            cursor = conn.cursor()
+            cursor.execute(_SCHEMA)
+            cursor.execute("SHOW COLUMNS FROM transcripts LIKE 'engine'")
+            if cursor.fetchone() is None:
+                cursor.execute(_ADD_ENGINE_COLUMN)
+            conn.commit()
+            _schema_ready = True
+
+@instrument("mysql.transcript_save")
+def save_transcripts(bucket_name, s3_key, etag, texts, compute_seconds=None, engine=""):
+    """Upsert {language or None: text} for one object version and engine identity.
+
+    Storage is best effort: the pipeline keeps working (and the disk cache
+    keeps serving) when MySQL is unavailable, so errors are counted and
+    swallowed rather than raised.
+    """
+    if not is_enabled() or not texts:
+        return False
+    now = time.time()
+    rows = [
+        (bucket_name, s3_key, etag, language or "", engine, user_folder_from_key(s3_key), text, compute_seconds, now)
+        for language, text in texts.items()
+    ]
+    try:
+        with db_connection() as conn:
+            _ensure_schema(conn)
+            cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT INTO transcripts "
+                "(bucket, s3_key, etag, language, engine, user_folder, text, compute_seconds, created_at) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE text = VALUES(text), compute_seconds = VALUES(compute_seconds), "
+                "created_at = VALUES(created_at)",
+                rows
+            )
+            conn.commit()
+        return True
+    except mysql.connector.Error:
+        inc("transcript_store_errors_total", operation="save")
+        return False
+
+def save_transcript(bucket_name, s3_key, etag, text, language=None, compute_seconds=None, engine=""):
+    return save_transcripts(bucket_name, s3_key, etag, {language: text}, compute_seconds, engine)
+
+def get_transcript(bucket_name, s3_key, etag, language=None, engine=""):
+    """Stored text for this exact object version and engine identity, or None"""
+    if not is_enabled():
+        return None
+    try:
+        with db_connection() as conn:
+            _ensure_schema(conn)
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT text FROM transcripts "
+                "WHERE bucket = %s AND s3_key = %s AND etag = %s AND language = %s AND engine = %s",
+                (bucket_name, s3_key, etag, language or "", engine)
+            )
+            row = cursor.fetchone()
+    except mysql.connector.Error:
+        inc("transcript_store_errors_total", operation="get")
+        return None
+    return row[0] if row else None
+
+def make_snippet(text, query, width=SEARCH_SNIPPET_CHARS):
+    """A window of `text` around the first query term it contains"""
+    terms = [t for t in re.findall(r"\w+", query.lower()) if len(t) > 1]
+    lowered = text.lower()
+    positions = [lowered.find(t) for t in terms if lowered.find(t) != -1]
+    start = max(0, min(positions) - width // 3) if positions else 0
+    snippet = text[start:start + width].strip()
+    return ("…" if start > 0 else "") + snippet + ("…" if start + width < len(text) else "")
+
+@instrument("mysql.transcript_search")
+def search_transcripts(query, user_email=None, language=None, limit=20):
+    """Full-text search over stored transcripts, best match first.
+
+    Limited to the user's recordings/ and custom_uploads/ folders when
+    `user_email` is given; `language` "" or None searches originals only,
+    "*" searches every language.
+    """
+    if not is_enabled() or not query.strip():
+        return []
+    sql = ("SELECT bucket, s3_key, etag, language, text, compute_seconds, created_at, "
+           "MATCH (text) AGAINST (%s IN NATURAL LANGUAGE MODE) AS score "
+           "FROM transcripts WHERE MATCH (text) AGAINST (%s IN NATURAL LANGUAGE MODE)")
+    params = [query, query]
+    if user_email is not None:
+        sql += " AND user_folder = %s"
+        params.append(get_user_folder(user_email))
+    if language != "*":
+        sql += " AND language = %s"
+        params.append(language or "")
+    sql += " ORDER BY score DESC LIMIT %s"
+    params.append(limit)
+
+    with db_connection() as conn:
+        _ensure_schema(conn)
+        cursor = conn.cursor()
+        cursor.execute(sql, tuple(params))
+        rows = cursor.fetchall()
+    return [
+        {
+            "bucket": bucket,
+            "s3_key": s3_key,
+            "etag": etag,
+            "language": language or None,
+            "snippet": make_snippet(text, query),
+            "compute_seconds": compute_seconds,
+            "created_at": created_at,
+            "score": score,
+        }
+        for bucket, s3_key, etag, language, text, compute_seconds, created_at, score in rows
+    ]
@@ -0,0 +1,203 @@
+import os
+import threading
+from dotenv import load_dotenv
+from backend.openai_client import get_openai_client, run_sync
+from backend.metrics import instrument, record_bytes, inc
+
+load_dotenv()
+
+# openai (Whisper API), local (faster-whisper on this machine), auto (route by size) or stub
+TRANSCRIBE_ENGINE = os.getenv('TRANSCRIBE_ENGINE', 'openai')
+# With TRANSCRIBE_ENGINE=auto, audio up to this size is transcribed locally
+TRANSCRIBE_LOCAL_MAX_BYTES = int(os.getenv('TRANSCRIBE_LOCAL_MAX_BYTES', 2 * 1024 * 1024))
+LOCAL_WHISPER_MODEL = os.getenv('LOCAL_WHISPER_MODEL', 'base')
+LOCAL_WHISPER_COMPUTE_TYPE = os.getenv('LOCAL_WHISPER_COMPUTE_TYPE', 'int8')
+LOCAL_WHISPER_CPU_THREADS = int(os.getenv('LOCAL_WHISPER_CPU_THREADS', 0))  # 0 = let CTranslate2 decide
+# Local decoding is CPU bound; more concurrent clips than this just queue
+LOCAL_WHISPER_MAX_CONCURRENCY = int(os.getenv('LOCAL_WHISPER_MAX_CONCURRENCY', 1))
+
+
+def _remaining_bytes(stream):
+    try:
+        position = stream.tell()
+        size = stream.seek(0, os.SEEK_END) - position
+        stream.seek(position)
+        return size
+    except (AttributeError, OSError, ValueError):
+        return 0
+
+
+class TranscriptionEngine:
+    """Turns an open binary audio stream into text.
+
+    `filename` tells the engine the container format. `select(size)` picks
+    the engine that should handle a recording of `size` bytes, so chunks of
+    one long recording all go to the same place. `identity` names the engine
+    and model in cache keys, so switching either doesn't serve transcripts
+    made by the other; engines with `cacheable = False` are never cached.
+    """
+
+    name = "base"
+    cacheable = True
+
+    @property
+    def identity(self):
+        return self.name
+
+    def transcribe(self, stream, filename):
+        raise NotImplementedError
+
+    def select(self, size):
+        return self
+
+    def warm_up(self):
+        """Load whatever the engine needs up front (no-op by default)"""
+
+
+class OpenAIWhisperEngine(TranscriptionEngine):
+    """whisper-1 through the shared rate-limited OpenAI client"""
+
+    name = "openai"
+
+    def __init__(self, model="whisper-1"):
+        self.model = model
+
+    @property
+    def identity(self):
+        return f"openai:{self.model}"
+
+    @instrument("openai.transcribe")
+    def transcribe(self, stream, filename):
+        record_bytes("openai.transcribe", _remaining_bytes(stream), "out")
+        return run_sync(get_openai_client().transcribe(stream, filename, model=self.model))
+
+
+class LocalWhisperEngine(TranscriptionEngine):
+    """Whisper on this machine's CPU via faster-whisper (optional dependency).
+
+    The model is loaded once per process and kept warm; decoding is limited
+    to LOCAL_WHISPER_MAX_CONCURRENCY clips at a time.
+    """
+
+    name = "local"
+
+    def __init__(self, model_name=LOCAL_WHISPER_MODEL, compute_type=LOCAL_WHISPER_COMPUTE_TYPE,
+                 cpu_threads=LOCAL_WHISPER_CPU_THREADS, max_concurrency=LOCAL_WHISPER_MAX_CONCURRENCY):
+        self.model_name = model_name
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._slots = threading.Semaphore(max_concurrency)
+
+    @property
+    def identity(self):
+        return f"local:{self.model_name}:{self.compute_type}"
+
+    def warm_up(self):
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    # Imported here so installs without faster-whisper can still use the API
+                    from faster_whisper import WhisperModel
+                    self._model = WhisperModel(self.model_name, device="cpu", compute_type=self.compute_type,
+                                               cpu_threads=self.cpu_threads)
+        return self._model
+
+    @instrument("local.transcribe")
+    def transcribe(self, stream, filename):
+        model = self.warm_up()
+        record_bytes("local.transcribe", _remaining_bytes(stream), "in")
+        with self._slots:
+            segments, _ = model.transcribe(stream, beam_size=1)
+            return " ".join(segment.text.strip() for segment in segments)
+
+
+class StubEngine(TranscriptionEngine):
+    """Returns a fixed transcript without doing any work, for tests and offline runs"""
+
+    name = "stub"
+    # Fixed output; caching it would hide real transcripts later
+    cacheable = False
+
+    def __init__(self, transcript="hello world"):
+        self.transcript = transcript
+        self.calls = []
+
+    def transcribe(self, stream, filename):
+        self.calls.append(filename)
+        return self.transcript
+
+
+class RoutingEngine(TranscriptionEngine):
+    """Short clips go to `local`, everything else to `remote`.
+
+    If the local engine can't run (e.g. faster-whisper isn't installed) or
+    fails on a clip, that clip is sent to `remote` instead.
+    """
+
+    name = "auto"
+
+    def __init__(self, local, remote, max_local_bytes=TRANSCRIBE_LOCAL_MAX_BYTES):
+        self.local = local
+        self.remote = remote
+        self.max_local_bytes = max_local_bytes
+
+    @property
+    def identity(self):
+        return f"auto:{self.local.identity}+{self.remote.identity}"
+
+    @property
+    def cacheable(self):
+        return self.local.cacheable and self.remote.cacheable
+
+    def select(self, size):
+        return self if size <= self.max_local_bytes else self.remote
+
+    def transcribe(self, stream, filename):
+        if _remaining_bytes(stream) > self.max_local_bytes:
+            return self.remote.transcribe(stream, filename)
+        position = stream.tell()
+        try:
+            return self.local.transcribe(stream, filename)
+        except Exception as e:
+            inc("transcribe_fallbacks_total", engine=self.local.name, error=type(e).__name__)
+            stream.seek(position)
+            return self.remote.transcribe(stream, filename)
+
+    def warm_up(self):
+        try:
+            self.local.warm_up()
+        except ImportError:
+            pass
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def create_engine(name=TRANSCRIBE_ENGINE):
+    if name == "openai":
+        return OpenAIWhisperEngine()
+    if name == "local":
+        return LocalWhisperEngine()
+    if name == "auto":
+        return RoutingEngine(LocalWhisperEngine(), OpenAIWhisperEngine())
+    if name == "stub":
+        return StubEngine()
+    raise ValueError(f"Unknown TRANSCRIBE_ENGINE {name!r} (expected openai, local, auto or stub)")
+
+def get_engine():
+    """The process-wide engine chosen by TRANSCRIBE_ENGINE"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine()
+    return _engine
+
+def set_engine(engine):
+    """Replace the process-wide engine (tests, benchmarks, embedding apps)"""
+    global _engine
+    with _engine_lock:
+        _engine = engine
@@ -0,0 +1,61 @@
+import os
+import time
+import base64
+import asyncio
+from dotenv import load_dotenv
+from backend.cache import DiskCache, make_key
+from backend.openai_client import get_openai_client, iter_sync
+from backend.openai_utils import chunk_text
+from backend.metrics import instrument
+
+load_dotenv()
+
+TTS_MODEL = os.getenv('TTS_MODEL', 'tts-1')
+TTS_VOICE = os.getenv('TTS_VOICE', 'alloy')
+# Longer text is split on sentences into requests of about this many characters
+# (the API accepts up to 4096), which are synthesized concurrently
+TTS_CHUNK_CHARS = int(os.getenv('TTS_CHUNK_CHARS', 1000))
+# Disk quota for cached speech; the least recently played chunks go first
+TTS_CACHE_MAX_BYTES = int(os.getenv('TTS_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+# Audio is kept base64-encoded in the JSON entries, one entry per text chunk
+tts_cache = DiskCache("tts", max_bytes=TTS_CACHE_MAX_BYTES)
+
+
+async def _synthesize(client, pieces, voice, model):
+    # Every uncached chunk starts at once; results are yielded in order
+    tasks = [
+        None if audio is not None else asyncio.ensure_future(client.speech(chunk, voice, model))
+        for chunk, audio in pieces
+    ]
+    try:
+        for (chunk, audio), task in zip(pieces, tasks):
+            yield chunk, audio if task is None else await task, task is not None
+    finally:
+        for task in tasks:
+            if task is not None:
+                task.cancel()
+
+@instrument("openai.tts")
+def synthesize_speech_chunks(text, voice=TTS_VOICE, model=TTS_MODEL):
+    """Yield MP3 audio for `text` one sentence-aligned chunk at a time.
+
+    Chunks are cached by (text, voice, model) and the misses synthesized
+    concurrently, so the whole text takes about as long as its slowest
+    chunk. The chunks concatenate into one MP3 stream.
+    """
+    pieces = []
+    for chunk in chunk_text(text, max(1, TTS_CHUNK_CHARS // 4)) or [text]:
+        cached = tts_cache.get(make_key("tts", chunk, voice, model))
+        pieces.append((chunk, base64.b64decode(cached) if cached is not None else None))
+
+    start = time.time()
+    for chunk, audio, fresh in iter_sync(_synthesize(get_openai_client(), pieces, voice, model)):
+        if fresh:
+            tts_cache.set(make_key("tts", chunk, voice, model), base64.b64encode(audio).decode("ascii"),
+                          cost_seconds=time.time() - start, cost_bytes=len(audio))
+        yield audio
+
+def synthesize_speech(text, voice=TTS_VOICE, model=TTS_MODEL):
+    """The whole MP3 for `text`"""
+    return b"".join(synthesize_speech_chunks(text, voice, model))
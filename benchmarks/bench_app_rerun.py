@@ -0,0 +1,74 @@
+"""Cold start and rerun time of the Streamlit app, measured with AppTest.
+
+The first run includes imports and process-wide setup; later runs are the
+reruns Streamlit does on every widget interaction. S3 is a local moto
+server and the user is logged in through session state, so no MySQL is
+needed. Compare before/after a change by pointing --script at the old file:
+
+    python -m benchmarks.bench_app_rerun --reruns 20
+    git show HEAD~1:appfouthjuly.py > /tmp/app_before.py
+    python -m benchmarks.bench_app_rerun --script /tmp/app_before.py
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import boto3
+from benchmarks.bench_s3_client import start_local_s3, BENCH_BUCKET, BENCH_KEY
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--script", default="appfouthjuly.py")
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--objects", type=int, default=200, help="extra recordings to put in the bucket")
+    args = parser.parse_args()
+
+    from streamlit.testing.v1 import AppTest
+
+    workdir = tempfile.mkdtemp(prefix="bench_app_")
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    os.environ.setdefault("AWS_REGION", "us-east-1")
+    os.environ["S3_BUCKET_NAME"] = BENCH_BUCKET
+    os.environ["CACHE_DIR"] = os.path.join(workdir, "cache")
+    os.environ["S3_INDEX_DB_PATH"] = os.path.join(workdir, "s3_index.sqlite3")
+    os.environ["JOBS_DB_PATH"] = os.path.join(workdir, "jobs.sqlite3")
+    # Scripts outside the repo (e.g. an older copy) still import backend from here
+    sys.path.insert(0, os.getcwd())
+
+    server, endpoint_url = start_local_s3()
+    os.environ["S3_ENDPOINT_URL"] = endpoint_url
+    try:
+        setup = boto3.client('s3', endpoint_url=endpoint_url, region_name=os.environ["AWS_REGION"])
+        setup.create_bucket(Bucket=BENCH_BUCKET)
+        with open("Recording.mp3", "rb") as f:
+            setup.put_object(Bucket=BENCH_BUCKET, Key=BENCH_KEY, Body=f.read())
+        for i in range(args.objects):
+            setup.put_object(Bucket=BENCH_BUCKET, Key=f"recordings/bench/extra_{i:05d}.mp3", Body=b"x")
+
+        app = AppTest.from_file(os.path.abspath(args.script), default_timeout=60)
+        app.session_state["authenticated"] = True
+        app.session_state["email"] = "bench@example.com"
+
+        start = time.perf_counter()
+        app.run()
+        cold = time.perf_counter() - start
+        if app.exception:
+            raise RuntimeError(app.exception[0].value)
+
+        samples = []
+        for _ in range(args.reruns):
+            start = time.perf_counter()
+            app.run()
+            samples.append(time.perf_counter() - start)
+        print(f"{args.script}: cold start {cold * 1000:.1f} ms, rerun mean "
+              f"{statistics.mean(samples) * 1000:.1f} ms, p50 {statistics.median(samples) * 1000:.1f} ms")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Logins/sec through authenticate_user at increasing concurrency.
+
+MySQL is replaced by an in-memory lookup so the numbers isolate bcrypt
+and the hashing pool:
+
+    BCRYPT_ROUNDS=10 python -m benchmarks.bench_login --logins 64
+"""
+import time
+import argparse
+import threading
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64, help="logins per concurrency level")
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32")
+    args = parser.parse_args()
+
+    from backend import auth
+
+    password_hash = auth.hash_password("benchmark-password")
+    cursor = MagicMock()
+    cursor.fetchone.return_value = (password_hash,)
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    @contextmanager
+    def fake_db_connection():
+        yield conn
+    auth.db_connection = fake_db_connection
+
+    print(f"bcrypt rounds={auth.BCRYPT_ROUNDS} workers={auth.BCRYPT_WORKERS} "
+          f"max pending={auth.BCRYPT_MAX_PENDING}")
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        remaining = [args.logins]
+        counts = {"ok": 0, "busy": 0}
+        lock = threading.Lock()
+
+        def user():
+            while True:
+                with lock:
+                    if remaining[0] == 0:
+                        return
+                    remaining[0] -= 1
+                try:
+                    auth.authenticate_user("bench@example.com", "benchmark-password")
+                    outcome = "ok"
+                except auth.AuthBusyError:
+                    outcome = "busy"
+                with lock:
+                    counts[outcome] += 1
+
+        threads = [threading.Thread(target=user) for _ in range(concurrency)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        print(f"concurrency {concurrency:>3}: {counts['ok'] / elapsed:7.1f} logins/sec "
+              f"({counts['busy']} busy rejections, {elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
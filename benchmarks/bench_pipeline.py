@@ -0,0 +1,257 @@
+"""Throughput and latency of the backend pipeline at 1..N concurrent users.
+
+Everything runs against local stand-ins: a moto S3 server, the fake OpenAI
+server from tests/ (with --openai-latency seconds per response) and an
+SQLite users table in place of MySQL. Recording.mp3 is the audio fixture.
+
+    python -m benchmarks.bench_pipeline --users 1,4,16 --iterations 5
+    python -m benchmarks.bench_pipeline --output bench.json
+    python -m benchmarks.bench_pipeline --baseline bench.json --tolerance 0.2
+
+With --baseline the run exits non-zero when any scenario's p50 latency is
+more than --tolerance slower than the saved results.
+"""
+import os
+import sys
+import json
+import math
+import time
+import sqlite3
+import argparse
+import tempfile
+import threading
+import statistics
+from contextlib import contextmanager
+import boto3
+from benchmarks.bench_s3_client import start_local_s3
+
+BENCH_BUCKET = "bench-bucket"
+BENCH_PREFIX = "recordings/bench/"
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "benchmark-password"
+FIXTURE = "Recording.mp3"
+SAMPLE_TEXT = ("The quarterly numbers came in ahead of plan. Support tickets were down again. "
+               "We agreed to revisit the hiring plan next month.")
+
+SCENARIOS = ("list_s3_audio_files", "download_s3_file", "upload_to_s3", "transcribe_audio",
+             "translate_text", "authenticate_user", "end_to_end")
+
+
+class SQLiteUsers:
+    """MySQL stand-in: an SQLite users table behind the same cursor API"""
+
+    def __init__(self, path):
+        self.path = path
+        with sqlite3.connect(path) as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS users (email TEXT PRIMARY KEY, password_hash TEXT)")
+
+    @contextmanager
+    def connection(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            yield _SQLiteConnection(conn)
+        finally:
+            conn.close()
+
+
+class _SQLiteConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return _SQLiteCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+
+class _SQLiteCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, params=()):
+        # mysql.connector uses %s placeholders, sqlite3 uses ?
+        self._cursor.execute(query.replace("%s", "?"), params)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+
+def run_concurrent(users, iterations, fn):
+    """Call fn(user, i) `iterations` times from each of `users` threads"""
+    samples, errors = [], []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(users)
+
+    def user(index):
+        start_barrier.wait()
+        for i in range(iterations):
+            start = time.perf_counter()
+            try:
+                fn(index, i)
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+                continue
+            with lock:
+                samples.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=user, args=(u,)) for u in range(users)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    samples.sort()
+    return {
+        "ops_per_sec": len(samples) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(samples) * 1000 if samples else None,
+        "p95_ms": samples[math.ceil(len(samples) * 0.95) - 1] * 1000 if samples else None,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+    }
+
+def build_scenarios(workdir):
+    """Map of scenario name -> fn(user, i); imports backend after the env is set"""
+    from backend import auth, s3_utils, openai_utils, pipeline
+
+    users = SQLiteUsers(os.path.join(workdir, "users.sqlite3"))
+    auth.db_connection = users.connection
+    ok, message = auth.register_user(BENCH_EMAIL, BENCH_PASSWORD)
+    if not ok:
+        raise RuntimeError(message)
+
+    def list_files(user, i):
+        s3_utils.list_s3_audio_files(BENCH_BUCKET, BENCH_PREFIX)
+
+    def download(user, i):
+        path = os.path.join(workdir, f"download_{user}_{i}.mp3")
+        s3_utils.download_s3_file(BENCH_BUCKET, BENCH_PREFIX + FIXTURE, path)
+        os.remove(path)
+
+    def upload(user, i):
+        ok, result = s3_utils.upload_to_s3(BENCH_BUCKET, local_path=FIXTURE,
+                                           s3_key=f"bench/uploads/{user}_{i}_{time.time_ns()}.mp3")
+        if not ok:
+            raise RuntimeError(result)
+
+    def transcribe(user, i):
+        openai_utils.transcribe_audio(FIXTURE)
+
+    def translate(user, i):
+        # Unique text per call so every request misses the translation cache
+        openai_utils.translate_text(f"{SAMPLE_TEXT} ({user}-{i}-{time.time_ns()})", "Hindi")
+
+    def login(user, i):
+        if not auth.authenticate_user(BENCH_EMAIL, BENCH_PASSWORD):
+            raise RuntimeError("login rejected")
+
+    def end_to_end(user, i):
+        # A fresh object per call: upload, transcribe (cache miss), translate
+        key = f"{BENCH_PREFIX}e2e_{user}_{i}_{time.time_ns()}.mp3"
+        ok, result = s3_utils.upload_to_s3(BENCH_BUCKET, local_path=FIXTURE, s3_key=key)
+        if not ok:
+            raise RuntimeError(result)
+        transcript = pipeline.transcribe_s3_file(BENCH_BUCKET, key)
+        openai_utils.translate_text(f"{transcript} ({key})", "Hindi")
+
+    return {
+        "list_s3_audio_files": list_files,
+        "download_s3_file": download,
+        "upload_to_s3": upload,
+        "transcribe_audio": transcribe,
+        "translate_text": translate,
+        "authenticate_user": login,
+        "end_to_end": end_to_end,
+    }
+
+def run_suite(user_levels, iterations, openai_latency=0.05, scenarios=SCENARIOS, log=print):
+    """Run every scenario at every concurrency level; returns {scenario: {users: stats}}"""
+    from tests.fake_openai import FakeOpenAI
+
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    os.environ.setdefault("AWS_REGION", "us-east-1")
+    os.environ["CACHE_DIR"] = os.path.join(workdir, "cache")
+    # Measure the code, not the production rate limits
+    os.environ.setdefault("OPENAI_REQUESTS_PER_MINUTE", "1000000")
+    os.environ.setdefault("OPENAI_TOKENS_PER_MINUTE", "100000000")
+    os.environ.setdefault("OPENAI_MAX_CONCURRENCY", str(max(user_levels) * 2))
+    os.environ.setdefault("BCRYPT_ROUNDS", "10")
+
+    server, endpoint_url = start_local_s3()
+    os.environ["S3_ENDPOINT_URL"] = endpoint_url
+    try:
+        with FakeOpenAI(latency=openai_latency) as fake:
+            setup = boto3.client('s3', endpoint_url=endpoint_url, region_name=os.environ["AWS_REGION"])
+            setup.create_bucket(Bucket=BENCH_BUCKET)
+            with open(FIXTURE, "rb") as f:
+                setup.put_object(Bucket=BENCH_BUCKET, Key=BENCH_PREFIX + FIXTURE, Body=f.read())
+
+            fns = build_scenarios(workdir)
+            # After build_scenarios: importing backend.openai_utils resets api_key from the env
+            import openai
+            openai.api_base = fake.url
+            openai.api_key = "bench-key"
+            results = {}
+            for name in scenarios:
+                results[name] = {}
+                for users in user_levels:
+                    stats = run_concurrent(users, iterations, fns[name])
+                    results[name][str(users)] = stats
+                    log(format_row(name, users, stats))
+            return results
+    finally:
+        server.stop()
+
+def format_row(name, users, stats):
+    if stats["p50_ms"] is None:
+        return f"{name:<20} users {users:>3}   all calls failed: {stats['first_error']}"
+    return (f"{name:<20} users {users:>3}   {stats['ops_per_sec']:8.1f} ops/s   "
+            f"p50 {stats['p50_ms']:8.2f} ms   p95 {stats['p95_ms']:8.2f} ms   errors {stats['errors']}")
+
+def compare(results, baseline, tolerance):
+    """Return a line per scenario/concurrency whose p50 regressed beyond tolerance"""
+    regressions = []
+    for name, levels in results.items():
+        for users, stats in levels.items():
+            before = baseline.get(name, {}).get(users)
+            if not before or not before.get("p50_ms") or stats["p50_ms"] is None:
+                continue
+            change = stats["p50_ms"] / before["p50_ms"] - 1
+            if change > tolerance:
+                regressions.append(f"{name} users={users}: p50 {before['p50_ms']:.2f} -> "
+                                   f"{stats['p50_ms']:.2f} ms (+{change:.0%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", default="1,4,16", help="comma-separated concurrency levels")
+    parser.add_argument("--iterations", type=int, default=5, help="calls per user per scenario")
+    parser.add_argument("--openai-latency", type=float, default=0.05, help="fake OpenAI response delay in seconds")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier --output run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p50 slowdown vs baseline")
+    args = parser.parse_args()
+
+    user_levels = [int(u) for u in args.users.split(",")]
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    results = run_suite(user_levels, args.iterations, args.openai_latency, scenarios)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Per-call S3 latency with a fresh client per call vs the shared client.
+
+Runs against a local moto server by default, or any S3-compatible endpoint
+(e.g. minio) given with --endpoint-url:
+
+    python -m benchmarks.bench_s3_client --calls 200
+"""
+import os
+import time
+import logging
+import argparse
+import statistics
+import boto3
+
+BENCH_BUCKET = "bench-bucket"
+BENCH_KEY = "recordings/bench/Recording.mp3"
+
+
+def start_local_s3():
+    """Start an in-process moto S3 server and return its endpoint URL"""
+    from moto.server import ThreadedMotoServer
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    return server, f"http://{host}:{port}"
+
+def summarize(name, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:<28} mean {statistics.mean(samples) * 1000:7.2f} ms   "
+          f"p50 {statistics.median(samples) * 1000:7.2f} ms   p95 {p95 * 1000:7.2f} ms")
+    return statistics.mean(samples)
+
+def time_calls(calls, fn):
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--endpoint-url", default=None, help="S3-compatible endpoint; defaults to a local moto server")
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    os.environ.setdefault("AWS_REGION", "us-east-1")
+
+    server = None
+    endpoint_url = args.endpoint_url
+    if endpoint_url is None:
+        server, endpoint_url = start_local_s3()
+    os.environ["S3_ENDPOINT_URL"] = endpoint_url
+
+    # Import after the environment is set so the shared client points at the stand-in
+    from backend import s3_utils
+
+    try:
+        setup = boto3.client('s3', endpoint_url=endpoint_url, region_name=os.environ["AWS_REGION"])
+        setup.create_bucket(Bucket=BENCH_BUCKET)
+        with open("Recording.mp3", "rb") as f:
+            setup.put_object(Bucket=BENCH_BUCKET, Key=BENCH_KEY, Body=f.read())
+
+        def fresh_client_call():
+            s3 = boto3.client('s3', endpoint_url=endpoint_url, region_name=os.environ["AWS_REGION"])
+            s3.head_object(Bucket=BENCH_BUCKET, Key=BENCH_KEY)
+
+        def shared_client_call():
+            s3_utils.get_s3_object_info(BENCH_BUCKET, BENCH_KEY)
+
+        shared_client_call()  # warm the shared client once, as a long-lived process would
+        before = summarize("fresh client per call", time_calls(args.calls, fresh_client_call))
+        after = summarize("shared client", time_calls(args.calls, shared_client_call))
+        print(f"speedup: {before / after:.1f}x")
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class FakeOpenAI:
+    """Local stand-in for the OpenAI HTTP API (chat completions, Whisper, TTS).
+
+    Point openai.api_base at `url`. `latency` delays every response,
+    `failures` is a list of HTTP status codes returned (in order) before
+    requests start succeeding, and `chat_reply(messages)` builds the reply,
+    sent word by word as server-sent events when the request asks to stream.
+    """
+
+    def __init__(self, latency=0.0, transcript="hello world", chat_reply=None):
+        self.latency = latency
+        self.transcript = transcript
+        self.chat_reply = chat_reply or (lambda messages: messages[-1]["content"])
+        self.failures = []
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, payload, headers=None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self, reply):
+                # Server-sent events, one word per delta like the real API
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                words = reply.split(" ")
+                for i, word in enumerate(words):
+                    delta = {"content": word if i == 0 else " " + word}
+                    chunk = {"object": "chat.completion.chunk",
+                             "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with fake._lock:
+                    fake.requests.append(self.path)
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                    status = fake.failures.pop(0) if fake.failures else 200
+                try:
+                    if fake.latency:
+                        time.sleep(fake.latency)
+                    if status != 200:
+                        self._reply(status, {"error": {"message": f"fake error {status}", "type": "server_error"}},
+                                    {"Retry-After": "0"})
+                    elif self.path.endswith("/audio/transcriptions"):
+                        self._reply(200, {"text": fake.transcript})
+                    elif self.path.endswith("/audio/speech"):
+                        audio = f"audio[{json.loads(body)['input']}]".encode("utf-8")
+                        self.send_response(200)
+                        self.send_header("Content-Type", "audio/mpeg")
+                        self.send_header("Content-Length", str(len(audio)))
+                        self.end_headers()
+                        self.wfile.write(audio)
+                    elif self.path.endswith("/chat/completions") and json.loads(body).get("stream"):
+                        self._stream(fake.chat_reply(json.loads(body)["messages"]))
+                    elif self.path.endswith("/chat/completions"):
+                        messages = json.loads(body)["messages"]
+                        self._reply(200, {
+                            "object": "chat.completion",
+                            "choices": [{"index": 0, "finish_reason": "stop", "message": {
+                                "role": "assistant", "content": fake.chat_reply(messages)}}],
+                            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+                        })
+                    else:
+                        self._reply(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+
+        return Handler
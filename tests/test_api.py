@@ -0,0 +1,98 @@
+import os
+import pytest
+
+os.environ.setdefault("SESSION_SECRET", "test-secret")
+import app as api  # refuses to import without SESSION_SECRET
+from backend import jobs, pipeline, transcription
+from backend.cache import DiskCache
+from backend.transcription import StubEngine
+
+AUTH = {"Authorization": "Bearer good-token"}
+
+
+class CachedStubEngine(StubEngine):
+    # StubEngine output is never cached; pretend to be a real engine
+    name = "cached-stub"
+    cacheable = True
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, 'JOBS_DB_PATH', str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(pipeline, 'transcript_cache', DiskCache("t", root=str(tmp_path)))
+    monkeypatch.setattr(transcription, '_engine', CachedStubEngine("stub transcript"))
+    monkeypatch.setattr(api, 'S3_BUCKET_NAME', "bucket")
+    monkeypatch.setattr(api, 'validate_session', lambda token: "alice@example.com" if token == "good-token" else None)
+    return api.app.test_client()
+
+def test_api_refuses_to_start_without_a_session_secret():
+    import subprocess
+    import sys
+    env = {k: v for k, v in os.environ.items() if k != "SESSION_SECRET"}
+    result = subprocess.run([sys.executable, "-c", "import app"], env=env, capture_output=True, text=True)
+    assert result.returncode != 0 and "SESSION_SECRET" in result.stderr
+
+def test_requests_need_a_session_token(client):
+    assert client.get("/api/files").status_code == 401
+    response = client.get("/api/files", headers={"Authorization": "Bearer forged"})
+    assert response.status_code == 401 and "error" in response.get_json()
+
+def test_upload_streams_the_body_and_queues_a_job(client, monkeypatch):
+    uploaded = {}
+    def fake_upload(bucket, user_email=None, fileobj=None, filename=None):
+        uploaded["body"] = fileobj.read()
+        return True, f"custom_uploads/alice/20240101_{filename}"
+    monkeypatch.setattr(api, 'upload_custom_file_to_s3', fake_upload)
+    monkeypatch.setattr(api, 'add_uploaded_object', lambda bucket, key: None)
+
+    response = client.post("/api/upload?filename=talk.mp3&transcribe=1&language=Hindi", data=b"audio", headers=AUTH)
+    assert response.status_code == 201
+    body = response.get_json()
+    assert uploaded["body"] == b"audio" and body["s3_key"] == "custom_uploads/alice/20240101_talk.mp3"
+    job = client.get(f"/api/jobs/{body['job_id']}", headers=AUTH).get_json()
+    assert job["status"] == jobs.QUEUED and job["language"] == "Hindi"
+    assert client.post("/api/upload?filename=notes.txt", data=b"x", headers=AUTH).status_code == 400
+
+def test_transcribe_raw_body_is_cached_by_content(client):
+    for _ in range(2):
+        response = client.post("/api/transcribe", data=b"audio", headers={**AUTH, "X-Filename": "clip.wav"})
+        assert response.get_json() == {"transcript": "stub transcript"}
+    assert transcription._engine.calls == ["clip.wav"]
+
+def test_users_cannot_touch_other_users_files(client):
+    response = client.post("/api/jobs", json={"s3_key": "recordings/bob/a.mp3"}, headers=AUTH)
+    assert response.status_code == 403
+    response = client.post("/api/jobs", json={"s3_key": "recordings/alice/a.mp3", "language": "Klingon"}, headers=AUTH)
+    assert response.status_code == 400
+
+def test_translate_validates_and_dispatches(client, monkeypatch):
+    monkeypatch.setattr(api, 'translate_text', lambda text, language: f"[{language}] {text}")
+    response = client.post("/api/translate", json={"text": "hello", "language": "Hindi"}, headers=AUTH)
+    assert response.get_json() == {"translation": "[Hindi] hello"}
+    monkeypatch.setattr(api, 'translate_text_stream', lambda text, language: iter(["[Hindi]", " hello"]))
+    response = client.post("/api/translate?stream=1", json={"text": "hello", "language": "Hindi"}, headers=AUTH)
+    assert response.data.decode() == "[Hindi] hello"
+    assert client.post("/api/translate", json={"text": "hello"}, headers=AUTH).status_code == 400
+
+def test_register_and_login_errors_map_to_status_codes(client, monkeypatch):
+    import mysql.connector
+    from mysql.connector import errorcode
+    from backend.auth import AuthBusyError
+    body = {"email": "alice@example.com", "password": "secret123"}
+    def raise_(err):
+        def fail(*args):
+            raise err
+        return fail
+    monkeypatch.setattr(api, 'create_user', raise_(mysql.connector.IntegrityError(errno=errorcode.ER_DUP_ENTRY)))
+    assert client.post("/api/register", json=body).status_code == 409
+    monkeypatch.setattr(api, 'create_user', raise_(AuthBusyError("busy")))
+    assert client.post("/api/register", json=body).status_code == 503
+    monkeypatch.setattr(api, 'create_user', raise_(mysql.connector.errors.OperationalError("gone away")))
+    response = client.post("/api/register", json=body)
+    assert response.status_code == 500 and response.get_json() == {"error": "Database error"}
+
+    monkeypatch.setattr(api, 'authenticate_user', raise_(mysql.connector.errors.PoolError("exhausted")))
+    response = client.post("/api/login", json=body)
+    assert response.status_code == 503 and "error" in response.get_json()
+    monkeypatch.setattr(api, 'validate_session', raise_(mysql.connector.errors.InterfaceError("down")))
+    response = client.get("/api/files", headers=AUTH)
+    assert response.status_code == 500 and "error" in response.get_json()
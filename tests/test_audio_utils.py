@@ -0,0 +1,105 @@
+import io
+import wave
+import array
+import pytest
+from backend import audio_utils
+from backend.audio_utils import split_audio
+from backend.openai_utils import stitch_transcripts
+
+def make_wav(seconds, rate=8000, silence_at=None):
+    samples = array.array('h', [1000 if (i // 40) % 2 else -1000 for i in range(int(seconds * rate))])
+    if silence_at is not None:
+        start = int(silence_at * rate)
+        for i in range(start, start + rate // 2):
+            samples[i] = 0
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+def wav_seconds(data):
+    with wave.open(io.BytesIO(data), 'rb') as r:
+        return r.getnframes() / r.getframerate()
+
+def test_short_audio_is_a_single_chunk():
+    chunks = split_audio(make_wav(5), "a.wav", chunk_seconds=10)
+    assert len(chunks) == 1
+
+def test_wav_is_split_with_overlap_near_silence():
+    chunks = split_audio(make_wav(30, silence_at=11), "a.wav", chunk_seconds=10, overlap_seconds=1)
+    assert [name for _, name in chunks][:2] == ["a_part000.wav", "a_part001.wav"]
+    # The first cut moves from 10s to the quiet stretch at 11s
+    assert 10.9 <= wav_seconds(chunks[0][0]) <= 11.6
+    assert sum(wav_seconds(c) for c, _ in chunks) > 30
+
+def test_wav_chunks_stay_under_the_upload_limit(monkeypatch):
+    monkeypatch.setattr(audio_utils, "CHUNK_MAX_BYTES", 300_000)
+    data = make_wav(30)
+    chunks = split_audio(data, "a.wav", chunk_seconds=20, overlap_seconds=1)
+    assert len(chunks) > 2
+    assert all(len(c) <= 300_000 + 44 for c, _ in chunks)
+
+def test_unsplittable_format_over_the_limit_raises():
+    with pytest.raises(ValueError, match="25 MB"):
+        split_audio(b"\0" * (audio_utils.WHISPER_MAX_BYTES + 1), "a.ogg")
+    assert len(split_audio(b"\0" * 1000, "a.ogg")) == 1
+
+def test_mp3_is_split_on_frame_boundaries():
+    with open("Recording.mp3", "rb") as f:
+        data = f.read()
+    chunks = split_audio(data, "Recording.mp3", chunk_seconds=5, overlap_seconds=1)
+    assert len(chunks) > 1
+    assert all(c[:1] == b'\xff' for c, _ in chunks[1:])
+
+def test_estimate_duration():
+    assert audio_utils.estimate_duration(make_wav(5), "a.wav") == 5
+    with open("Recording.mp3", "rb") as f:
+        assert audio_utils.estimate_duration(f.read(), "Recording.mp3") > 5
+    assert audio_utils.estimate_duration(b"data", "a.m4a") is None
+
+def test_long_recordings_are_chunked_regardless_of_size(monkeypatch):
+    from backend import pipeline
+    chunked, whole = [], []
+    monkeypatch.setattr(pipeline, "CHUNK_SECONDS", 10)
+    monkeypatch.setattr(pipeline, "CHUNK_OVERLAP_SECONDS", 1)
+    monkeypatch.setattr(pipeline, "transcribe_audio_chunked", lambda data, filename, engine=None: chunked.append(filename))
+    monkeypatch.setattr(pipeline, "transcribe_audio", lambda stream, filename, engine=None: whole.append(stream.read()))
+    pipeline._transcribe_stream(io.BytesIO(make_wav(30)), 480_044, "long.wav", None)
+    short = make_wav(5)
+    pipeline._transcribe_stream(io.BytesIO(short), len(short), "short.wav", None)
+    assert chunked == ["long.wav"] and whole == [short]
+
+def test_stitch_removes_overlapping_words():
+    texts = ["the quick brown fox jumps", "Fox jumps over the lazy", "lazy dog."]
+    assert stitch_transcripts(texts) == "the quick brown fox jumps over the lazy dog."
+
+def make_padded_stereo_wav(rate=44100, silence=1.0, tone=2.0):
+    quiet = [0] * int(silence * rate)
+    loud = [3000 if (i // 50) % 2 else -3000 for i in range(int(tone * rate))]
+    samples = array.array('h', [s for s in quiet + loud + quiet for _ in range(2)])
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+def test_normalize_wav_downmixes_resamples_and_trims():
+    normalized = audio_utils.normalize_wav(make_padded_stereo_wav(), sample_rate=16000)
+    with wave.open(io.BytesIO(normalized), 'rb') as r:
+        assert (r.getnchannels(), r.getsampwidth(), r.getframerate()) == (1, 2, 16000)
+    # 2s of tone plus 0.25s padding either side
+    assert 2.4 <= wav_seconds(normalized) <= 2.6
+
+def test_preprocess_recording_reports_savings():
+    pytest.importorskip("speech_recognition")
+    data = make_padded_stereo_wav()
+    processed, name, report = audio_utils.preprocess_recording(data, "recording_1.wav")
+    assert name == f"recording_1.{report['format']}"
+    assert report["original_bytes"] == len(data)
+    assert report["processed_bytes"] == len(processed) < len(data) / 5
+    assert report["original_seconds"] == pytest.approx(4.0)
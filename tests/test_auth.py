@@ -1,7 +1,7 @@
 import pytest
 import bcrypt
 from unittest.mock import patch, MagicMock
-from backend.auth import authenticate_user, register_user
+from backend.auth import authenticate_user, register_user, db_connection, get_pool_metrics
 
 @pytest.fixture
 def mock_db(monkeypatch):
@@ -27,3 +27,61 @@ def test_register_user_duplicate_email(mock_db):
     success, msg = register_user("test@example.com", "password123")
     assert not success
     assert "Duplicate entry" in msg
+
+def test_connection_returned_to_pool_when_query_fails(mock_db):
+    mock_conn, mock_cursor = mock_db
+    mock_cursor.execute.side_effect = RuntimeError("boom")
+    with pytest.raises(RuntimeError):
+        authenticate_user("test@example.com", "password")
+    mock_conn.close.assert_called_once()
+    assert get_pool_metrics()["in_use"] == 0
+
+def test_pool_checkout_times_out_when_exhausted(mock_db, monkeypatch):
+    import threading
+    from mysql.connector.errors import PoolError
+    monkeypatch.setattr('backend.auth._pool_slots', threading.BoundedSemaphore(1))
+    monkeypatch.setattr('backend.auth.MYSQL_POOL_TIMEOUT', 0.01)
+    timeouts = get_pool_metrics()["timeouts"]
+    with db_connection():
+        with pytest.raises(PoolError):
+            with db_connection():
+                pass
+    assert get_pool_metrics()["timeouts"] == timeouts + 1
+
+def test_login_fails_fast_when_hash_queue_is_full(mock_db, monkeypatch):
+    import threading
+    from backend.auth import AuthBusyError
+    mock_conn, mock_cursor = mock_db
+    mock_cursor.fetchone.return_value = ("$2b$04$invalidinvalidinvalidinv",)
+    monkeypatch.setattr('backend.auth._hash_slots', threading.BoundedSemaphore(1))
+    from backend import auth
+    auth._hash_slots.acquire()
+    with pytest.raises(AuthBusyError):
+        authenticate_user("test@example.com", "password")
+    success, msg = register_user("test@example.com", "password123")
+    assert not success
+    assert "busy" in msg
+
+def test_reconnects_are_counted_and_exported(monkeypatch):
+    from backend import auth, metrics
+
+    class FakeConnection:
+        connection_id = 1
+
+    class FakePool:
+        cnx = FakeConnection()
+        def get_connection(self):
+            return self.cnx
+
+    monkeypatch.setattr(auth, '_pool', FakePool())
+    before = get_pool_metrics()
+    auth.get_db_connection()
+    auth.get_db_connection()
+    FakePool.cnx.connection_id = 2  # the pool reconnected it
+    auth.get_db_connection()
+    after = get_pool_metrics()
+    assert after["reconnects"] == before["reconnects"] + 1
+    assert after["created"] == before["created"] + 1
+    body = metrics.render_prometheus()
+    assert "# TYPE mysql_pool_in_use gauge" in body
+    assert f"mysql_pool_reconnects_total {after['reconnects']}" in body
@@ -0,0 +1,52 @@
+from backend import batch
+
+OBJECTS = [
+    {'key': 'recordings/a/1.mp3', 'etag': 'e1'},
+    {'key': 'recordings/a/2.wav', 'etag': 'e2'},
+    {'key': 'transcripts/recordings/a/1.mp3.txt', 'etag': 'e3'},
+]
+
+def test_batch_resumes_from_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, 'iter_s3_objects', lambda bucket, prefix: OBJECTS)
+    transcribed = []
+    def transcribe(bucket, key):
+        transcribed.append(key)
+        if key.endswith("2.wav") and len(transcribed) == 2:
+            raise RuntimeError("timeout")
+        return "text"
+    monkeypatch.setattr(batch, 'transcribe_s3_file', transcribe)
+    uploads = {}
+    monkeypatch.setattr(batch, 'upload_text_to_s3', lambda bucket, key, text: uploads.__setitem__(key, text))
+    monkeypatch.setattr(batch, 'translate_text', lambda text, language: f"{language}:{text}")
+    checkpoint = str(tmp_path / "checkpoint.jsonl")
+
+    counts = batch.run_batch("bucket", "recordings/", ["Hindi"], concurrency=1,
+                             checkpoint_path=checkpoint, output="s3", log=lambda msg: None)
+    assert counts == {"processed": 1, "skipped": 0, "failed": 1}
+    assert uploads["transcripts/recordings/a/1.mp3.Hindi.txt"] == "Hindi:text"
+
+    counts = batch.run_batch("bucket", "recordings/", [], concurrency=1,
+                             checkpoint_path=checkpoint, log=lambda msg: None)
+    assert counts == {"processed": 1, "skipped": 1, "failed": 0}
+    assert transcribed == ['recordings/a/1.mp3', 'recordings/a/2.wav', 'recordings/a/2.wav']
+
+def test_rerun_with_new_languages_is_not_skipped(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, 'iter_s3_objects', lambda bucket, prefix: OBJECTS[:1])
+    monkeypatch.setattr(batch, 'transcribe_s3_file', lambda bucket, key: "text")
+    monkeypatch.setattr(batch, 'upload_text_to_s3', lambda bucket, key, text: None)
+    translated = []
+    monkeypatch.setattr(batch, 'translate_text', lambda text, language: translated.append(language) or text)
+    checkpoint = str(tmp_path / "checkpoint.jsonl")
+    run = lambda languages, output="cache": batch.run_batch(
+        "bucket", "recordings/", languages, concurrency=1, checkpoint_path=checkpoint,
+        output=output, log=lambda msg: None)
+
+    assert run([]) == {"processed": 1, "skipped": 0, "failed": 0}
+    assert run(["Hindi"]) == {"processed": 1, "skipped": 0, "failed": 0}
+    assert run(["Hindi"]) == {"processed": 0, "skipped": 1, "failed": 0}
+    assert run(["Hindi"], output="s3") == {"processed": 1, "skipped": 0, "failed": 0}
+    assert run(["Hindi"]) == {"processed": 0, "skipped": 1, "failed": 0}
+    assert translated == ["Hindi", "Hindi"]
+
+def test_default_checkpoint_depends_on_prefix():
+    assert batch.default_checkpoint_path("recordings/") != batch.default_checkpoint_path("custom_uploads/bob/")
@@ -0,0 +1,179 @@
+import os
+import pytest
+from backend.cache import DiskCache, BlobCache, make_key
+from backend import pipeline
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskCache("test", ttl=60, max_entries=2, root=str(tmp_path))
+
+def test_cache_hit_and_miss(cache):
+    key = make_key("bucket", "a.mp3", "etag1")
+    assert cache.get(key) is None
+    cache.set(key, "hello", cost_seconds=2.5, cost_bytes=100)
+    assert cache.get(key) == "hello"
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["saved_seconds"] == 2.5
+
+def test_cache_expired_entry_is_a_miss(cache, monkeypatch):
+    cache.set("k", "v")
+    monkeypatch.setattr('backend.cache.time.time', lambda: 10 ** 12)
+    assert cache.get("k") is None
+
+def test_cache_evicts_oldest_entries(cache):
+    for i in range(3):
+        cache.set(f"k{i}", i)
+    assert cache.get("k2") == 2
+    assert len([k for k in ("k0", "k1", "k2") if cache.get(k) is not None]) == 2
+
+def test_cache_evicts_least_recently_used_entries_over_the_byte_quota(tmp_path):
+    cache = DiskCache("bytes", root=str(tmp_path), max_bytes=1)
+    cache.set("k0", "x" * 100)
+    cache.max_bytes = 2.5 * os.path.getsize(cache._path("k0"))
+    cache.set("k1", "x" * 100)
+    os.utime(cache._path("k0"), (1, 1))
+    os.utime(cache._path("k1"), (2, 2))
+    assert cache.get("k0") is not None  # now the most recently used
+    cache.set("k2", "x" * 100)
+    assert cache.get("k1") is None
+    assert cache.get("k0") is not None and cache.get("k2") is not None
+
+def test_cache_keeps_the_newest_entry_even_over_the_byte_quota(tmp_path):
+    cache = DiskCache("bytes", root=str(tmp_path), max_bytes=1)
+    cache.set("k0", "x" * 100)
+    assert cache.get("k0") == "x" * 100
+
+def test_transcribe_s3_file_skips_download_on_hit(tmp_path, monkeypatch):
+    import io
+    monkeypatch.setattr(pipeline, 'transcript_cache', DiskCache("t", root=str(tmp_path)))
+    monkeypatch.setattr(pipeline, 'get_s3_etag', lambda bucket, key: "etag1")
+    downloads = []
+    def fake_stream(bucket, key, etag=None):
+        downloads.append(key)
+        return io.BytesIO(b"audio")
+    monkeypatch.setattr(pipeline, 'open_s3_stream', fake_stream)
+    monkeypatch.setattr(pipeline, 'transcribe_audio', lambda stream, filename, engine=None: stream.read().decode() + filename)
+
+    assert pipeline.transcribe_s3_file("bucket", "a.mp3") == "audioa.mp3"
+    assert pipeline.transcribe_s3_file("bucket", "a.mp3") == "audioa.mp3"
+    assert downloads == ["a.mp3"]
+
+def test_streamed_transcript_is_cached_for_later_calls(tmp_path, monkeypatch):
+    import io
+    monkeypatch.setattr(pipeline, 'transcript_cache', DiskCache("t", root=str(tmp_path)))
+    monkeypatch.setattr(pipeline, 'get_s3_etag', lambda bucket, key: "etag1")
+    monkeypatch.setattr(pipeline, 'TRANSCRIBE_CHUNK_THRESHOLD_BYTES', 1)
+    monkeypatch.setattr(pipeline, 'open_s3_stream', lambda bucket, key, etag=None: io.BytesIO(b"audio"))
+    monkeypatch.setattr(pipeline, 'transcribe_audio_chunked_stream', lambda data, filename, engine=None: iter(["one", " two"]))
+
+    assert list(pipeline.stream_s3_transcript("bucket", "a.mp3")) == ["one", " two"]
+    monkeypatch.setattr(pipeline, 'open_s3_stream', lambda bucket, key, etag=None: pytest.fail("should not download"))
+    assert list(pipeline.stream_s3_transcript("bucket", "a.mp3")) == ["one two"]
+    assert pipeline.transcribe_s3_file("bucket", "a.mp3") == "one two"
+
+def test_background_translations_are_stored_together(monkeypatch):
+    saved = []
+    monkeypatch.setattr(pipeline, 'get_s3_etag', lambda bucket, key: "etag1")
+    monkeypatch.setattr(pipeline, 'translate_text_multi', lambda text, languages: {l: f"{l}:{text}" for l in languages})
+    monkeypatch.setattr(pipeline.transcript_store, 'save_transcripts',
+                        lambda bucket, key, etag, texts, compute_seconds=None, engine="": saved.append((key, etag, texts)))
+    future = pipeline.start_s3_translations("bucket", "a.mp3", "hi", ["Hindi", "Spanish"])
+    assert future.result(timeout=5) == {"Hindi": "Hindi:hi", "Spanish": "Spanish:hi"}
+    assert saved == [("a.mp3", "etag1", {"Hindi": "Hindi:hi", "Spanish": "Spanish:hi"})]
+
+def test_stats_are_shared_between_cache_instances(tmp_path):
+    # The job workers and the Streamlit app each hold their own instance
+    worker_cache = DiskCache("shared", root=str(tmp_path))
+    app_cache = DiskCache("shared", root=str(tmp_path))
+    worker_cache.set("k", "v", cost_seconds=1.5)
+    worker_cache.get("k")
+    worker_cache.get("missing")
+    stats = app_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["saved_seconds"]) == (1, 1, 1.5)
+    assert DiskCache("other", root=str(tmp_path)).stats()["hits"] == 0
+
+@pytest.fixture
+def s3_bucket(monkeypatch):
+    import boto3
+    from moto import mock_aws
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="bucket")
+        requests = []
+        s3.meta.events.register("provide-client-params.s3.GetObject",
+                                lambda params, **kwargs: requests.append(params.get("IfNoneMatch")))
+        yield s3, requests
+
+def test_blob_cache_revalidates_with_conditional_gets(tmp_path, s3_bucket):
+    s3, requests = s3_bucket
+    cache = BlobCache("blobs", get_client=lambda: s3, root=str(tmp_path))
+    etag = s3.put_object(Bucket="bucket", Key="a.mp3", Body=b"v1")["ETag"].strip('"')
+    for _ in range(2):
+        with cache.open("bucket", "a.mp3") as f:
+            assert f.read() == b"v1"
+    with cache.open("bucket", "a.mp3", etag=etag) as f:
+        assert f.read() == b"v1"
+    # Download, then a 304 revalidation; the known ETag needs no request at all
+    assert requests == [None, f'"{etag}"']
+
+    s3.put_object(Bucket="bucket", Key="a.mp3", Body=b"v2")
+    with cache.open("bucket", "a.mp3") as f:
+        assert f.read() == b"v2"
+    files = [p.name for p in tmp_path.glob("blobs/*/*")]
+    assert len(files) == 1 and files[0].endswith(".blob")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+
+def test_blob_cache_evicts_least_recently_used(tmp_path, s3_bucket):
+    import os
+    s3, requests = s3_bucket
+    cache = BlobCache("blobs", get_client=lambda: s3, max_bytes=25, root=str(tmp_path))
+    stale_tmp = tmp_path / "blobs" / "x.blob.1.1.tmp"
+    stale_tmp.parent.mkdir(parents=True)
+    stale_tmp.write_bytes(b"partial")
+    os.utime(stale_tmp, (0, 0))
+    for name in ("a", "b", "c"):
+        s3.put_object(Bucket="bucket", Key=f"{name}.mp3", Body=name.encode() * 10)
+    cache.get_path("bucket", "a.mp3")
+    cache.get_path("bucket", "b.mp3")
+    os.utime(cache.get_path("bucket", "b.mp3"), (0, 0))  # b is now the oldest
+    cache.get_path("bucket", "a.mp3")
+    cache.get_path("bucket", "c.mp3")
+    requests.clear()
+    cache.get_path("bucket", "a.mp3")
+    cache.get_path("bucket", "b.mp3")
+    assert requests[0] is not None and requests[1] is None
+    assert not stale_tmp.exists()
+
+def test_blob_cache_refetches_when_the_copy_vanishes_after_a_304(tmp_path, s3_bucket):
+    s3, requests = s3_bucket
+    cache = BlobCache("blobs", get_client=lambda: s3, root=str(tmp_path))
+    etag = s3.put_object(Bucket="bucket", Key="a.mp3", Body=b"v1")["ETag"].strip('"')
+    cache.get_path("bucket", "a.mp3")
+    hit = cache._hit
+    def evicted_hit(path):
+        os.unlink(path)
+        return hit(path)
+    cache._hit = evicted_hit
+    with open(cache.get_path("bucket", "a.mp3"), "rb") as f:
+        assert f.read() == b"v1"
+    assert requests == [None, f'"{etag}"', None]
+
+def test_one_shot_streams_skip_the_disk_cache_but_use_existing_copies(tmp_path, s3_bucket, monkeypatch):
+    from backend import s3_utils
+    s3, requests = s3_bucket
+    monkeypatch.setattr(s3_utils, 'get_s3_client', lambda: s3)
+    monkeypatch.setattr(s3_utils, 'blob_cache', BlobCache("blobs", get_client=lambda: s3, root=str(tmp_path)))
+    etag = s3.put_object(Bucket="bucket", Key="a.mp3", Body=b"v1")["ETag"].strip('"')
+    with s3_utils.open_s3_stream("bucket", "a.mp3", etag=etag) as f:
+        assert f.read() == b"v1"
+    assert list(tmp_path.glob("blobs/*/*")) == []
+    with s3_utils.open_s3_stream("bucket", "a.mp3", etag=etag, reuse=True) as f:
+        assert f.read() == b"v1"
+    with s3_utils.open_s3_stream("bucket", "a.mp3", etag=etag) as f:
+        assert f.read() == b"v1"
+    assert len(requests) == 2
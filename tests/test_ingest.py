@@ -0,0 +1,110 @@
+import json
+import time
+import boto3
+import pytest
+from moto import mock_aws
+from backend import ingest, s3_index
+
+def s3_event(name, key, bucket="bucket", size=10, etag="e1", sequencer=None):
+    obj = {"key": key, "size": size, "eTag": etag}
+    if sequencer:
+        obj["sequencer"] = sequencer
+    return json.dumps({"Records": [{
+        "eventName": name,
+        "eventTime": "2024-01-01T00:00:00.000Z",
+        "s3": {"bucket": {"name": bucket}, "object": obj},
+    }]})
+
+def indexed_keys():
+    conn = s3_index.get_index_connection()
+    keys = [row[0] for row in conn.execute("SELECT key FROM s3_objects")]
+    conn.close()
+    return keys
+
+def set_listed_at(when):
+    conn = s3_index.get_index_connection()
+    conn.execute("UPDATE s3_prefixes SET refreshed_at = ?", (when,))
+    conn.commit()
+    conn.close()
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.setattr(s3_index, 'S3_INDEX_DB_PATH', str(tmp_path / "index.sqlite3"))
+    monkeypatch.setattr(s3_index, 'iter_s3_objects', lambda bucket, prefix="": [])
+    jobs = []
+    monkeypatch.setattr(ingest, 'submit_job', lambda bucket, key, language=None: jobs.append((key, language)))
+    return jobs
+
+@pytest.fixture
+def queue(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_aws():
+        sqs = boto3.client("sqs", region_name="us-east-1")
+        monkeypatch.setattr(ingest, 'get_sqs_client', lambda: sqs)
+        yield sqs, sqs.create_queue(QueueName="events")["QueueUrl"]
+
+def test_parse_decodes_keys_and_unwraps_sns():
+    body = json.dumps({"Type": "Notification", "Message": s3_event("ObjectCreated:Put", "recordings/alice/my+note.wav")})
+    [event] = ingest.parse_s3_events(body)
+    assert event["action"] == "created" and event["key"] == "recordings/alice/my note.wav"
+    assert ingest.parse_s3_events(json.dumps({"Event": "s3:TestEvent"})) == []
+
+def test_events_update_index_and_queue_new_recordings(index, queue):
+    sqs, url = queue
+    sqs.send_message(QueueUrl=url, MessageBody=s3_event("ObjectCreated:Put", "recordings/alice/a.wav"))
+    sqs.send_message(QueueUrl=url, MessageBody=s3_event("ObjectCreated:Put", "originals/alice/a.wav"))
+    applied = 0
+    for _ in range(3):
+        applied += ingest.poll_once(url, auto_transcribe=True, language="Hindi", wait_seconds=0)[0]
+    assert applied == 2
+    assert index == [("recordings/alice/a.wav", "Hindi")]
+
+    sqs.send_message(QueueUrl=url, MessageBody=s3_event("ObjectRemoved:Delete", "originals/alice/a.wav"))
+    ingest.poll_once(url, wait_seconds=0)
+    assert indexed_keys() == ["recordings/alice/a.wav"]
+    assert "Messages" not in sqs.receive_message(QueueUrl=url, WaitTimeSeconds=0)
+
+def test_bad_message_stays_on_the_queue(index, queue):
+    sqs, url = queue
+    sqs.send_message(QueueUrl=url, MessageBody="not json")
+    assert ingest.poll_once(url, wait_seconds=0)[2] == 1
+    attributes = sqs.get_queue_attributes(QueueUrl=url, AttributeNames=["ApproximateNumberOfMessagesNotVisible"])
+    assert attributes["Attributes"]["ApproximateNumberOfMessagesNotVisible"] == "1"
+
+def test_removed_before_created_keeps_the_object_deleted(index):
+    key = "recordings/alice/a.wav"
+    ingest.apply_event(ingest.parse_s3_events(s3_event("ObjectRemoved:Delete", key, sequencer="0055AED6DCD90281E6"))[0])
+    ingest.apply_event(ingest.parse_s3_events(s3_event("ObjectCreated:Put", key, sequencer="0055AED6DCD90281E5"))[0],
+                       auto_transcribe=True)
+    assert indexed_keys() == [] and index == []
+    # Shorter sequencers are left-padded before comparing
+    ingest.apply_event(ingest.parse_s3_events(s3_event("ObjectCreated:Put", key, sequencer="55AED6DCD90281E7"))[0])
+    assert indexed_keys() == [key]
+
+def test_touch_keeps_listed_prefixes_fresh_until_the_relist_backstop(index, monkeypatch):
+    s3_index.list_indexed_audio_files("bucket", ["recordings/alice/"])
+    set_listed_at(time.time() - 2 * s3_index.S3_INDEX_TTL_SECONDS)
+    s3_index.touch_prefixes("bucket", time.time())
+    calls = []
+    monkeypatch.setattr(s3_index, 'iter_s3_objects', lambda bucket, prefix="": calls.append(prefix) or [])
+    s3_index.list_indexed_audio_files("bucket", ["recordings/alice/"])
+    assert calls == []
+    set_listed_at(time.time() - s3_index.S3_INDEX_RELIST_SECONDS - 1)
+    s3_index.list_indexed_audio_files("bucket", ["recordings/alice/"])
+    assert calls == ["recordings/alice/"]
+
+def test_failed_poll_does_not_extend_freshness(index, monkeypatch):
+    touched = []
+    monkeypatch.setattr(ingest, 'touch_prefixes', lambda bucket, when: touched.append(bucket))
+    stop = ingest.threading.Event()
+    results = iter([(0, {"bucket"}, 1), (1, {"bucket"}, 0)])
+    def poll_once(*args):
+        try:
+            return next(results)
+        except StopIteration:
+            stop.set()
+            return 0, set(), 0
+    monkeypatch.setattr(ingest, 'poll_once', poll_once)
+    ingest.run_ingest("queue", "bucket", stop_event=stop, log=lambda message: None)
+    assert touched == ["bucket", "bucket"]
@@ -0,0 +1,96 @@
+import threading
+import pytest
+from backend import jobs
+
+@pytest.fixture(autouse=True)
+def jobs_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, 'JOBS_DB_PATH', str(tmp_path / "jobs.sqlite3"))
+
+def test_identical_in_flight_jobs_are_deduplicated():
+    first = jobs.submit_job("bucket", "a.mp3", "Hindi")
+    assert jobs.submit_job("bucket", "a.mp3", "Hindi") == first
+    assert jobs.submit_job("bucket", "a.mp3", None) != first
+    assert jobs.get_job(first)["status"] == jobs.QUEUED
+
+def test_claim_and_complete_job():
+    job_id = jobs.submit_job("bucket", "a.mp3", "Hindi")
+    job = jobs.claim_next_job("worker-1")
+    assert job["id"] == job_id
+    assert jobs.claim_next_job("worker-2") is None
+    assert jobs.complete_job(job_id, "worker-1", "hello", {"Hindi": "namaste"})
+    job = jobs.get_job(job_id)
+    assert job["status"] == jobs.DONE
+    assert job["translations"] == {"Hindi": "namaste"}
+    # A finished job no longer absorbs new submissions
+    assert jobs.submit_job("bucket", "a.mp3", "Hindi") != job_id
+
+def test_worker_retries_then_fails(monkeypatch):
+    monkeypatch.setattr(jobs, 'JOB_POLL_SECONDS', 0.01)
+    monkeypatch.setattr(jobs, 'JOB_MAX_ATTEMPTS', 2)
+    calls = []
+    def process_job(job):
+        calls.append(job["id"])
+        raise RuntimeError("whisper is down")
+    monkeypatch.setattr(jobs, 'process_job', process_job)
+    job_id = jobs.submit_job("bucket", "a.mp3")
+
+    stop = threading.Event()
+    worker = threading.Thread(target=jobs._worker_loop, args=("w", stop))
+    worker.start()
+    for _ in range(200):
+        if jobs.get_job(job_id)["status"] == jobs.FAILED:
+            break
+        stop.wait(0.01)
+    stop.set()
+    worker.join()
+
+    job = jobs.get_job(job_id)
+    assert job["status"] == jobs.FAILED
+    assert job["error"] == "whisper is down"
+    assert calls == [job_id, job_id]
+
+def test_expired_lease_requeues_then_fails_after_max_attempts(monkeypatch):
+    monkeypatch.setattr(jobs, 'JOB_MAX_ATTEMPTS', 2)
+    monkeypatch.setattr(jobs, 'JOB_LEASE_SECONDS', -1)  # every running job looks abandoned
+    job_id = jobs.submit_job("bucket", "huge.wav")
+    assert jobs.claim_next_job("w1")["attempts"] == 1
+    assert jobs.claim_next_job("w2")["attempts"] == 2
+    assert jobs.claim_next_job("w3") is None
+    job = jobs.get_job(job_id)
+    assert job["status"] == jobs.FAILED
+    assert "stopped responding" in job["error"]
+
+def test_heartbeat_keeps_long_jobs_leased(monkeypatch):
+    monkeypatch.setattr(jobs, 'JOB_HEARTBEAT_SECONDS', 0.01)
+    monkeypatch.setattr(jobs, 'JOB_POLL_SECONDS', 0.01)
+    job_id = jobs.submit_job("bucket", "long.mp3")
+    claimed_at = []
+    def process_job(job):
+        claimed_at.append(jobs.get_job(job["id"])["updated_at"])
+        threading.Event().wait(0.1)
+        claimed_at.append(jobs.get_job(job["id"])["updated_at"])
+        return "text", {}
+    monkeypatch.setattr(jobs, 'process_job', process_job)
+
+    stop = threading.Event()
+    worker = threading.Thread(target=jobs._worker_loop, args=("w", stop))
+    worker.start()
+    for _ in range(200):
+        if jobs.get_job(job_id)["status"] == jobs.DONE:
+            break
+        stop.wait(0.01)
+    stop.set()
+    worker.join()
+    assert jobs.get_job(job_id)["status"] == jobs.DONE
+    assert claimed_at[1] > claimed_at[0]
+
+def test_stale_worker_cannot_finish_a_reclaimed_job(monkeypatch):
+    job_id = jobs.submit_job("bucket", "a.mp3")
+    jobs.claim_next_job("slow")
+    monkeypatch.setattr(jobs, 'JOB_LEASE_SECONDS', -1)
+    jobs.claim_next_job("fast")
+    assert not jobs.fail_job(job_id, "slow", "timed out")
+    assert not jobs.complete_job(job_id, "slow", "stale")
+    assert jobs.get_job(job_id)["status"] == jobs.RUNNING
+    assert jobs.complete_job(job_id, "fast", "fresh")
+    assert jobs.get_job(job_id)["transcript"] == "fresh"
@@ -0,0 +1,45 @@
+import urllib.request
+import pytest
+from backend import metrics
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+def test_instrument_counts_calls_errors_and_latency():
+    @metrics.instrument("demo")
+    def work(fail=False):
+        if fail:
+            raise ValueError("boom")
+        return 42
+
+    assert work() == 42
+    with pytest.raises(ValueError):
+        work(fail=True)
+    row = metrics.stage_summary()["demo"]
+    assert row["calls"] == 2
+    assert row["errors"] == 1
+    assert row["p95_seconds"] <= metrics.LATENCY_BUCKETS[0]
+
+def test_generators_are_timed_until_exhausted():
+    @metrics.instrument("listing")
+    def items():
+        yield 1
+        yield 2
+
+    gen = items()
+    assert metrics.stage_summary() == {}
+    assert list(gen) == [1, 2]
+    assert metrics.stage_summary()["listing"]["calls"] == 1
+
+def test_prometheus_endpoint_serves_histograms_and_bytes():
+    with metrics.timer("s3.download"):
+        metrics.record_bytes("s3.download", 1024, "in")
+    port = metrics.start_metrics_server(0, host="127.0.0.1")
+    body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics").read().decode()
+    assert '# TYPE stage_latency_seconds histogram' in body
+    assert 'stage_latency_seconds_bucket{stage="s3.download",le="+Inf"} 1' in body
+    assert 'stage_bytes_total{direction="in",stage="s3.download"} 1024' in body
+    assert metrics.stage_summary()["s3.download"]["bytes"] == 1024
@@ -0,0 +1,61 @@
+import io
+import time
+import asyncio
+import pytest
+import openai
+from backend import openai_client
+from backend.openai_client import AsyncOpenAIClient, TokenBucket
+from tests.fake_openai import FakeOpenAI
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    monkeypatch.setattr(openai_client, 'OPENAI_BACKOFF_BASE_SECONDS', 0.01)
+    with FakeOpenAI(latency=0.05) as fake:
+        monkeypatch.setattr(openai, 'api_base', fake.url)
+        monkeypatch.setattr(openai, 'api_key', "test-key")
+        yield fake
+
+def test_retries_rate_limits_and_server_errors(fake_api):
+    fake_api.failures = [429, 503]
+    async def main():
+        client = AsyncOpenAIClient()
+        reply = await client.chat([{"role": "user", "content": "hi"}], model="gpt-4")
+        return client, reply
+    client, reply = asyncio.run(main())
+    assert reply == "hi"
+    assert client.stats["retries"] == 2
+    assert len(fake_api.requests) == 3
+
+def test_non_retryable_errors_surface_immediately(fake_api):
+    fake_api.failures = [400]
+    async def main():
+        await AsyncOpenAIClient().chat([{"role": "user", "content": "hi"}], model="gpt-4")
+    with pytest.raises(openai.error.InvalidRequestError):
+        asyncio.run(main())
+    assert len(fake_api.requests) == 1
+
+def test_concurrency_is_bounded(fake_api):
+    async def main():
+        client = AsyncOpenAIClient(max_concurrency=2)
+        return await asyncio.gather(*[
+            client.transcribe(io.BytesIO(b"audio"), "a.mp3") for _ in range(6)
+        ])
+    assert asyncio.run(main()) == ["hello world"] * 6
+    assert fake_api.max_in_flight == 2
+
+def test_call_timeout_is_retried_then_raised(fake_api):
+    fake_api.latency = 0.5
+    async def main():
+        client = AsyncOpenAIClient(timeout=0.05, max_retries=1)
+        await client.chat([{"role": "user", "content": "hi"}], model="gpt-4")
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(main())
+
+def test_token_bucket_paces_requests():
+    async def main():
+        bucket = TokenBucket(rate_per_minute=600, capacity=1)
+        start = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        return time.monotonic() - start
+    assert asyncio.run(main()) >= 0.25
@@ -0,0 +1,69 @@
+import io
+import pytest
+from backend import openai_utils
+from backend.cache import DiskCache
+from tests.fake_openai import FakeOpenAI
+
+def translate_reply(messages):
+    language = messages[0]["content"].rsplit(" ", 1)[-1]
+    return f"[{language}] {messages[-1]['content']}"
+
+@pytest.fixture
+def fake_api(tmp_path, monkeypatch):
+    monkeypatch.setattr(openai_utils, 'translation_cache', DiskCache("t", root=str(tmp_path)))
+    with FakeOpenAI(chat_reply=translate_reply) as fake:
+        monkeypatch.setattr(openai_utils.openai, 'api_base', fake.url)
+        monkeypatch.setattr(openai_utils.openai, 'api_key', "test-key")
+        yield fake
+
+def test_translate_text_is_memoized(fake_api):
+    assert openai_utils.translate_text("hello", "Hindi") == "[Hindi] hello"
+    assert openai_utils.translate_text("hello", "Hindi") == "[Hindi] hello"
+    assert len(fake_api.requests) == 1
+
+def test_translate_text_multi_fans_out(fake_api):
+    openai_utils.translate_text("hello", "Hindi")
+    results = openai_utils.translate_text_multi("hello", ["Hindi", "Spanish", "French"])
+    assert list(results) == ["Hindi", "Spanish", "French"]
+    assert results["Spanish"] == "[Spanish] hello"
+    assert len(fake_api.requests) == 3
+
+def test_transcribe_audio_accepts_streams(fake_api):
+    assert openai_utils.transcribe_audio(io.BytesIO(b"data"), filename="recordings/a/b.wav") == "hello world"
+    assert fake_api.requests == ["/v1/audio/transcriptions"]
+
+def test_chunk_text_keeps_sentences_whole():
+    text = "One two three. Four five six! Seven eight nine? Ten."
+    chunks = openai_utils.chunk_text(text, max_tokens=5)
+    # "Seven eight nine?" (4 tokens) and "Ten." (1 token) still fit one budget
+    assert chunks == ["One two three.", "Four five six!", "Seven eight nine? Ten."]
+    assert openai_utils.chunk_text(text, max_tokens=1000) == [text]
+
+def test_chunk_text_splits_oversized_sentences_on_words():
+    chunks = openai_utils.chunk_text("word " * 40, max_tokens=10)
+    assert all(openai_utils.estimate_tokens(chunk) <= 10 for chunk in chunks)
+    assert " ".join(chunks).split() == ["word"] * 40
+
+def test_long_transcripts_are_translated_in_order(fake_api, monkeypatch):
+    monkeypatch.setattr(openai_utils, 'TRANSLATION_CHUNK_TOKENS', 5)
+    text = "First sentence here. Second sentence here. Third sentence here."
+    translated = openai_utils.translate_text(text, "Hindi")
+    assert translated == "[Hindi] First sentence here. [Hindi] Second sentence here. [Hindi] Third sentence here."
+    assert len(fake_api.requests) == 3
+
+def test_translate_stream_yields_deltas_and_fills_the_cache(fake_api, monkeypatch):
+    monkeypatch.setattr(openai_utils, 'TRANSLATION_CHUNK_TOKENS', 5)
+    text = "First sentence here. Second sentence here. Third sentence here."
+    pieces = list(openai_utils.translate_text_stream(text, "Hindi"))
+    assert len(pieces) > 3
+    assert "".join(pieces) == "[Hindi] First sentence here. [Hindi] Second sentence here. [Hindi] Third sentence here."
+    assert openai_utils.translate_text(text, "Hindi") == "".join(pieces)
+    assert len(fake_api.requests) == 3
+
+def test_chunked_transcription_streams_stitched_segments(monkeypatch):
+    texts = {"a.wav#0": "the quick brown fox", "a.wav#1": "brown fox jumps over", "a.wav#2": "jumps over the dog"}
+    monkeypatch.setattr(openai_utils, 'split_audio', lambda data, filename: [(b"", name) for name in texts])
+    monkeypatch.setattr(openai_utils, 'transcribe_audio', lambda stream, filename, engine=None: texts[filename])
+    pieces = list(openai_utils.transcribe_audio_chunked_stream(b"", "a.wav"))
+    assert pieces == ["the quick brown fox", " jumps over", " the dog"]
+    assert "".join(pieces) == openai_utils.transcribe_audio_chunked(b"", "a.wav")
@@ -0,0 +1,38 @@
+import pytest
+from backend import s3_index
+
+OBJECTS = [
+    {'key': 'recordings/alice/a.wav', 'size': 10, 'etag': 'e1', 'last_modified': '2024-01-01T00:00:00'},
+    {'key': 'recordings/alice/notes.txt', 'size': 5, 'etag': 'e2', 'last_modified': '2024-01-01T00:00:00'},
+    {'key': 'recordings/bob/b.mp3', 'size': 20, 'etag': 'e3', 'last_modified': '2024-01-01T00:00:00'},
+]
+
+@pytest.fixture
+def fake_s3(tmp_path, monkeypatch):
+    monkeypatch.setattr(s3_index, 'S3_INDEX_DB_PATH', str(tmp_path / "index.sqlite3"))
+    calls = []
+    def iter_objects(bucket_name, prefix=""):
+        calls.append(prefix)
+        return [o for o in OBJECTS if o['key'].startswith(prefix)]
+    monkeypatch.setattr(s3_index, 'iter_s3_objects', iter_objects)
+    return calls
+
+def test_listing_is_served_from_index_within_ttl(fake_s3):
+    keys = s3_index.list_indexed_audio_files("bucket", ["recordings/alice/"])
+    assert keys == ['recordings/alice/a.wav']
+    s3_index.list_indexed_audio_files("bucket", ["recordings/alice/"])
+    assert fake_s3 == ["recordings/alice/"]
+
+def test_bucket_refresh_covers_sub_prefixes(fake_s3):
+    s3_index.list_indexed_audio_files("bucket", [""])
+    keys = s3_index.list_indexed_audio_files("bucket", ["recordings/bob/"])
+    assert keys == ['recordings/bob/b.mp3']
+    assert fake_s3 == [""]
+
+def test_upsert_and_delete_object(fake_s3):
+    s3_index.list_indexed_audio_files("bucket", ["recordings/alice/"])
+    s3_index.upsert_object("bucket", {'key': 'recordings/alice/c.mp3', 'size': 1, 'etag': 'e', 'last_modified': 'x'})
+    assert s3_index.list_indexed_audio_files("bucket", ["recordings/alice/"]) == [
+        'recordings/alice/a.wav', 'recordings/alice/c.mp3']
+    s3_index.delete_object("bucket", 'recordings/alice/a.wav')
+    assert s3_index.list_indexed_audio_files("bucket", ["recordings/alice/"]) == ['recordings/alice/c.mp3']
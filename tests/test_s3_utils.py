@@ -0,0 +1,32 @@
+import io
+import pytest
+from backend import s3_utils
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    from unittest.mock import MagicMock
+    client = MagicMock()
+    monkeypatch.setattr(s3_utils, 'get_s3_client', lambda: client)
+    return client
+
+def test_upload_streams_file_objects_without_temp_file(fake_client):
+    fileobj = io.BytesIO(b"audio")
+    success, s3_key = s3_utils.upload_to_s3("bucket", fileobj=fileobj, filename="voice.mp3",
+                                            user_email="alice@example.com")
+    assert success
+    assert s3_key.startswith("recordings/alice/") and s3_key.endswith("_voice.mp3")
+    args, kwargs = fake_client.upload_fileobj.call_args
+    assert args == (fileobj, "bucket", s3_key)
+    assert kwargs["Config"].multipart_threshold == s3_utils.S3_MULTIPART_THRESHOLD_MB * 1024 * 1024
+    fake_client.upload_file.assert_not_called()
+
+def test_upload_reports_failure(fake_client):
+    fake_client.upload_file.side_effect = RuntimeError("denied")
+    assert s3_utils.upload_custom_file_to_s3("bucket", "/tmp/a.wav") == (False, "denied")
+
+def test_upload_progress_accumulates_increments():
+    updates = []
+    progress = s3_utils.UploadProgress(200, lambda fraction, sent: updates.append((fraction, sent)))
+    progress(50)
+    progress(150)
+    assert updates == [(0.25, 50), (1.0, 200)]
@@ -0,0 +1,81 @@
+import time
+import pytest
+from unittest.mock import MagicMock
+from backend import sessions
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_cursor.rowcount = 0
+    mock_conn.cursor.return_value = mock_cursor
+    monkeypatch.setattr('backend.auth.get_db_connection', lambda: mock_conn)
+    monkeypatch.setattr(sessions, '_schema_ready', True)
+    monkeypatch.setattr(sessions, '_last_sweep', time.time())
+    sessions.session_cache.clear()
+    return mock_conn, mock_cursor
+
+def test_valid_session_is_served_from_cache(mock_db):
+    mock_conn, mock_cursor = mock_db
+    token = sessions.create_session("alice@example.com")
+    mock_cursor.execute.reset_mock()
+    assert sessions.validate_session(token) == "alice@example.com"
+    mock_cursor.execute.assert_not_called()
+
+def test_forged_token_is_rejected_without_a_query(mock_db):
+    mock_conn, mock_cursor = mock_db
+    token = sessions.create_session("alice@example.com")
+    session_id, _ = token.rsplit(".", 1)
+    mock_cursor.execute.reset_mock()
+    assert sessions.validate_session(f"{session_id}.{'0' * 64}") is None
+    assert sessions.validate_session("garbage") is None
+    mock_cursor.execute.assert_not_called()
+
+def test_cache_miss_falls_back_to_mysql(mock_db):
+    mock_conn, mock_cursor = mock_db
+    token = sessions.create_session("alice@example.com")
+    sessions.session_cache.clear()
+    mock_cursor.fetchone.return_value = ("alice@example.com", time.time() + 60)
+    assert sessions.validate_session(token) == "alice@example.com"
+    mock_cursor.fetchone.return_value = None
+    sessions.session_cache.clear()
+    assert sessions.validate_session(token) is None
+
+def test_revoked_session_is_evicted(mock_db):
+    mock_conn, mock_cursor = mock_db
+    token = sessions.create_session("alice@example.com")
+    sessions.revoke_session(token)
+    mock_cursor.fetchone.return_value = None
+    assert sessions.validate_session(token) is None
+
+def test_revocation_elsewhere_is_seen_after_the_cache_ttl(mock_db, monkeypatch):
+    mock_conn, mock_cursor = mock_db
+    token = sessions.create_session("alice@example.com")
+    # Another process revoked it: the row is gone but this cache still has it
+    mock_cursor.fetchone.return_value = None
+    assert sessions.validate_session(token) == "alice@example.com"
+    now = time.time()
+    monkeypatch.setattr(sessions.time, 'time', lambda: now + sessions.SESSION_CACHE_TTL_SECONDS + 1)
+    assert sessions.validate_session(token) is None
+
+def test_expire_sessions_deletes_in_batches(mock_db):
+    mock_conn, mock_cursor = mock_db
+    deleted = iter([2, 2, 1])
+
+    def execute(query, params=()):
+        mock_cursor.rowcount = next(deleted)
+    mock_cursor.execute.side_effect = execute
+    assert sessions.expire_sessions(batch_size=2) == 5
+    assert mock_cursor.execute.call_count == 3
+
+def test_lru_drops_least_recently_used():
+    cache = sessions.SessionCache(max_entries=2)
+    expires = time.time() + 60
+    cache.set("a", "a@x", expires)
+    cache.set("b", "b@x", expires)
+    cache.get("a")
+    cache.set("c", "c@x", expires)
+    assert cache.get("b") is None
+    assert cache.get("a") == "a@x"
+    cache.set("old", "old@x", time.time() - 1)
+    assert cache.get("old") is None
@@ -0,0 +1,56 @@
+import pytest
+from unittest.mock import MagicMock
+import mysql.connector
+from backend import transcript_store, pipeline
+from backend.cache import DiskCache
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    monkeypatch.setattr('backend.auth.get_db_connection', lambda: mock_conn)
+    monkeypatch.setattr(transcript_store, 'TRANSCRIPT_STORE', "mysql")
+    monkeypatch.setattr(transcript_store, '_schema_ready', True)
+    return mock_conn, mock_cursor
+
+def test_user_folder_from_key():
+    assert transcript_store.user_folder_from_key("recordings/alice/20240101_a.wav") == "alice"
+    assert transcript_store.user_folder_from_key("custom_uploads/bob/x.mp3") == "bob"
+    assert transcript_store.user_folder_from_key("other/x.mp3") is None
+
+def test_save_upserts_one_row_per_language(mock_db):
+    mock_conn, mock_cursor = mock_db
+    assert transcript_store.save_transcripts("bucket", "recordings/alice/a.wav", "etag1",
+                                             {None: "hello", "Hindi": "namaste"}, compute_seconds=2.0)
+    query, rows = mock_cursor.executemany.call_args[0]
+    assert "ON DUPLICATE KEY UPDATE" in query
+    assert [(r[3], r[5], r[6]) for r in rows] == [("", "alice", "hello"), ("Hindi", "alice", "namaste")]
+    mock_conn.commit.assert_called_once()
+
+def test_store_errors_do_not_break_the_pipeline(mock_db):
+    mock_conn, mock_cursor = mock_db
+    mock_cursor.executemany.side_effect = mysql.connector.Error("gone away")
+    assert transcript_store.save_transcript("bucket", "a.wav", "etag1", "hello") is False
+
+def test_search_is_scoped_to_the_user(mock_db):
+    mock_conn, mock_cursor = mock_db
+    text = "intro " * 50 + "the budget review is on Friday"
+    mock_cursor.fetchall.return_value = [("bucket", "recordings/alice/a.wav", "e", "", text, 1.5, 0.0, 3.2)]
+    results = transcript_store.search_transcripts("budget", "alice@example.com")
+    query, params = mock_cursor.execute.call_args[0]
+    assert "MATCH (text) AGAINST" in query and "user_folder = %s" in query
+    assert params == ("budget", "budget", "alice", "", 20)
+    assert results[0]["s3_key"] == "recordings/alice/a.wav"
+    assert results[0]["language"] is None
+    assert "budget review" in results[0]["snippet"] and results[0]["snippet"].startswith("…")
+
+def test_pipeline_reuses_stored_transcript(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, 'transcript_cache', DiskCache("t", root=str(tmp_path)))
+    monkeypatch.setattr(pipeline, 'get_s3_etag', lambda bucket, key: "etag1")
+    monkeypatch.setattr(pipeline.transcript_store, 'get_transcript', lambda bucket, key, etag, engine="": "stored text")
+    monkeypatch.setattr(pipeline, 'open_s3_stream', lambda bucket, key, etag=None: pytest.fail("should not download"))
+    assert pipeline.transcribe_s3_object("bucket", "a.mp3") == ("stored text", "etag1")
+    # ...and the local cache is warmed for the next lookup
+    monkeypatch.setattr(pipeline.transcript_store, 'get_transcript', lambda bucket, key, etag, engine="": None)
+    assert pipeline.transcribe_s3_file("bucket", "a.mp3") == "stored text"
@@ -0,0 +1,72 @@
+import io
+import sys
+import pytest
+from backend import transcription, openai_utils
+from backend.transcription import RoutingEngine, StubEngine, LocalWhisperEngine
+
+
+class FailingEngine(StubEngine):
+    def transcribe(self, stream, filename):
+        stream.read()
+        raise RuntimeError("model crashed")
+
+
+@pytest.fixture
+def engines(monkeypatch):
+    local, remote = StubEngine("local text"), StubEngine("api text")
+    monkeypatch.setattr(transcription, '_engine', RoutingEngine(local, remote, max_local_bytes=10))
+    return local, remote
+
+def test_short_clips_stay_local_and_long_ones_go_to_the_api(engines):
+    local, remote = engines
+    assert openai_utils.transcribe_audio(io.BytesIO(b"short"), filename="a.wav") == "local text"
+    assert openai_utils.transcribe_audio(io.BytesIO(b"x" * 100), filename="b.wav") == "api text"
+    assert local.calls == ["a.wav"] and remote.calls == ["b.wav"]
+
+def test_chunks_follow_the_whole_recording(engines, monkeypatch):
+    local, remote = engines
+    monkeypatch.setattr(openai_utils, 'split_audio', lambda data, filename: [(b"c", "a#0"), (b"c", "a#1")])
+    openai_utils.transcribe_audio_chunked(b"x" * 100, "a.wav")
+    assert local.calls == [] and sorted(remote.calls) == ["a#0", "a#1"]
+
+def test_local_failures_fall_back_to_the_api(monkeypatch):
+    remote = StubEngine("api text")
+    seen = []
+    remote.transcribe = lambda stream, filename: seen.append(stream.read()) or "api text"
+    # faster-whisper missing behaves like any other local failure
+    monkeypatch.setitem(sys.modules, "faster_whisper", None)
+    for local in (FailingEngine(), LocalWhisperEngine()):
+        engine = RoutingEngine(local, remote, max_local_bytes=10)
+        assert engine.transcribe(io.BytesIO(b"short"), "a.wav") == "api text"
+    assert seen == [b"short", b"short"]
+
+def test_unknown_engine_is_rejected():
+    assert isinstance(transcription.create_engine("stub"), StubEngine)
+    with pytest.raises(ValueError):
+        transcription.create_engine("whisper.cpp")
+
+def test_cache_keys_follow_the_engine_and_stub_output_is_never_cached(tmp_path, monkeypatch):
+    from backend import pipeline
+    from backend.cache import DiskCache
+    monkeypatch.setattr(pipeline, 'transcript_cache', DiskCache("t", root=str(tmp_path)))
+    monkeypatch.setattr(pipeline, 'get_s3_etag', lambda bucket, key: "etag1")
+    monkeypatch.setattr(pipeline, 'open_s3_stream', lambda bucket, key, etag=None: io.BytesIO(b"audio"))
+    stub = StubEngine("stub")
+    monkeypatch.setattr(transcription, '_engine', stub)
+    pipeline.transcribe_s3_file("bucket", "a.mp3")
+    pipeline.transcribe_s3_file("bucket", "a.mp3")
+    assert stub.calls == ["a.mp3", "a.mp3"]
+
+    class FakeWhisper(StubEngine):
+        cacheable = True
+        def __init__(self, model):
+            super().__init__(f"text from {model}")
+            self.model = model
+        @property
+        def identity(self):
+            return f"fake:{self.model}"
+
+    for model in ("small", "large", "small"):
+        monkeypatch.setattr(transcription, '_engine', FakeWhisper(model))
+        assert pipeline.transcribe_s3_file("bucket", "a.mp3") == f"text from {model}"
+    assert transcription._engine.calls == []
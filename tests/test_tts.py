@@ -0,0 +1,30 @@
+import openai
+import pytest
+from backend import tts
+from backend.cache import DiskCache
+from tests.fake_openai import FakeOpenAI
+
+@pytest.fixture
+def fake_api(tmp_path, monkeypatch):
+    monkeypatch.setattr(tts, 'tts_cache', DiskCache("tts", root=str(tmp_path)))
+    with FakeOpenAI() as fake:
+        monkeypatch.setattr(openai, 'api_base', fake.url)
+        monkeypatch.setattr(openai, 'api_key', "test-key")
+        yield fake
+
+def test_long_text_is_synthesized_in_order_and_cached(fake_api, monkeypatch):
+    monkeypatch.setattr(tts, 'TTS_CHUNK_CHARS', 20)
+    text = "First sentence here. Second sentence here. Third one."
+    chunks = list(tts.synthesize_speech_chunks(text))
+    assert chunks == [b"audio[First sentence here.]", b"audio[Second sentence here.]", b"audio[Third one.]"]
+    assert len(fake_api.requests) == 3
+    assert tts.synthesize_speech(text) == b"".join(chunks)
+    assert len(fake_api.requests) == 3
+    # A different voice is a different cache entry
+    tts.synthesize_speech(text, voice="echo")
+    assert len(fake_api.requests) == 6
+
+def test_tts_errors_are_retried(fake_api):
+    fake_api.failures = [500]
+    assert tts.synthesize_speech("Hello.") == b"audio[Hello.]"
+    assert fake_api.requests == ["/v1/audio/speech", "/v1/audio/speech"]